@@ -1,3 +1,4 @@
+import logging
 from rest_framework import viewsets, status, generics
 from rest_framework.views import APIView
 from rest_framework.decorators import action
@@ -13,6 +14,8 @@ from core.response import APIResponse
 from core.constants import SuccessMessages
 from .services import AuthService, UserService
 
+logger = logging.getLogger(__name__)
+
 
 class UserViewSet(viewsets.ModelViewSet):
     """User ViewSet for CRUD operations"""
@@ -94,9 +97,7 @@ class RegisterView(generics.CreateAPIView):
                     user_data.get('username', 'User')
                 )
             except Exception as e:
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.error(f"Failed to send welcome email: {str(e)}")
+                logger.error("Failed to send welcome email: %s", e)
             
             return APIResponse.created(
                 data=result,
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator
 
 
@@ -22,6 +22,26 @@ class Agence(models.Model):
     
     def __str__(self):
         return self.nom_agence
+    
+    def save(self, *args, **kwargs):
+        from core.reference_data import ReferenceDataService
+        from vehicles.services import VehicleCatalogueCache
+        
+        super().save(*args, **kwargs)
+        # The agency name is shown in the vehicle list
+        transaction.on_commit(lambda: VehicleCatalogueCache.invalidate(self.pk))
+        transaction.on_commit(ReferenceDataService.invalidate)
+    
+    def delete(self, *args, **kwargs):
+        from core.reference_data import ReferenceDataService
+        from vehicles.services import VehicleCatalogueCache
+        
+        agence_id = self.pk
+        result = super().delete(*args, **kwargs)
+        # Its vehicles and depots are deleted in cascade, without their delete()
+        transaction.on_commit(lambda: VehicleCatalogueCache.invalidate(agence_id))
+        transaction.on_commit(ReferenceDataService.invalidate)
+        return result
 
 
 class DemandePartenariat(models.Model):
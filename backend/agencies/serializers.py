@@ -1,17 +1,19 @@
 from rest_framework import serializers
 from .models import Agence, DemandePartenariat, DemandeCompteAdmin
 from accounts.serializers import UserSerializer
+from core.file_service import FileService
 
 
 class AgenceSerializer(serializers.ModelSerializer):
     """Agence serializer"""
     logo_url = serializers.SerializerMethodField()
+    logo_renditions = serializers.SerializerMethodField()
     
     class Meta:
         model = Agence
         fields = ['id', 'nom_agence', 'siege_agence', 'num_contact', 'email_agence',
                 'nmbr_succursales', 'nmbr_flotte', 'logo_agence', 'logo_url', 
-                'is_active', 'created_at', 'updated_at']
+                'logo_renditions', 'is_active', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
     
     def get_logo_url(self, obj):
@@ -20,6 +22,12 @@ class AgenceSerializer(serializers.ModelSerializer):
             if request:
                 return request.build_absolute_uri(obj.logo_agence.url)
         return None
+    
+    def get_logo_renditions(self, obj):
+        logo_url = self.get_logo_url(obj)
+        if logo_url:
+            return FileService.get_rendition_urls(logo_url)
+        return None
 
 
 class DemandePartenariatSerializer(serializers.ModelSerializer):
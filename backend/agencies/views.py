@@ -1,3 +1,4 @@
+import logging
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -8,9 +9,14 @@ from .models import Agence, DemandePartenariat, DemandeCompteAdmin
 from .serializers import AgenceSerializer, DemandePartenariatSerializer, DemandeCompteAdminSerializer
 from accounts.models import User, ProprietaireAgence, AdminAgence
 from core.permissions import IsAdministrateur, IsProprietaireAgence, IsAdminAgence
+from core.response import APIResponse
+from core.file_service import FileService
+from core.conditional import ConditionalGetMixin
 
+logger = logging.getLogger(__name__)
 
-class AgenceViewSet(viewsets.ModelViewSet):
+
+class AgenceViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Agence ViewSet"""
     queryset = Agence.objects.all()
     serializer_class = AgenceSerializer
@@ -21,12 +27,80 @@ class AgenceViewSet(viewsets.ModelViewSet):
             return [IsAdministrateur()]
         return [IsAuthenticated()]
     
+    def create(self, request, *args, **kwargs):
+        """Create agency with logo processing"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        # Handle logo upload if provided
+        if 'logo_agence' in request.FILES:
+            try:
+                file_path = FileService.upload_image(
+                    request.FILES['logo_agence'],
+                    upload_path='agencies/logos/',
+                    prefix='logo'
+                )
+                serializer.validated_data['logo_agence'] = file_path
+            except ValueError as e:
+                return APIResponse.error(
+                    message=str(e),
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+        
+        self.perform_create(serializer)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    
+    def update(self, request, *args, **kwargs):
+        """Update agency with logo processing"""
+        partial = kwargs.pop('partial', False)
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        
+        # Handle logo upload if provided
+        if 'logo_agence' in request.FILES:
+            try:
+                file_path = FileService.upload_image(
+                    request.FILES['logo_agence'],
+                    upload_path='agencies/logos/',
+                    prefix='logo'
+                )
+                serializer.validated_data['logo_agence'] = file_path
+            except ValueError as e:
+                return APIResponse.error(
+                    message=str(e),
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+        
+        old_logo = instance.logo_agence.name if instance.logo_agence else None
+        try:
+            self.perform_update(serializer)
+        except Exception:
+            # Not saved: drop the logo uploaded above, the old one is still in use
+            if 'logo_agence' in request.FILES:
+                FileService.delete_file(serializer.validated_data['logo_agence'])
+            raise
+        # Release old logo once replaced (kept while other records reference it)
+        if old_logo and 'logo_agence' in request.FILES:
+            FileService.delete_file(old_logo)
+        return Response(serializer.data)
+    
+    def perform_destroy(self, instance):
+        logo_path = instance.logo_agence.name if instance.logo_agence else None
+        instance.delete()
+        if logo_path:
+            FileService.delete_file(logo_path)
+    
     @action(detail=False, methods=['get'])
     def active(self, request):
         """Get all active agencies"""
         agencies = Agence.objects.filter(is_active=True)
-        serializer = self.get_serializer(agencies, many=True)
-        return Response(serializer.data)
+        # Rarely changes: clients may reuse their copy for a few minutes
+        return self.conditional_response(
+            request, agencies,
+            lambda: Response(self.get_serializer(agencies, many=True).data),
+            cache_control={'private': True, 'max_age': 300},
+        )
 
 
 class DemandePartenariatViewSet(viewsets.ModelViewSet):
@@ -89,9 +163,7 @@ class DemandePartenariatViewSet(viewsets.ModelViewSet):
                 user.email
             )
         except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Failed to send email: {str(e)}")
+            logger.error("Failed to send email: %s", e)
         
         # Send welcome email
         try:
@@ -100,9 +172,7 @@ class DemandePartenariatViewSet(viewsets.ModelViewSet):
                 f"{user.first_name} {user.last_name}"
             )
         except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Failed to send welcome email: {str(e)}")
+            logger.error("Failed to send welcome email: %s", e)
         
         return Response({"message": "Partnership request approved successfully."})
     
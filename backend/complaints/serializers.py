@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Reclamation, Rapport, EtatVehicule
+from core.file_service import FileService
 
 
 class ReclamationSerializer(serializers.ModelSerializer):
@@ -21,13 +22,17 @@ class RapportSerializer(serializers.ModelSerializer):
     type_display = serializers.CharField(source='get_type_rapport_display', read_only=True)
     locataire_email = serializers.EmailField(source='locataire.user.email', read_only=True)
     vehicule_matricule = serializers.CharField(source='vehicule.matricule', read_only=True)
+    image_renditions = serializers.SerializerMethodField()
     
     class Meta:
         model = Rapport
         fields = ['id', 'description', 'type_rapport', 'type_display', 'images',
-                'locataire', 'locataire_email', 'agence', 'reservation', 'vehicule',
-                'vehicule_matricule', 'created_at']
+                'image_renditions', 'locataire', 'locataire_email', 'agence',
+                'reservation', 'vehicule', 'vehicule_matricule', 'created_at']
         read_only_fields = ['created_at']
+    
+    def get_image_renditions(self, obj):
+        return [FileService.get_rendition_urls(image_url) for image_url in obj.images or []]
 
 
 class EtatVehiculeSerializer(serializers.ModelSerializer):
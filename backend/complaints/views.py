@@ -1,3 +1,4 @@
+import logging
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -11,10 +12,12 @@ from core.email_service import EmailService
 from core.notifications import NotificationService
 from core.file_service import FileService
 
+logger = logging.getLogger(__name__)
+
 
 class ReclamationViewSet(viewsets.ModelViewSet):
     """Reclamation ViewSet"""
-    queryset = Reclamation.objects.all()
+    queryset = Reclamation.objects.select_related('locataire__user', 'agence')
     serializer_class = ReclamationSerializer
     permission_classes = [IsAuthenticated]
     
@@ -37,17 +40,13 @@ class ReclamationViewSet(viewsets.ModelViewSet):
                     owner.user.email
                 )
         except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Failed to send email: {str(e)}")
+            logger.error("Failed to send email: %s", e)
         
         # Create in-app notification
         try:
             NotificationService.notify_complaint_received(complaint)
         except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Failed to create notification: {str(e)}")
+            logger.error("Failed to create notification: %s", e)
     
     @action(detail=True, methods=['post'], permission_classes=[IsProprietaireAgence])
     def resolve(self, request, pk=None):
@@ -65,9 +64,7 @@ class ReclamationViewSet(viewsets.ModelViewSet):
         try:
             NotificationService.notify_complaint_resolved(reclamation)
         except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Failed to create notification: {str(e)}")
+            logger.error("Failed to create notification: %s", e)
         
         return APIResponse.success(
             data=ReclamationSerializer(reclamation).data,
@@ -77,7 +74,7 @@ class ReclamationViewSet(viewsets.ModelViewSet):
 
 class RapportViewSet(viewsets.ModelViewSet):
     """Rapport ViewSet"""
-    queryset = Rapport.objects.all()
+    queryset = Rapport.objects.select_related('locataire__user', 'vehicule')
     serializer_class = RapportSerializer
     permission_classes = [IsLocataire]
     
@@ -88,24 +85,21 @@ class RapportViewSet(viewsets.ModelViewSet):
         
         images = []
         
-        # Handle image uploads if provided
+        # Handle image uploads if provided (processed in parallel in the worker pool)
         if 'images' in request.FILES:
             uploaded_files = request.FILES.getlist('images')
-            for uploaded_file in uploaded_files:
-                try:
-                    file_path = FileService.upload_image(
-                        uploaded_file,
-                        upload_path='reports/',
-                        prefix='report'
-                    )
+            results = FileService.upload_images(
+                uploaded_files,
+                upload_path='reports/',
+                prefix='report'
+            )
+            for file_path, error in results:
+                if file_path:
                     # Get full URL
-                    if file_path:
-                        images.append(request.build_absolute_uri(f'/media/{file_path}'))
-                except ValueError as e:
+                    images.append(request.build_absolute_uri(f'/media/{file_path}'))
+                else:
                     # Log error but continue with other images
-                    import logging
-                    logger = logging.getLogger(__name__)
-                    logger.error(f"Failed to upload image: {str(e)}")
+                    logger.error("Failed to upload image: %s", error)
         
         # Save report with images
         report = serializer.save(locataire=request.user.locataire, images=images)
@@ -115,11 +109,17 @@ class RapportViewSet(viewsets.ModelViewSet):
             data=serializer.data,
             message="Report created successfully."
         )
+    
+    def perform_destroy(self, instance):
+        images = list(instance.images or [])
+        instance.delete()
+        for image_url in images:
+            FileService.delete_file(FileService.path_from_url(image_url))
 
 
 class EtatVehiculeViewSet(viewsets.ModelViewSet):
     """Etat vehicule ViewSet"""
-    queryset = EtatVehicule.objects.all()
+    queryset = EtatVehicule.objects.select_related('vehicule', 'garagiste__user')
     serializer_class = EtatVehiculeSerializer
     permission_classes = [IsGaragiste]
     
@@ -0,0 +1,34 @@
+"""
+Generate the contract PDFs of a day's pickups
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from contracts.services import ContractPDFService
+
+
+class Command(BaseCommand):
+    help = "Generate contract PDFs for the reservations starting on a given day"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Pickup date (YYYY-MM-DD), defaults to today")
+        parser.add_argument('--agence', type=int, help="Only this agency")
+        parser.add_argument('--replace', action='store_true', help="Regenerate existing PDFs")
+
+    def handle(self, *args, **options):
+        from agencies.models import Agence
+
+        pickup_date = timezone.localdate()
+        if options['date']:
+            pickup_date = parse_date(options['date'])
+            if pickup_date is None:
+                raise CommandError("Invalid date, expected YYYY-MM-DD")
+
+        agence = None
+        if options['agence']:
+            agence = Agence.objects.filter(pk=options['agence']).first()
+            if agence is None:
+                raise CommandError(f"Agency {options['agence']} not found")
+
+        generated = ContractPDFService.generate_for_date(pickup_date, agence, options['replace'])
+        self.stdout.write(self.style.SUCCESS(f"Generated {generated} contract PDF(s) for {pickup_date}."))
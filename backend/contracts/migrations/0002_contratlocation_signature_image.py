@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contratlocation',
+            name='signature_image',
+            field=models.ImageField(blank=True, null=True, upload_to='signatures/'),
+        ),
+    ]
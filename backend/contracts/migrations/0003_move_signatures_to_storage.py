@@ -0,0 +1,133 @@
+import base64
+import binascii
+import hashlib
+import os
+from io import BytesIO
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import migrations, transaction
+from django.db.models import F
+
+
+BATCH_SIZE = 200
+MAX_SIGNATURE_SIZE = 1024 * 1024
+
+# Pillow format -> file extension
+EXTENSIONS = {'PNG': '.png', 'JPEG': '.jpg', 'MPO': '.jpg', 'GIF': '.gif', 'WEBP': '.webp'}
+
+# File handling is inlined (not imported from the services) so that later
+# changes to the services or to MediaBlob cannot break this migration.
+
+
+def decode_signature(signature):
+    """Image bytes and extension of a Base64 signature, or None if unreadable"""
+    from PIL import Image
+    
+    encoded = signature.partition(',')[2] if signature.startswith('data:') else signature
+    try:
+        data = base64.b64decode(''.join(encoded.split()), validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    if len(data) > MAX_SIGNATURE_SIZE:
+        return None
+    try:
+        img = Image.open(BytesIO(data))
+    except Exception:
+        return None
+    if img.format not in EXTENSIONS:
+        return None
+    return data, EXTENSIONS[img.format]
+
+
+def store_blob(MediaBlob, data, ext):
+    """Store content at its content-addressed path, referencing an existing copy"""
+    digest = hashlib.sha256(data).hexdigest()
+    path = os.path.join('signatures/', digest[:2], f"signature_{digest}{ext}")
+    if MediaBlob.objects.filter(path=path).update(ref_count=F('ref_count') + 1):
+        return path
+    MediaBlob.objects.create(path=path, digest=digest, size=len(data), ref_count=1)
+    if default_storage.exists(path):
+        default_storage.delete(path)
+    default_storage.save(path, ContentFile(data))
+    return path
+
+
+def release_blob(MediaBlob, path):
+    """Drop a reference, deleting the file with the last one"""
+    blob = MediaBlob.objects.select_for_update().filter(path=path).first()
+    if blob is not None and blob.ref_count > 1:
+        MediaBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') - 1)
+        return
+    if blob is not None:
+        blob.delete()
+    if default_storage.exists(path):
+        default_storage.delete(path)
+
+
+def move_signatures(apps, schema_editor):
+    """Decode Base64 signatures into image files, one committed batch at a time"""
+    ContratLocation = apps.get_model('contracts', 'ContratLocation')
+    MediaBlob = apps.get_model('core', 'MediaBlob')
+    pending = ContratLocation.objects.exclude(signature_locataire__isnull=True).exclude(signature_locataire='')
+    
+    last_id = 0
+    while True:
+        batch = list(pending.filter(id__gt=last_id).order_by('id').only('id', 'signature_locataire')[:BATCH_SIZE])
+        if not batch:
+            break
+        last_id = batch[-1].id
+        
+        with transaction.atomic():
+            moved = []
+            for contrat in batch:
+                decoded = decode_signature(contrat.signature_locataire)
+                if decoded is None:
+                    # Unreadable signature: left in place
+                    continue
+                contrat.signature_image = store_blob(MediaBlob, *decoded)
+                contrat.signature_locataire = None
+                moved.append(contrat)
+            ContratLocation.objects.bulk_update(moved, ['signature_image', 'signature_locataire'])
+
+
+def restore_signatures(apps, schema_editor):
+    """Re-encode signature images as Base64 data URLs"""
+    ContratLocation = apps.get_model('contracts', 'ContratLocation')
+    MediaBlob = apps.get_model('core', 'MediaBlob')
+    pending = ContratLocation.objects.exclude(signature_image__isnull=True).exclude(signature_image='')
+    
+    last_id = 0
+    while True:
+        batch = list(pending.filter(id__gt=last_id).order_by('id').only('id', 'signature_image')[:BATCH_SIZE])
+        if not batch:
+            break
+        last_id = batch[-1].id
+        
+        with transaction.atomic():
+            paths = []
+            for contrat in batch:
+                path = contrat.signature_image.name
+                paths.append(path)
+                with default_storage.open(path, 'rb') as f:
+                    encoded = base64.b64encode(f.read()).decode('ascii')
+                ext = os.path.splitext(path)[1].lstrip('.').replace('jpg', 'jpeg')
+                contrat.signature_locataire = f"data:image/{ext};base64,{encoded}"
+                contrat.signature_image = None
+            ContratLocation.objects.bulk_update(batch, ['signature_image', 'signature_locataire'])
+            for path in paths:
+                release_blob(MediaBlob, path)
+
+
+class Migration(migrations.Migration):
+    
+    # Each batch commits on its own
+    atomic = False
+
+    dependencies = [
+        ('core', '0002_mediablob'),
+        ('contracts', '0002_contratlocation_signature_image'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_signatures, restore_signatures),
+    ]
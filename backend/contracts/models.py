@@ -1,6 +1,13 @@
 from django.db import models
 
 
+class ContratLocationManager(models.Manager):
+    """Leaves the legacy Base64 signature column out of contract queries"""
+    
+    def get_queryset(self):
+        return super().get_queryset().defer('signature_locataire')
+
+
 class ContratLocation(models.Model):
     """Contrat de location model - Rental Contract"""
     STATUS_CHOICES = [
@@ -14,10 +21,13 @@ class ContratLocation(models.Model):
     pdf_file = models.FileField(upload_to='contracts/', null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='DRAFT')
     signed_at = models.DateTimeField(null=True, blank=True)
-    signature_locataire = models.TextField(null=True, blank=True)  # Base64 signature image
+    signature_image = models.ImageField(upload_to='signatures/', null=True, blank=True)
+    signature_locataire = models.TextField(null=True, blank=True)  # Legacy Base64 signature, moved to signature_image
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ContratLocationManager()
+    
     class Meta:
         db_table = 'contrats_location'
         verbose_name = 'Contrat Location'
@@ -0,0 +1,199 @@
+"""
+Contract PDF rendering (runs inside worker processes)
+
+The static layer of the contract (styles, section frames, labels and the
+general conditions, whose line breaking is the expensive part) is built
+once per worker and reused; each contract only draws its own fields.
+"""
+import io
+import threading
+from typing import Any, Dict, List, Tuple
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_JUSTIFY
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import Paragraph
+
+
+PAGE_WIDTH, PAGE_HEIGHT = A4
+MARGIN = 50
+CONTENT_WIDTH = PAGE_WIDTH - 2 * MARGIN
+
+BRAND_COLOR = colors.HexColor('#ff7800')
+TITLE_COLOR = colors.HexColor('#130f40')
+
+# Section title -> [(field key, label)], laid out in two columns
+SECTIONS: List[Tuple[str, List[Tuple[str, str]]]] = [
+    ("Agence", [
+        ('agence_nom', 'Nom'),
+        ('agence_contact', 'Téléphone'),
+        ('agence_email', 'Email'),
+        ('agence_adresse', 'Adresse'),
+    ]),
+    ("Locataire", [
+        ('locataire_nom', 'Nom'),
+        ('locataire_telephone', 'Téléphone'),
+        ('locataire_email', 'Email'),
+    ]),
+    ("Véhicule", [
+        ('vehicule_nom', 'Véhicule'),
+        ('vehicule_matricule', 'Matricule'),
+        ('vehicule_categorie', 'Catégorie'),
+    ]),
+    ("Période et tarif", [
+        ('date_debut', 'Date de début'),
+        ('date_fin', 'Date de fin'),
+        ('nb_jours', 'Durée'),
+        ('prix_original', 'Prix'),
+        ('reduction', 'Réduction'),
+        ('prix', 'Total à payer'),
+    ]),
+]
+
+CONDITIONS = [
+    "Le locataire reconnaît avoir reçu le véhicule en bon état de marche et s'engage à le restituer "
+    "dans le même état, à la date et au lieu convenus.",
+    "Le véhicule ne peut être conduit que par le locataire, titulaire d'un permis de conduire valide. "
+    "Toute sous-location est interdite.",
+    "Le locataire est responsable des amendes et contraventions commises pendant la durée de la location.",
+    "Tout retard de restitution pourra être facturé au tarif horaire du véhicule. Tout dommage constaté "
+    "lors de la restitution sera à la charge du locataire, dans les limites prévues par l'assurance.",
+    "En cas de panne ou d'accident, le locataire doit prévenir l'agence sans délai et ne faire procéder "
+    "à aucune réparation sans son accord.",
+]
+
+LINE_HEIGHT = 16
+SECTION_GAP = 14
+LABEL_WIDTH = 80
+COLUMN_WIDTH = CONTENT_WIDTH / 2
+
+
+class ContractTemplate:
+    """Static layer of the contract, computed once per worker"""
+
+    def __init__(self):
+        styles = getSampleStyleSheet()
+        self.condition_style = ParagraphStyle(
+            'ContractCondition',
+            parent=styles['Normal'],
+            fontSize=8,
+            leading=10,
+            alignment=TA_JUSTIFY,
+            textColor=colors.HexColor('#333333'),
+        )
+
+        # Section -> (y of the title, [(key, x, y) of each value])
+        self.sections = []
+        y = PAGE_HEIGHT - 120
+        for title, fields in SECTIONS:
+            positions = []
+            rows = (len(fields) + 1) // 2
+            for index, (key, _) in enumerate(fields):
+                column, row = index % 2, index // 2
+                positions.append((key, MARGIN + column * COLUMN_WIDTH, y - 20 - row * LINE_HEIGHT))
+            self.sections.append((title, y, fields, positions))
+            y -= 20 + rows * LINE_HEIGHT + SECTION_GAP
+
+        # Line breaking of the general conditions, done once
+        self.conditions_top = y - 10
+        self.conditions = []
+        for index, text in enumerate(CONDITIONS, start=1):
+            paragraph = Paragraph(f"<b>{index}.</b> {text}", self.condition_style)
+            _, height = paragraph.wrap(CONTENT_WIDTH, PAGE_HEIGHT)
+            self.conditions.append((paragraph, height))
+
+    def draw_static(self, canvas: Canvas) -> None:
+        """Draw everything that does not depend on the contract"""
+        # Header band
+        canvas.setFillColor(BRAND_COLOR)
+        canvas.rect(0, PAGE_HEIGHT - 70, PAGE_WIDTH, 70, stroke=0, fill=1)
+        canvas.setFillColor(colors.white)
+        canvas.setFont('Helvetica-Bold', 18)
+        canvas.drawString(MARGIN, PAGE_HEIGHT - 45, "CONTRAT DE LOCATION DE VÉHICULE")
+
+        for title, y, fields, positions in self.sections:
+            canvas.setFillColor(TITLE_COLOR)
+            canvas.setFont('Helvetica-Bold', 11)
+            canvas.drawString(MARGIN, y, title)
+            canvas.setStrokeColor(colors.lightgrey)
+            canvas.line(MARGIN, y - 5, PAGE_WIDTH - MARGIN, y - 5)
+            canvas.setFillColor(colors.grey)
+            canvas.setFont('Helvetica', 8)
+            for (_, label), (_, x, value_y) in zip(fields, positions):
+                canvas.drawString(x, value_y, label)
+
+        canvas.setFillColor(TITLE_COLOR)
+        canvas.setFont('Helvetica-Bold', 11)
+        canvas.drawString(MARGIN, self.conditions_top, "Conditions générales")
+        y = self.conditions_top - 8
+        for paragraph, height in self.conditions:
+            y -= height + 4
+            paragraph.drawOn(canvas, MARGIN, y)
+
+        # Signature boxes
+        box_width = (CONTENT_WIDTH - 20) / 2
+        canvas.setStrokeColor(colors.grey)
+        canvas.setFillColor(colors.black)
+        canvas.setFont('Helvetica', 9)
+        for index, label in enumerate(["Signature de l'agence", "Signature du locataire"]):
+            x = MARGIN + index * (box_width + 20)
+            canvas.rect(x, 80, box_width, 70, stroke=1, fill=0)
+            canvas.drawString(x + 5, 155, label)
+
+        canvas.setFillColor(colors.grey)
+        canvas.setFont('Helvetica', 7)
+        canvas.drawCentredString(PAGE_WIDTH / 2, 40, "Rent4You - Document généré automatiquement")
+
+    def draw_fields(self, canvas: Canvas, data: Dict[str, Any]) -> None:
+        """Draw the contract-specific values"""
+        canvas.setFillColor(colors.white)
+        canvas.setFont('Helvetica', 10)
+        canvas.drawRightString(PAGE_WIDTH - MARGIN, PAGE_HEIGHT - 30, f"N° {data['numero']}")
+        canvas.drawRightString(PAGE_WIDTH - MARGIN, PAGE_HEIGHT - 45, f"Établi le {data['date_contrat']}")
+
+        canvas.setFillColor(colors.black)
+        for _, _, _, positions in self.sections:
+            for key, x, y in positions:
+                canvas.setFont('Helvetica-Bold' if key == 'prix' else 'Helvetica', 9)
+                lines = simpleSplit(str(data.get(key) or '-'), 'Helvetica', 9, COLUMN_WIDTH - LABEL_WIDTH - 10)
+                # One line per field: longer values (addresses) are cut
+                text = lines[0] + ('…' if len(lines) > 1 else '') if lines else '-'
+                canvas.drawString(x + LABEL_WIDTH, y, text)
+
+
+_local = threading.local()
+
+
+def get_template() -> ContractTemplate:
+    """Template of the current thread (flowables are not thread-safe to draw)"""
+    template = getattr(_local, 'template', None)
+    if template is None:
+        template = _local.template = ContractTemplate()
+    return template
+
+
+def render_contract_pdf(data: Dict[str, Any]) -> bytes:
+    """
+    Render a contract
+
+    Module-level so it can be pickled into a ProcessPoolExecutor.
+
+    Args:
+        data: Contract fields, see ContractPDFService.get_contract_data
+
+    Returns:
+        PDF bytes (identical for identical data)
+    """
+    template = get_template()
+    buffer = io.BytesIO()
+    # invariant: no timestamp or random id, so unchanged contracts deduplicate
+    canvas = Canvas(buffer, pagesize=A4, invariant=1, pageCompression=1)
+    canvas.setTitle(f"Contrat de location N° {data['numero']}")
+    canvas.setAuthor("Rent4You")
+    template.draw_static(canvas)
+    template.draw_fields(canvas, data)
+    canvas.showPage()
+    canvas.save()
+    return buffer.getvalue()
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from django.urls import reverse
 from .models import ContratLocation
 from reservations.serializers import ReservationSerializer
 
@@ -8,11 +9,12 @@ class ContratLocationSerializer(serializers.ModelSerializer):
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     reservation_details = ReservationSerializer(source='reservation', read_only=True)
     pdf_url = serializers.SerializerMethodField()
+    signature_url = serializers.SerializerMethodField()
     
     class Meta:
         model = ContratLocation
         fields = ['id', 'reservation', 'reservation_details', 'pdf_file', 'pdf_url',
-                'status', 'status_display', 'signed_at', 'signature_locataire',
+                'status', 'status_display', 'signed_at', 'signature_url',
                 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at', 'signed_at']
     
@@ -22,4 +24,11 @@ class ContratLocationSerializer(serializers.ModelSerializer):
             if request:
                 return request.build_absolute_uri(obj.pdf_file.url)
         return None
-
+    
+    def get_signature_url(self, obj):
+        # Served by the signature endpoint (HTTP caching), never inlined
+        if obj.signature_image:
+            request = self.context.get('request')
+            url = reverse('contrat-signature', args=[obj.pk])
+            return request.build_absolute_uri(url) if request else url
+        return None
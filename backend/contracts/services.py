@@ -0,0 +1,263 @@
+"""
+Business logic services for contracts app
+"""
+import base64
+import binascii
+import logging
+from datetime import date
+from io import BytesIO
+from typing import Any, Dict, Optional, Tuple
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image
+from core.constants import ReservationStatus
+from core.file_service import FileService
+from core.image_service import check_image_header
+from core.pricing_service import PricingService
+from core.workers import WorkerPool
+from .models import ContratLocation
+from .pdf import render_contract_pdf
+
+logger = logging.getLogger(__name__)
+
+
+class SignatureService:
+    """Service for contract signature images"""
+    
+    MAX_SIGNATURE_SIZE = 1024 * 1024  # 1MB
+    
+    # Pillow format -> file extension
+    EXTENSIONS = {'PNG': '.png', 'JPEG': '.jpg', 'MPO': '.jpg', 'GIF': '.gif', 'WEBP': '.webp'}
+    
+    @staticmethod
+    def decode(signature: str) -> Tuple[bytes, str]:
+        """
+        Decode a Base64 signature image
+        
+        Args:
+            signature: Data URL ('data:image/png;base64,...') or bare Base64
+            
+        Returns:
+            Tuple of (image bytes, file extension)
+            
+        Raises:
+            ValueError: If the signature is not a valid image
+        """
+        encoded = signature.partition(',')[2] if signature.startswith('data:') else signature
+        try:
+            data = base64.b64decode(''.join(encoded.split()), validate=True)
+        except (binascii.Error, ValueError):
+            raise ValueError("Signature invalide: encodage Base64 incorrect.")
+        
+        if len(data) > SignatureService.MAX_SIGNATURE_SIZE:
+            raise ValueError(
+                f"Signature trop volumineuse. Taille maximale: {SignatureService.MAX_SIGNATURE_SIZE / (1024*1024)}MB"
+            )
+        
+        try:
+            img = Image.open(BytesIO(data))
+            error = check_image_header(img)
+        except Exception:
+            raise ValueError("Signature invalide: image illisible.")
+        if error:
+            raise ValueError(error)
+        
+        return data, SignatureService.EXTENSIONS.get(img.format, '.png')
+    
+    @staticmethod
+    def store(signature: str) -> str:
+        """
+        Decode a Base64 signature and store it in media storage
+        
+        Args:
+            signature: Data URL or bare Base64 image
+            
+        Returns:
+            Storage path of the signature image
+        """
+        data, ext = SignatureService.decode(signature)
+        return FileService.store_document(
+            ContentFile(data, name=f"signature{ext}"),
+            upload_path='signatures/',
+            prefix='signature'
+        )
+
+
+class ContractPDFService:
+    """Service for generating contract PDFs"""
+    
+    # Contracts rendered per worker pool round trip in batch generation
+    BATCH_SIZE = 50
+    
+    @staticmethod
+    def get_queryset():
+        """Contracts with everything the PDF needs, in a single query"""
+        return ContratLocation.objects.select_related(
+            'reservation__vehicule__agence',
+            'reservation__locataire__user',
+            'reservation__code_promo',
+        )
+    
+    @staticmethod
+    def get_contract_data(contrat: ContratLocation) -> Dict[str, Any]:
+        """
+        Extract the fields printed on a contract (plain, picklable values)
+        
+        Args:
+            contrat: Contract fetched with get_queryset()
+            
+        Returns:
+            Dictionary of contract fields
+        """
+        reservation = contrat.reservation
+        vehicule = reservation.vehicule
+        agence = vehicule.agence
+        user = reservation.locataire.user
+        # Billed days (both ends included), as on the invoice
+        nb_jours, _ = PricingService.get_duration(reservation.date_debut, reservation.date_fin)
+        reduction = f"{reservation.reduction} MAD" if reservation.reduction else None
+        if reduction and reservation.code_promo:
+            reduction += f" (code {reservation.code_promo.code})"
+        
+        return {
+            'numero': f"{contrat.id:06d}",
+            'date_contrat': timezone.localtime(contrat.created_at).strftime('%d/%m/%Y'),
+            'agence_nom': agence.nom_agence,
+            'agence_contact': agence.num_contact,
+            'agence_email': agence.email_agence,
+            'agence_adresse': agence.siege_agence,
+            'locataire_nom': user.get_full_name() or user.email,
+            'locataire_telephone': user.phone,
+            'locataire_email': user.email,
+            'vehicule_nom': f"{vehicule.marque} {vehicule.model}",
+            'vehicule_matricule': vehicule.matricule,
+            'vehicule_categorie': vehicule.get_categorie_vehicule_display(),
+            'date_debut': reservation.date_debut.strftime('%d/%m/%Y'),
+            'date_fin': reservation.date_fin.strftime('%d/%m/%Y'),
+            'nb_jours': f"{nb_jours} jour{'s' if nb_jours > 1 else ''}",
+            'prix_original': f"{reservation.prix_original} MAD",
+            'reduction': reduction,
+            'prix': f"{reservation.prix} MAD",
+        }
+    
+    @staticmethod
+    def store_pdf(contract_id: int, content: bytes, replace: bool = False) -> Optional[str]:
+        """
+        Store a generated PDF and attach it to its contract
+        
+        Args:
+            contract_id: Contract ID
+            content: PDF bytes
+            replace: Replace an existing PDF (otherwise a PDF uploaded in
+                the meantime is kept)
+            
+        Returns:
+            Stored file path, or None if the contract kept its PDF
+        """
+        file_path = FileService.store_document(
+            ContentFile(content, name=f"contrat_{contract_id}.pdf"),
+            upload_path='contracts/'
+        )
+        
+        with transaction.atomic():
+            contrat = ContratLocation.objects.select_for_update().only('id', 'pdf_file').filter(pk=contract_id).first()
+            attach = contrat is not None and (replace or not contrat.pdf_file)
+            if attach:
+                old_pdf = contrat.pdf_file.name if contrat.pdf_file else None
+                ContratLocation.objects.filter(pk=contract_id).update(pdf_file=file_path, updated_at=timezone.now())
+        
+        if not attach:
+            FileService.delete_file(file_path)
+            return None
+        
+        # Also when old_pdf == file_path: store_pdf took one more reference
+        if old_pdf:
+            FileService.delete_file(old_pdf)
+        logger.info("Contract PDF generated: %s", file_path)
+        return file_path
+    
+    @staticmethod
+    def generate(contrat: ContratLocation, replace: bool = True) -> Optional[str]:
+        """
+        Generate a contract PDF synchronously
+        
+        Args:
+            contrat: Contract instance
+            replace: Replace an existing PDF
+            
+        Returns:
+            Stored file path
+        """
+        contrat = ContractPDFService.get_queryset().get(pk=contrat.pk)
+        data = ContractPDFService.get_contract_data(contrat)
+        return ContractPDFService.store_pdf(contrat.pk, WorkerPool.map(render_contract_pdf, [data])[0], replace)
+    
+    @staticmethod
+    def generate_in_background(contract_id: int) -> None:
+        """
+        Generate a contract PDF without blocking the request
+        
+        Call after the contract is committed (transaction.on_commit).
+        
+        Args:
+            contract_id: Contract ID
+        """
+        contrat = ContractPDFService.get_queryset().filter(pk=contract_id).first()
+        if contrat is None:
+            return
+        WorkerPool.run_in_background(
+            render_contract_pdf,
+            ContractPDFService.get_contract_data(contrat),
+            lambda content: ContractPDFService.store_pdf(contract_id, content)
+        )
+    
+    @staticmethod
+    def get_pickup_contracts(pickup_date: date, agence=None, replace: bool = False):
+        """
+        Contracts of the reservations starting on a given day
+        
+        Args:
+            pickup_date: Pickup date (reservation start)
+            agence: Optional agency filter
+            replace: Include contracts that already have a PDF
+            
+        Returns:
+            QuerySet of contracts
+        """
+        contrats = ContractPDFService.get_queryset().filter(
+            reservation__date_debut=pickup_date,
+            reservation__status__in=[ReservationStatus.CONFIRMED, ReservationStatus.ACTIVE],
+        ).exclude(status='CANCELLED')
+        if agence is not None:
+            contrats = contrats.filter(reservation__vehicule__agence=agence)
+        if not replace:
+            contrats = contrats.filter(Q(pdf_file='') | Q(pdf_file__isnull=True))
+        return contrats.order_by('id')
+    
+    @staticmethod
+    def generate_for_date(pickup_date: date, agence=None, replace: bool = False) -> int:
+        """
+        Generate the contracts of a day's pickups, rendered in the worker pool
+        
+        Args:
+            pickup_date: Pickup date (reservation start)
+            agence: Optional agency filter
+            replace: Regenerate contracts that already have a PDF
+            
+        Returns:
+            Number of PDFs generated
+        """
+        contrats = list(ContractPDFService.get_pickup_contracts(pickup_date, agence, replace))
+        generated = 0
+        
+        for start in range(0, len(contrats), ContractPDFService.BATCH_SIZE):
+            batch = contrats[start:start + ContractPDFService.BATCH_SIZE]
+            datas = [ContractPDFService.get_contract_data(contrat) for contrat in batch]
+            for contrat, content in zip(batch, WorkerPool.map(render_contract_pdf, datas)):
+                if ContractPDFService.store_pdf(contrat.pk, content, replace):
+                    generated += 1
+        
+        logger.info("Generated %s contract PDF(s) for %s", generated, pickup_date)
+        return generated
@@ -1,14 +1,27 @@
-from rest_framework import viewsets, status
+import logging
+import os
+from rest_framework import viewsets, status, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.http import FileResponse, HttpResponseNotModified
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from .models import ContratLocation
 from .serializers import ContratLocationSerializer
 from core.permissions import IsSecretaireAgence, IsLocataire
 from core.response import APIResponse
 from core.email_service import EmailService
 from core.notifications import NotificationService
+from core.utils import get_user_agency
+from core.workers import WorkerPool
+from core.file_service import FileService
+from uploads.services import ChunkedUploadService
+from .services import ContractPDFService, SignatureService
+
+logger = logging.getLogger(__name__)
 
 
 class ContratLocationViewSet(viewsets.ModelViewSet):
@@ -22,9 +35,38 @@ class ContratLocationViewSet(viewsets.ModelViewSet):
             return [IsSecretaireAgence()]
         return [IsAuthenticated()]
     
+    def _store_pdf(self, serializer):
+        """
+        Store the contract PDF through the deduplicating file service
+        
+        Large scans are sent beforehand as a chunked upload, referenced here
+        by its id in 'pdf_upload'; small files can still be sent as multipart.
+        """
+        upload_id = self.request.data.get('pdf_upload')
+        if upload_id:
+            file_path = ChunkedUploadService.consume(upload_id, self.request.user, 'CONTRACT')
+            serializer.validated_data['pdf_file'] = file_path
+            return file_path
+        
+        pdf_file = serializer.validated_data.get('pdf_file')
+        if not pdf_file or not hasattr(pdf_file, 'chunks'):
+            return None
+        try:
+            file_path = FileService.upload_document(pdf_file, upload_path='contracts/')
+        except ValueError as e:
+            raise serializers.ValidationError({'pdf_file': str(e)})
+        serializer.validated_data['pdf_file'] = file_path
+        return file_path
+    
     def perform_create(self, serializer):
         """Create contract and send notifications"""
-        contract = serializer.save()
+        with transaction.atomic():
+            self._store_pdf(serializer)
+            contract = serializer.save()
+            
+            # No PDF provided: generate it once the contract is committed
+            if not contract.pdf_file:
+                transaction.on_commit(lambda: ContractPDFService.generate_in_background(contract.pk))
         
         # Send email notification
         try:
@@ -33,17 +75,27 @@ class ContratLocationViewSet(viewsets.ModelViewSet):
                 contract.reservation.locataire.user.email
             )
         except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Failed to send email: {str(e)}")
+            logger.error("Failed to send email: %s", e)
         
         # Create in-app notification
         try:
             NotificationService.notify_contract_ready(contract)
         except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Failed to create notification: {str(e)}")
+            logger.error("Failed to create notification: %s", e)
+    
+    def perform_update(self, serializer):
+        old_pdf = serializer.instance.pdf_file.name if serializer.instance.pdf_file else None
+        with transaction.atomic():
+            new_pdf = self._store_pdf(serializer)
+            serializer.save()
+        if new_pdf and old_pdf:
+            FileService.delete_file(old_pdf)
+    
+    def perform_destroy(self, instance):
+        pdf_path = instance.pdf_file.name if instance.pdf_file else None
+        instance.delete()
+        if pdf_path:
+            FileService.delete_file(pdf_path)
     
     @action(detail=True, methods=['post'], permission_classes=[IsLocataire])
     def sign(self, request, pk=None):
@@ -57,13 +109,83 @@ class ContratLocationViewSet(viewsets.ModelViewSet):
                 status_code=status.HTTP_400_BAD_REQUEST
             )
         
-        contrat.signature_locataire = signature
+        try:
+            signature_path = SignatureService.store(signature)
+        except ValueError as e:
+            return APIResponse.error(
+                message=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
+        old_signature = contrat.signature_image.name if contrat.signature_image else None
+        contrat.signature_image = signature_path
+        contrat.signature_locataire = None
         contrat.status = 'SIGNED'
         contrat.signed_at = timezone.now()
         contrat.save()
+        if old_signature:
+            # store() took a new reference, even for identical content
+            FileService.delete_file(old_signature)
         
         return APIResponse.success(
             data=ContratLocationSerializer(contrat).data,
             message="Contract signed successfully."
         )
-
+    
+    @action(detail=True, methods=['get'])
+    def signature(self, request, pk=None):
+        """Get the signature image (cacheable, revalidated with ETag)"""
+        contrat = self.get_object()
+        if not contrat.signature_image:
+            return APIResponse.not_found("Signature not found.")
+        
+        # Signature files are content-addressed: the path identifies the content
+        path = contrat.signature_image.name
+        etag = f'"{os.path.splitext(os.path.basename(path))[0]}"'
+        if etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(default_storage.open(path, 'rb'))
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, max-age=3600'
+        return response
+    
+    @action(detail=True, methods=['post'], permission_classes=[IsSecretaireAgence])
+    def generate_pdf(self, request, pk=None):
+        """(Re)generate the contract PDF"""
+        contrat = self.get_object()
+        ContractPDFService.generate(contrat)
+        contrat.refresh_from_db()
+        
+        return APIResponse.success(
+            data=self.get_serializer(contrat).data,
+            message="Contract PDF generated successfully."
+        )
+    
+    @action(detail=False, methods=['post'], permission_classes=[IsSecretaireAgence])
+    def generate_batch(self, request):
+        """Generate, in the background, the contracts of a day's pickups (default: today)"""
+        pickup_date = timezone.localdate()
+        if request.data.get('date'):
+            try:
+                pickup_date = parse_date(str(request.data['date']))
+            except ValueError:
+                # Well formed but not a real day (e.g. 2024-02-30)
+                pickup_date = None
+            if pickup_date is None:
+                return APIResponse.error(
+                    message="Date invalide (format attendu: AAAA-MM-JJ).",
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+        
+        agence = get_user_agency(request.user)
+        replace = str(request.data.get('replace', '')).lower() == 'true'
+        count = ContractPDFService.get_pickup_contracts(pickup_date, agence, replace).count()
+        if count:
+            WorkerPool.submit_background(ContractPDFService.generate_for_date, pickup_date, agence, replace)
+        
+        return APIResponse.success(
+            data={'date': pickup_date.isoformat(), 'scheduled': count},
+            message="Contract generation scheduled.",
+            status_code=status.HTTP_202_ACCEPTED
+        )
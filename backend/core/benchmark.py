@@ -0,0 +1,216 @@
+"""
+Benchmark dataset: seeding at scale and lookup of the seeded accounts
+"""
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from accounts.models import User, Locataire, ProprietaireAgence, SecretaireAgence
+from agencies.models import Agence
+from vehicles.models import Vehicule, Depot
+from reservations.models import Reservation, Facture
+from core.notifications import Notification
+
+# Every seeded account and agency email ends with this domain
+BENCHMARK_DOMAIN = 'benchmark.rent4you.local'
+BENCHMARK_PASSWORD = 'benchmark'
+
+MARQUES = {
+    'Dacia': ['Logan', 'Sandero', 'Duster'],
+    'Renault': ['Clio', 'Megane', 'Kadjar'],
+    'Peugeot': ['208', '308', '3008'],
+    'Toyota': ['Yaris', 'Corolla', 'RAV4'],
+    'Mercedes': ['Classe A', 'Classe C', 'GLC'],
+}
+VILLES = ['Casablanca', 'Rabat', 'Marrakech', 'Tanger', 'Agadir', 'Fès']
+
+# (status, weight): most of the history is completed rentals
+RESERVATION_STATUSES = [('COMPLETED', 60), ('CONFIRMED', 15), ('CANCELLED', 12), ('PENDING', 8), ('ACTIVE', 5)]
+
+
+class BenchmarkDataService:
+    """Seed and find the benchmark dataset"""
+
+    @staticmethod
+    def exists() -> bool:
+        return Agence.objects.filter(email_agence__endswith=f'@{BENCHMARK_DOMAIN}').exists()
+
+    @staticmethod
+    def flush():
+        """Delete the benchmark dataset (vehicles cascade to their reservations)"""
+        agences = Agence.objects.filter(email_agence__endswith=f'@{BENCHMARK_DOMAIN}')
+        # Invoices are snapshots that outlive their reservation
+        Facture.objects.filter(agence__in=agences).delete()
+        # Depots are protected while vehicles reference them
+        Vehicule.objects.filter(agence__in=agences).delete()
+        agences.delete()
+        User.objects.filter(email__endswith=f'@{BENCHMARK_DOMAIN}').delete()
+
+    @staticmethod
+    def _batches(items: Iterator[Any], batch_size: int) -> Iterator[List[Any]]:
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    @staticmethod
+    def _users(prefix: str, count: int, role: str, password: str) -> Iterator[User]:
+        for i in range(count):
+            yield User(
+                username=f'bench-{prefix}-{i}', email=f'{prefix}{i}@{BENCHMARK_DOMAIN}',
+                first_name=prefix.capitalize(), last_name=str(i), phone=f'+2126{i:08d}',
+                role=role, password=password,
+            )
+
+    @staticmethod
+    def seed(agencies: int = 10, vehicles_per_agency: int = 200, depots_per_agency: int = 3,
+             renters: int = 5000, reservations: int = 200_000, notifications: int = 100_000,
+             batch_size: int = 5000, seed: int = 42,
+             progress: Optional[Callable[[str, int], None]] = None) -> Dict[str, int]:
+        """
+        Seed a realistic dataset with bulk_create
+
+        Model save() hooks are bypassed: depot counters are set directly and
+        the caller refreshes the derived data (fleet status, invoices).
+
+        Args:
+            agencies: Number of agencies (one owner and one secretary account each)
+            vehicles_per_agency: Vehicles per agency
+            depots_per_agency: Depots per agency
+            renters: Number of renter accounts
+            reservations: Number of reservations, spread over three years
+            notifications: Number of notifications, spread over the renters
+            batch_size: Rows per INSERT
+            seed: Random seed, so runs are comparable
+            progress: Called with (table, rows inserted so far)
+
+        Returns:
+            Number of rows created per table
+        """
+        rng = random.Random(seed)
+        progress = progress or (lambda table, count: None)
+        # Hashing is slow on purpose: every account shares one hash
+        password = make_password(BENCHMARK_PASSWORD)
+        created = {}
+
+        with transaction.atomic():
+            agence_objs = Agence.objects.bulk_create([
+                Agence(
+                    nom_agence=f'Bench Agence {i}', siege_agence=f'{i} boulevard Hassan II, {rng.choice(VILLES)}',
+                    num_contact=f'05220{i:05d}', email_agence=f'agence{i}@{BENCHMARK_DOMAIN}',
+                    nmbr_succursales=depots_per_agency, nmbr_flotte=vehicles_per_agency,
+                )
+                for i in range(agencies)
+            ])
+            owners = User.objects.bulk_create(BenchmarkDataService._users('owner', agencies, 'OWNER', password))
+            ProprietaireAgence.objects.bulk_create([
+                ProprietaireAgence(user=owner, agence=agence) for owner, agence in zip(owners, agence_objs)
+            ])
+            secretaries = User.objects.bulk_create(BenchmarkDataService._users('secretary', agencies, 'SECRETARY', password))
+            SecretaireAgence.objects.bulk_create([
+                SecretaireAgence(user=secretary, agence=agence) for secretary, agence in zip(secretaries, agence_objs)
+            ])
+            created['agences'] = len(agence_objs)
+
+            depot_size = -(-vehicles_per_agency // max(depots_per_agency, 1))
+            depots = Depot.objects.bulk_create([
+                Depot(
+                    adress_dpt=f'Dépôt {d} - {agence.nom_agence}', capacite_dpt=depot_size + 10,
+                    nb_vehicules=min(depot_size, max(vehicles_per_agency - d * depot_size, 0)), agence=agence,
+                )
+                for agence in agence_objs for d in range(depots_per_agency)
+            ])
+            created['depots'] = len(depots)
+
+        def vehicle_rows() -> Iterator[Vehicule]:
+            for a, agence in enumerate(agence_objs):
+                agency_depots = depots[a * depots_per_agency:(a + 1) * depots_per_agency]
+                for v in range(vehicles_per_agency):
+                    marque = rng.choice(list(MARQUES))
+                    prix_jour = Decimal(rng.randrange(200, 1500, 10))
+                    yield Vehicule(
+                        matricule=f'BENCH-{agence.id}-{v}', marque=marque, model=rng.choice(MARQUES[marque]),
+                        prix_jour=prix_jour, prix_heure=(prix_jour / 8).quantize(Decimal('0.01')),
+                        description=f'{marque} de la flotte de test', categorie_vehicule=rng.choice(Vehicule.CATEGORIE_CHOICES)[0],
+                        etat_vehicule=rng.choices(['enMarche', 'enArret', 'enPanne'], [90, 7, 3])[0],
+                        disponibilite=rng.random() < 0.8,
+                        depot=agency_depots[v // depot_size] if agency_depots else None, agence=agence,
+                    )
+
+        vehicles = []
+        for batch in BenchmarkDataService._batches(vehicle_rows(), batch_size):
+            vehicles += Vehicule.objects.bulk_create(batch)
+            progress('vehicules', len(vehicles))
+        created['vehicules'] = len(vehicles)
+
+        locataire_ids = []
+        renter_user_ids = []
+        for batch in BenchmarkDataService._batches(BenchmarkDataService._users('renter', renters, 'RENTER', password), batch_size):
+            users = User.objects.bulk_create(batch)
+            renter_user_ids += [user.id for user in users]
+            locataire_ids += [locataire.id for locataire in Locataire.objects.bulk_create([Locataire(user=user) for user in users])]
+            progress('locataires', len(locataire_ids))
+        created['locataires'] = len(locataire_ids)
+
+        vehicle_prices = [(vehicle.id, vehicle.prix_jour) for vehicle in vehicles]
+        statuses, weights = zip(*RESERVATION_STATUSES)
+        first_day = date.today() - timedelta(days=3 * 365)
+
+        def reservation_rows() -> Iterator[Reservation]:
+            for _ in range(reservations):
+                vehicule_id, prix_jour = rng.choice(vehicle_prices)
+                date_debut = first_day + timedelta(days=rng.randrange(3 * 365 + 90))
+                days = rng.randint(1, 14)
+                prix = prix_jour * days
+                yield Reservation(
+                    date_debut=date_debut, date_fin=date_debut + timedelta(days=days),
+                    prix=prix, prix_original=prix, status=rng.choices(statuses, weights)[0],
+                    locataire_id=rng.choice(locataire_ids), vehicule_id=vehicule_id,
+                )
+
+        count = 0
+        if vehicle_prices and locataire_ids:
+            for batch in BenchmarkDataService._batches(reservation_rows(), batch_size):
+                Reservation.objects.bulk_create(batch)
+                count += len(batch)
+                progress('reservations', count)
+        created['reservations'] = count
+
+        types = [choice for choice, _ in Notification.TYPE_CHOICES]
+
+        def notification_rows() -> Iterator[Notification]:
+            for i in range(notifications):
+                yield Notification(
+                    user_id=rng.choice(renter_user_ids), type=rng.choice(types),
+                    title=f'Notification {i}', message='Message de test', is_read=rng.random() < 0.6,
+                )
+
+        count = 0
+        if renter_user_ids:
+            for batch in BenchmarkDataService._batches(notification_rows(), batch_size):
+                Notification.objects.bulk_create(batch)
+                count += len(batch)
+                progress('notifications', count)
+        created['notifications'] = count
+
+        return created
+
+    @staticmethod
+    def get_owner() -> Optional[User]:
+        """Owner account of the first benchmark agency"""
+        return User.objects.filter(
+            email=f'owner0@{BENCHMARK_DOMAIN}'
+        ).select_related('proprietaire_agence__agence').first()
+
+    @staticmethod
+    def get_renter() -> Optional[User]:
+        """First benchmark renter account"""
+        return User.objects.filter(
+            email__endswith=f'@{BENCHMARK_DOMAIN}', role='RENTER', locataire__isnull=False
+        ).order_by('id').select_related('locataire').first()
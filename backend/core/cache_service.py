@@ -1,11 +1,78 @@
 """
 Caching service utilities
 """
+from collections import OrderedDict
 from functools import wraps
+from django.conf import settings
 from django.core.cache import cache
-from typing import Callable, Any, Optional
+from typing import Callable, Any, Dict, NamedTuple, Optional
 import hashlib
 import json
+import math
+import random
+import threading
+import time
+from core.metrics import record_cache
+from core.workers import WorkerPool
+
+_MISSING = object()
+
+
+class CacheEntry(NamedTuple):
+    """Value stored by CacheService.fetch (None included: negative caching)"""
+    value: Any
+    fresh_until: float  # Epoch seconds; served stale after that
+    delta: float  # Seconds the computation took, for early expiration
+
+
+class LocalCache:
+    """
+    Bounded LRU cache with per-entry expiry, private to the process
+    
+    Values are returned as stored (not copies): callers must not mutate them.
+    """
+    
+    def __init__(self, max_entries: int = 1000, timeout: float = 60):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries: "OrderedDict[Any, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Any, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key: Any, value: Any, timeout: Optional[float] = None):
+        timeout = self.timeout if timeout is None else timeout
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + timeout)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def delete(self, key: Any):
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_local_cache: Optional[LocalCache] = None
+# Namespace -> (shared version, monotonic time it was read)
+_local_versions: Dict[str, tuple] = {}
 
 
 class CacheService:
@@ -47,7 +114,9 @@ class CacheService:
         Returns:
             Cached value or default
         """
-        return cache.get(key, default)
+        value = cache.get(key, _MISSING)
+        record_cache(value is not _MISSING)
+        return default if value is _MISSING else value
     
     @staticmethod
     def set(key: str, value: Any, timeout: int = None) -> bool:
@@ -78,6 +147,223 @@ class CacheService:
         """
         return cache.delete(key)
     
+    @staticmethod
+    def get_tag_versions(*tags: str) -> Dict[str, int]:
+        """
+        Current version of each tag, to be embedded in cache keys
+        
+        Keys built from the versions are never deleted: invalidate_tags
+        moves the tags to a new version and the old entries expire.
+        
+        Args:
+            *tags: Tag names (e.g. 'vehicules:agence:3')
+            
+        Returns:
+            Dictionary of tag -> version
+        """
+        keys = {f"tag:{tag}": tag for tag in tags}
+        versions = {keys[key]: version for key, version in cache.get_many(list(keys)).items()}
+        for key, tag in keys.items():
+            if tag not in versions:
+                # Time-based, so an evicted tag never comes back at an old version
+                cache.add(key, time.time_ns(), None)
+                versions[tag] = cache.get(key, 0)
+        return versions
+    
+    @staticmethod
+    def invalidate_tags(*tags: str):
+        """
+        Invalidate every entry keyed on these tags
+        
+        Args:
+            *tags: Tag names
+        """
+        for tag in tags:
+            try:
+                cache.incr(f"tag:{tag}")
+            except ValueError:
+                cache.set(f"tag:{tag}", time.time_ns(), None)
+    
+    @staticmethod
+    def fetch(key: str, compute: Callable[[], Any], timeout: int = None, stale_ttl: int = 0,
+              negative_timeout: int = None, beta: float = 1.0, lock_timeout: int = 10,
+              wait: float = 5.0) -> Any:
+        """
+        Get a value, recomputing it at most once at a time
+        
+        - Miss: one caller takes a lock (cache.add) and computes while the
+          others wait for its result (stampede protection). Waiters compute
+          it themselves if nothing comes within 'wait' seconds.
+        - Fresh: a caller may recompute it a bit before expiry, with a
+          probability growing as expiry nears and with the computation time
+          (XFetch), so hot keys rarely expire at all.
+        - Stale (expired less than stale_ttl ago): served as is while one
+          background thread recomputes it (stale-while-revalidate).
+        - None results are cached too (negative caching), for
+          negative_timeout seconds if given (0 disables it).
+        
+        Args:
+            key: Cache key
+            compute: Builds the value
+            timeout: Seconds the value stays fresh
+            stale_ttl: Seconds an expired value may still be served
+            negative_timeout: Seconds a None result stays fresh (default: timeout)
+            beta: Early expiration eagerness (0 disables it, >1 favors earlier)
+            lock_timeout: Lock expiry, in case the holder dies
+            wait: Maximum wait for another caller's result, in seconds
+            
+        Returns:
+            Cached or computed value
+        """
+        timeout = timeout or CacheService.DEFAULT_TIMEOUT
+        lock_key = f"{key}:lock"
+        
+        def refresh():
+            return CacheService._refresh(key, compute, timeout, stale_ttl, negative_timeout, lock_key)
+        
+        entry = cache.get(key)
+        if not isinstance(entry, CacheEntry):
+            entry = None
+        record_cache(entry is not None)
+        
+        if entry is not None:
+            now = time.time()
+            if now < entry.fresh_until:
+                # -log(u) is exponentially distributed: rarely large, so few callers refresh early
+                early = beta and now - entry.delta * beta * math.log(1.0 - random.random()) >= entry.fresh_until
+                if early and cache.add(lock_key, True, lock_timeout):
+                    return refresh()
+                return entry.value
+            if cache.add(lock_key, True, lock_timeout):
+                WorkerPool.submit_background(refresh)
+            return entry.value
+        
+        if not cache.add(lock_key, True, lock_timeout):
+            deadline = time.monotonic() + wait
+            delay = 0.01
+            while time.monotonic() < deadline:
+                time.sleep(delay)
+                delay = min(delay * 2, 0.2)
+                entry = cache.get(key)
+                if isinstance(entry, CacheEntry):
+                    return entry.value
+                if cache.add(lock_key, True, lock_timeout):
+                    # Previous holder gone without a result: take over
+                    return refresh()
+            return compute()
+        return refresh()
+    
+    @staticmethod
+    def _refresh(key: str, compute: Callable[[], Any], timeout: int, stale_ttl: int,
+                 negative_timeout: Optional[int], lock_key: str) -> Any:
+        """Compute and store a value, then release the lock taken by fetch"""
+        try:
+            start = time.monotonic()
+            value = compute()
+            delta = time.monotonic() - start
+            
+            fresh = negative_timeout if value is None and negative_timeout is not None else timeout
+            if fresh > 0:
+                cache.set(key, CacheEntry(value, time.time() + fresh, delta), fresh + stale_ttl)
+            return value
+        finally:
+            cache.delete(lock_key)
+    
+    @staticmethod
+    def get_local_cache() -> LocalCache:
+        """Per-process cache (LOCAL_CACHE_MAX_ENTRIES entries, LOCAL_CACHE_TIMEOUT seconds)"""
+        global _local_cache
+        if _local_cache is None:
+            _local_cache = LocalCache(settings.LOCAL_CACHE_MAX_ENTRIES, settings.LOCAL_CACHE_TIMEOUT)
+        return _local_cache
+    
+    @staticmethod
+    def get_local_version(namespace: str) -> int:
+        """
+        Shared version of a namespace, re-read at most every
+        LOCAL_CACHE_VERSION_CHECK seconds: that is how long other processes
+        may keep serving their local copies after an invalidation
+        """
+        now = time.monotonic()
+        version, checked_at = _local_versions.get(namespace, (None, 0.0))
+        if version is None or now - checked_at >= settings.LOCAL_CACHE_VERSION_CHECK:
+            tag = f"local:{namespace}"
+            version = CacheService.get_tag_versions(tag)[tag]
+            _local_versions[namespace] = (version, now)
+        return version
+    
+    @staticmethod
+    def get_local(namespace: str, key: str, default: Any = None) -> Any:
+        """
+        Get a value from the per-process cache
+        
+        Args:
+            namespace: Namespace, invalidated as a whole
+            key: Key in the namespace
+            default: Default value if missing or invalidated
+            
+        Returns:
+            Local value or default
+        """
+        local_key = (namespace, CacheService.get_local_version(namespace), key)
+        return CacheService.get_local_cache().get(local_key, default)
+    
+    @staticmethod
+    def set_local(namespace: str, key: str, value: Any, timeout: Optional[float] = None):
+        """
+        Store a value in the per-process cache
+        
+        Args:
+            namespace: Namespace, invalidated as a whole
+            key: Key in the namespace
+            value: Value (shared by every reader: do not mutate it)
+            timeout: Seconds to keep it (default: LOCAL_CACHE_TIMEOUT)
+        """
+        local_key = (namespace, CacheService.get_local_version(namespace), key)
+        CacheService.get_local_cache().set(local_key, value, timeout)
+    
+    @staticmethod
+    def get_two_level(namespace: str, key: str, compute: Callable[[], Any], timeout: int = None,
+                      local_timeout: Optional[float] = None) -> Any:
+        """
+        Get a value from the per-process cache, else from the shared cache
+        (see fetch), else compute it
+        
+        For small, hot and rarely changing data: most reads never leave the
+        process. Both levels are keyed on the namespace version, so
+        invalidate_local reaches every process within
+        LOCAL_CACHE_VERSION_CHECK seconds.
+        
+        Args:
+            namespace: Namespace, invalidated as a whole
+            key: Key in the namespace
+            compute: Builds the value
+            timeout: Shared cache timeout in seconds
+            local_timeout: Per-process timeout (default: LOCAL_CACHE_TIMEOUT)
+            
+        Returns:
+            Cached or computed value
+        """
+        version = CacheService.get_local_version(namespace)
+        local_key = (namespace, version, key)
+        local_cache = CacheService.get_local_cache()
+        value = local_cache.get(local_key, _MISSING)
+        if value is _MISSING:
+            value = CacheService.fetch(f"local:{namespace}:{version}:{key}", compute, timeout)
+            local_cache.set(local_key, value, local_timeout)
+        return value
+    
+    @staticmethod
+    def invalidate_local(namespace: str):
+        """
+        Invalidate a namespace of the two-level cache, in every process
+        
+        Args:
+            namespace: Namespace
+        """
+        CacheService.invalidate_tags(f"local:{namespace}")
+        _local_versions.pop(namespace, None)
+    
     @staticmethod
     def clear_pattern(pattern: str) -> int:
         """
@@ -101,38 +387,33 @@ class CacheService:
             return 0
     
     @staticmethod
-    def cached(timeout: int = None, key_prefix: str = None):
+    def cached(timeout: int = None, key_prefix: str = None, stale_ttl: int = 0,
+               negative_timeout: int = None, beta: float = 1.0):
         """
-        Decorator for caching function results
+        Decorator for caching function results (see fetch)
         
         Args:
             timeout: Cache timeout in seconds
             key_prefix: Prefix for cache key
+            stale_ttl: Seconds an expired result is still served while it is
+                refreshed in the background
+            negative_timeout: Cache timeout of None results (0: not cached)
+            beta: Early expiration eagerness (0 disables it)
             
         Usage:
-            @CacheService.cached(timeout=300, key_prefix='user_stats')
+            @CacheService.cached(timeout=300, key_prefix='user_stats', stale_ttl=60)
             def get_user_stats(user_id):
                 ...
         """
         def decorator(func: Callable) -> Callable:
             @wraps(func)
             def wrapper(*args, **kwargs):
-                # Generate cache key
                 prefix = key_prefix or f"{func.__module__}.{func.__name__}"
                 cache_key = CacheService.get_cache_key(prefix, *args, **kwargs)
-                
-                # Try to get from cache
-                cached_value = CacheService.get(cache_key)
-                if cached_value is not None:
-                    return cached_value
-                
-                # Execute function
-                result = func(*args, **kwargs)
-                
-                # Store in cache
-                CacheService.set(cache_key, result, timeout)
-                
-                return result
+                return CacheService.fetch(
+                    cache_key, lambda: func(*args, **kwargs), timeout,
+                    stale_ttl=stale_ttl, negative_timeout=negative_timeout, beta=beta
+                )
             return wrapper
         return decorator
 
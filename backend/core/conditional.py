@@ -0,0 +1,120 @@
+"""
+Conditional GET (ETag / Last-Modified) for read endpoints
+"""
+import hashlib
+from typing import Callable, Dict, List, Optional, Tuple
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from core.cache_service import CacheService
+
+
+class ConditionalGetMixin:
+    """
+    ViewSet mixin answering list/retrieve with 304 when nothing changed
+
+    The validator is computed in one aggregate query over the filtered
+    queryset (max of the timestamps + row count), before any row is loaded
+    or serialized. Changes to related rows shown by the serializer are
+    covered by listing their timestamps in conditional_fields; values the
+    serializer reads from the two-level cache, by listing its namespaces in
+    conditional_namespaces (a process may serve its local copy for a while
+    after a change, and the ETag must not outlive that copy).
+
+    Writes that bypass save() (queryset.update, bulk_update) must set
+    updated_at themselves, or clients keep their stale copy.
+    """
+    # Timestamps whose maximum dates the payload (related ones included)
+    conditional_fields = ['updated_at']
+    # Two-level cache namespaces (CacheService.get_two_level) the payload is read from
+    conditional_namespaces: List[str] = []
+    # Cache-Control directives of list/retrieve responses
+    cache_control: Dict[str, object] = {'private': True, 'no_cache': True}
+    # ETag of the response being built (set by conditional_response)
+    etag: Optional[str] = None
+
+    def get_validators(self, queryset) -> Tuple[Optional[str], Optional[float]]:
+        """
+        ETag and Last-Modified of a queryset, in one query
+
+        Args:
+            queryset: Filtered queryset (a single row for retrieve)
+
+        Returns:
+            Tuple of (etag, last modified timestamp), (None, None) when empty
+        """
+        aggregates = {f'max_{i}': Max(field) for i, field in enumerate(self.conditional_fields)}
+        result = queryset.order_by().aggregate(count=Count('pk'), **aggregates)
+        timestamps = [result[key] for key in aggregates if result[key] is not None]
+        if not result['count'] or not timestamps:
+            return None, None
+
+        last_modified = max(timestamps)
+        # Same rows, same URL (host included, for image URLs) and same media type: same representation
+        key = '|'.join([
+            self.request.build_absolute_uri(),
+            self.request.META.get('HTTP_ACCEPT', ''),
+            str(result['count']),
+            *(timestamp.isoformat() for timestamp in timestamps),
+            *(str(CacheService.get_local_version(namespace)) for namespace in self.conditional_namespaces),
+        ])
+        etag = quote_etag(hashlib.md5(key.encode(), usedforsecurity=False).hexdigest())
+        return f'W/{etag}', last_modified.timestamp()
+
+    def patch_response(self, response, etag: Optional[str], last_modified: Optional[float],
+                       cache_control: Optional[Dict[str, object]] = None):
+        """Add the validators and caching headers"""
+        if etag:
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, **(cache_control or self.cache_control))
+        patch_vary_headers(response, ('Accept', 'Authorization'))
+        return response
+
+    def conditional_response(self, request, queryset, render: Callable,
+                             cache_control: Optional[Dict[str, object]] = None):
+        """
+        304 if the client's copy is current, else the rendered response
+
+        Args:
+            request: Request (If-None-Match / If-Modified-Since)
+            queryset: Rows the response is built from
+            render: Builds the full response
+            cache_control: Cache-Control directives (defaults to the class ones)
+
+        Returns:
+            Response with ETag, Last-Modified and Cache-Control
+        """
+        etag, last_modified = self.get_validators(queryset)
+        # For render(): a cached body must be keyed on the validator it is sent with
+        self.etag = etag
+        if etag:
+            not_modified = get_conditional_response(request, etag=etag, last_modified=int(last_modified))
+            if not_modified is not None:
+                return self.patch_response(not_modified, etag, last_modified, cache_control)
+        response = render()
+        if response.status_code != 200:
+            return response
+        return self.patch_response(response, etag, last_modified, cache_control)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional_response(request, queryset, lambda: self.render_list(request, *args, **kwargs))
+
+    def render_list(self, request, *args, **kwargs):
+        """Full list response, when the client has no current copy (hook for caching)"""
+        return super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: kwargs[lookup_url_kwarg]}
+            )
+        except (TypeError, ValueError, ValidationError):
+            # Malformed id: let retrieve answer 404
+            return super().retrieve(request, *args, **kwargs)
+        return self.conditional_response(
+            request, queryset, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
+        )
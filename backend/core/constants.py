@@ -1,6 +1,8 @@
 """
 Application-wide constants
 """
+from decimal import Decimal
+
 
 # User Roles
 class UserRoles:
@@ -78,6 +80,15 @@ class ReservationStatus:
     ACTIVE_STATUSES = [PENDING, CONFIRMED, ACTIVE]
 
 
+# Invoicing
+class InvoiceSettings:
+    # Agency fee, as a fraction of the rental price before discount
+    AGENCY_FEE_RATE = Decimal('0.10')
+    
+    # Reservation statuses at which the invoice is issued
+    INVOICED_STATUSES = [ReservationStatus.CONFIRMED, ReservationStatus.COMPLETED]
+
+
 # Contract Status
 class ContractStatus:
     DRAFT = 'DRAFT'
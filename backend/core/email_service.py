@@ -60,10 +60,10 @@ class EmailService:
                     fail_silently=fail_silently
                 )
             
-            logger.info(f"Email sent successfully to {recipient_list}")
+            logger.info("Email sent successfully to %s", recipient_list)
             return True
         except Exception as e:
-            logger.error(f"Failed to send email: {str(e)}")
+            logger.error("Failed to send email: %s", e)
             if not fail_silently:
                 raise
             return False
@@ -52,6 +52,12 @@ class VehicleHasActiveReservationsError(BusinessLogicError):
     default_detail = 'Cannot modify price for a vehicle with active reservations.'
 
 
+class DepotFullError(BusinessLogicError):
+    """Depot has no free space left"""
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Le dépôt a atteint sa capacité maximale.'
+
+
 class InvalidCredentialsError(UnauthorizedError):
     """Invalid credentials error"""
     default_detail = 'Invalid credentials.'
@@ -61,3 +67,9 @@ class UserDisabledError(UnauthorizedError):
     """User account disabled error"""
     default_detail = 'User account is disabled.'
 
+
+
+class UploadConflictError(BusinessLogicError):
+    """Chunk does not match the upload session state"""
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Upload offset conflict.'
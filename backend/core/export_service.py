@@ -1,11 +1,16 @@
 """
 Export service for generating PDF and Excel files
 """
+import csv
 import io
-from typing import List, Dict, Any
-from django.http import HttpResponse
+import os
+import zipfile
+from typing import List, Dict, Any, Iterable, Iterator, Tuple
+from django.http import HttpResponse, StreamingHttpResponse
 from django.db.models import QuerySet
+from django.utils import timezone
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, Alignment, PatternFill
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter, A4
@@ -14,6 +19,26 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 
 
+class _StreamSink(io.RawIOBase):
+    """Unseekable sink collecting the bytes written by zipfile"""
+    
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+    
+    def writable(self):
+        return True
+    
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def pop(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
 class ExportService:
     """Service for exporting data to various formats"""
     
@@ -47,7 +72,7 @@ class ExportService:
             cell.alignment = Alignment(horizontal='center', vertical='center')
         
         # Data
-        for reservation in reservations:
+        for reservation in reservations.select_related('vehicule', 'locataire__user'):
             ws.append([
                 reservation.id,
                 f"{reservation.vehicule.marque} {reservation.vehicule.model}",
@@ -120,7 +145,7 @@ class ExportService:
         # Table data
         data = [['ID', 'Véhicule', 'Locataire', 'Date début', 'Date fin', 'Prix', 'Statut']]
         
-        for reservation in reservations:
+        for reservation in reservations.select_related('vehicule', 'locataire__user'):
             data.append([
                 str(reservation.id),
                 f"{reservation.vehicule.marque} {reservation.vehicule.model}",
@@ -157,51 +182,128 @@ class ExportService:
         
         return response
     
+    # Field per column of the vehicle import format (vehicles/services.VehicleImportService)
+    VEHICLE_EXPORT_FIELDS = [
+        ('matricule', 'matricule'), ('marque', 'marque'), ('model', 'model'),
+        ('prix_jour', 'prix_jour'), ('prix_heure', 'prix_heure'), ('description', 'description'),
+        ('categorie_vehicule', 'categorie_vehicule'), ('etat_vehicule', 'etat_vehicule'),
+        ('disponibilite', 'disponibilite'), ('depot_id', 'depot'), ('img_vhl', 'image'),
+    ]
+    
+    @staticmethod
+    def _vehicle_rows(vehicles: QuerySet) -> Iterator[List[Any]]:
+        """Rows of the vehicle import format, streamed from the database"""
+        fields = [field for field, _ in ExportService.VEHICLE_EXPORT_FIELDS]
+        for row in vehicles.values_list(*fields).iterator(chunk_size=2000):
+            row = list(row)
+            row[8] = 'oui' if row[8] else 'non'
+            row[9] = row[9] or ''
+            row[10] = os.path.basename(row[10]) if row[10] else ''
+            yield row
+    
+    @staticmethod
+    def export_vehicles_to_csv(vehicles: QuerySet, filename: str = 'vehicles.csv') -> StreamingHttpResponse:
+        """
+        Export vehicles to CSV, in the import format, streamed row by row
+        
+        Args:
+            vehicles: QuerySet of vehicles
+            filename: Output filename
+            
+        Returns:
+            StreamingHttpResponse with the CSV file
+        """
+        class Echo:
+            def write(self, value):
+                return value
+        
+        writer = csv.writer(Echo())
+        header = [column for _, column in ExportService.VEHICLE_EXPORT_FIELDS]
+        
+        def lines():
+            # BOM so Excel detects UTF-8
+            yield '\ufeff' + writer.writerow(header)
+            for row in ExportService._vehicle_rows(vehicles):
+                yield writer.writerow(row)
+        
+        response = StreamingHttpResponse(lines(), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+    
     @staticmethod
     def export_vehicles_to_excel(vehicles: QuerySet, filename: str = 'vehicles.xlsx') -> HttpResponse:
-        """Export vehicles to Excel"""
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Véhicules"
+        """
+        Export vehicles to Excel, in the import format
         
-        headers = ['ID', 'Matricule', 'Marque', 'Modèle', 'Catégorie', 'Prix/jour', 'Prix/heure', 'État', 'Disponibilité']
-        ws.append(headers)
+        Rows are streamed from the database and written in write-only mode.
+        
+        Args:
+            vehicles: QuerySet of vehicles
+            filename: Output filename
+            
+        Returns:
+            HttpResponse with Excel file
+        """
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Véhicules")
+        ws.append([column for _, column in ExportService.VEHICLE_EXPORT_FIELDS])
+        for row in ExportService._vehicle_rows(vehicles):
+            ws.append(row)
+        
+        output = io.BytesIO()
+        wb.save(output)
+        output.seek(0)
+        
+        response = HttpResponse(
+            output.read(),
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        
+        return response
+    
+    @staticmethod
+    def export_invoices_to_excel(factures: QuerySet, filename: str = 'factures.xlsx') -> HttpResponse:
+        """
+        Export invoices to Excel
+        
+        Rows are streamed from the database and written in write-only mode,
+        so memory does not grow with the number of invoices.
+        
+        Args:
+            factures: QuerySet of invoices
+            filename: Output filename
+            
+        Returns:
+            HttpResponse with Excel file
+        """
+        columns = [
+            ('numero', 'Numéro'), ('issued_at', 'Date émission'), ('agence_nom', 'Agence'),
+            ('locataire_nom', 'Locataire'), ('locataire_email', 'Email'),
+            ('vehicule_matricule', 'Matricule'), ('date_debut', 'Date début'), ('date_fin', 'Date fin'),
+            ('code_promo', 'Code promo'), ('rental_price', 'Prix location'),
+            ('promo_discount', 'Réduction'), ('subtotal', 'Sous-total'),
+            ('agency_fee', 'Frais agence'), ('total', 'Total'),
+        ]
+        
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Factures")
         
-        # Style headers
         header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
         header_font = Font(bold=True, color="FFFFFF")
-        
-        for cell in ws[1]:
+        header = []
+        for _, label in columns:
+            cell = WriteOnlyCell(ws, value=label)
             cell.fill = header_fill
             cell.font = header_font
             cell.alignment = Alignment(horizontal='center', vertical='center')
+            header.append(cell)
+        ws.append(header)
         
-        # Data
-        for vehicle in vehicles:
-            ws.append([
-                vehicle.id,
-                vehicle.matricule,
-                vehicle.marque,
-                vehicle.model,
-                vehicle.get_categorie_vehicule_display(),
-                float(vehicle.prix_jour),
-                float(vehicle.prix_heure),
-                vehicle.get_etat_vehicule_display(),
-                'Oui' if vehicle.disponibilite else 'Non',
-            ])
-        
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
+        for row in factures.values_list(*[field for field, _ in columns]).iterator(chunk_size=2000):
+            row = list(row)
+            row[1] = timezone.localtime(row[1]).strftime('%Y-%m-%d %H:%M')
+            ws.append(row)
         
         output = io.BytesIO()
         wb.save(output)
@@ -214,4 +316,24 @@ class ExportService:
         response['Content-Disposition'] = f'attachment; filename="{filename}"'
         
         return response
-
+    
+    @staticmethod
+    def stream_zip(files: Iterable[Tuple[str, bytes]]) -> Iterator[bytes]:
+        """
+        Build a ZIP archive on the fly, for StreamingHttpResponse
+        
+        Each file is sent as soon as it is added: the archive is never
+        held in memory. Entries are stored uncompressed (PDFs already are).
+        
+        Args:
+            files: (filename, content) pairs, consumed lazily
+            
+        Yields:
+            Chunks of the archive
+        """
+        sink = _StreamSink()
+        with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_STORED) as archive:
+            for name, content in files:
+                archive.writestr(name, content)
+                yield sink.pop()
+        yield sink.pop()
@@ -3,13 +3,20 @@ File upload and management service
 """
 import os
 import uuid
+import hashlib
 import logging
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
+from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import UploadedFile
 from django.core.files.storage import default_storage
 from django.conf import settings
+from django.db import transaction
+from django.db.models import F
 from PIL import Image
-from io import BytesIO
+from .image_service import (
+    RENDITIONS, RENDITION_FORMATS, check_image_header, get_output_formats, process_image
+)
+from .workers import WorkerPool
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +31,14 @@ class FileService:
     MAX_IMAGE_SIZE = 5 * 1024 * 1024  # 5MB
     MAX_DOCUMENT_SIZE = 10 * 1024 * 1024  # 10MB
     
+    # Leading bytes of document types: the content must match the extension
+    DOCUMENT_SIGNATURES = {
+        '.pdf': b'%PDF-',
+        '.jpg': b'\xff\xd8\xff',
+        '.jpeg': b'\xff\xd8\xff',
+        '.png': b'\x89PNG\r\n\x1a\n',
+    }
+    
     @staticmethod
     def validate_image(file: UploadedFile) -> Tuple[bool, Optional[str]]:
         """
@@ -44,13 +59,18 @@ class FileService:
         if file.size > FileService.MAX_IMAGE_SIZE:
             return False, f"Fichier trop volumineux. Taille maximale: {FileService.MAX_IMAGE_SIZE / (1024*1024)}MB"
         
-        # Check if it's actually an image
+        # Check the header only (format, dimensions). Pixels are decoded once,
+        # in the worker pool, where decoding errors are also reported.
         try:
             img = Image.open(file)
-            img.verify()
+            error = check_image_header(img)
+            if error:
+                return False, error
             return True, None
         except Exception as e:
             return False, f"Fichier image invalide: {str(e)}"
+        finally:
+            file.seek(0)
     
     @staticmethod
     def validate_document(file: UploadedFile) -> Tuple[bool, Optional[str]]:
@@ -67,8 +87,34 @@ class FileService:
         if file.size > FileService.MAX_DOCUMENT_SIZE:
             return False, f"Fichier trop volumineux. Taille maximale: {FileService.MAX_DOCUMENT_SIZE / (1024*1024)}MB"
         
+        error = FileService.check_document_content(file)
+        if error:
+            return False, error
         return True, None
     
+    @staticmethod
+    def check_document_content(file) -> Optional[str]:
+        """
+        Check that a document's content matches its extension (e.g. a .pdf is a PDF)
+        
+        Args:
+            file: Django File / UploadedFile
+            
+        Returns:
+            Error message, or None if the content matches (or the type has no signature)
+        """
+        ext = os.path.splitext(file.name)[1].lower()
+        signature = FileService.DOCUMENT_SIGNATURES.get(ext)
+        if signature is None:
+            return None
+        
+        file.seek(0)
+        header = file.read(len(signature))
+        file.seek(0)
+        if header != signature:
+            return f"Contenu du fichier invalide: ce n'est pas un fichier {ext[1:].upper()}."
+        return None
+    
     @staticmethod
     def generate_unique_filename(original_filename: str, prefix: str = '') -> str:
         """
@@ -87,59 +133,227 @@ class FileService:
         return f"{prefix}{unique_id}{ext}"
     
     @staticmethod
-    def upload_image(file: UploadedFile, upload_path: str, prefix: str = '') -> Optional[str]:
+    def generate_content_path(digest: str, upload_path: str, ext: str, prefix: str = '') -> str:
         """
-        Upload and process image
+        Generate content-addressed storage path
+        
+        Identical content always maps to the same path, so it is stored once
+        and its URL can be cached forever.
         
         Args:
-            file: Uploaded file
+            digest: SHA-256 hex digest of the content
             upload_path: Path to upload to (e.g., 'vehicles/')
-            prefix: Optional prefix for filename
+            ext: File extension, including the dot
+            prefix: Optional prefix for the filename
             
         Returns:
-            File path if successful, None otherwise
+            Storage path like 'vehicles/ab/vehicle_ab12...ef.jpg'
         """
-        # Validate image
-        is_valid, error = FileService.validate_image(file)
-        if not is_valid:
-            logger.error(f"Image validation failed: {error}")
-            raise ValueError(error)
+        prefix = f"{prefix}_" if prefix else ""
+        return os.path.join(upload_path, digest[:2], f"{prefix}{digest}{ext.lower()}")
+    
+    @staticmethod
+    def hash_file(file) -> str:
+        """
+        Compute SHA-256 of a file without loading it in memory
         
-        try:
-            # Generate unique filename
-            filename = FileService.generate_unique_filename(file.name, prefix)
-            file_path = os.path.join(upload_path, filename)
+        Args:
+            file: Django File / UploadedFile
             
-            # Process and save image
-            img = Image.open(file)
+        Returns:
+            Hex digest
+        """
+        sha256 = hashlib.sha256()
+        file.seek(0)
+        for chunk in file.chunks():
+            sha256.update(chunk)
+        file.seek(0)
+        return sha256.hexdigest()
+    
+    @staticmethod
+    def path_from_url(file_url: str) -> str:
+        """Get storage path from a media URL (absolute or relative)"""
+        return file_url.split(settings.MEDIA_URL, 1)[-1]
+    
+    @staticmethod
+    def acquire_blob(file_path: str) -> bool:
+        """
+        Add a reference to an already stored blob
+        
+        Args:
+            file_path: Content-addressed storage path
             
-            # Convert to RGB if necessary
-            if img.mode in ('RGBA', 'LA', 'P'):
-                rgb_img = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                rgb_img.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-                img = rgb_img
+        Returns:
+            True if the blob exists (and is now referenced once more)
+        """
+        from .models import MediaBlob
+        return MediaBlob.objects.filter(path=file_path).update(ref_count=F('ref_count') + 1) > 0
+    
+    @staticmethod
+    def _write_exact(file_path: str, content) -> None:
+        """Save content under exactly file_path, replacing any orphaned copy"""
+        if default_storage.exists(file_path):
+            default_storage.delete(file_path)
+        default_storage.save(file_path, content)
+    
+    @staticmethod
+    def _store_blob(file_path: str, digest: str, size: int, write) -> str:
+        """
+        Register a blob and write its content, or reference a concurrent copy
+        
+        Args:
+            file_path: Content-addressed storage path
+            digest: SHA-256 hex digest
+            size: Content size in bytes
+            write: Callable writing the content under file_path
             
-            # Resize if too large (max 1920x1920)
-            max_size = (1920, 1920)
-            if img.size[0] > max_size[0] or img.size[1] > max_size[1]:
-                img.thumbnail(max_size, Image.Resampling.LANCZOS)
+        Returns:
+            Stored file path
+        """
+        from .models import MediaBlob
+        with transaction.atomic():
+            blob, created = MediaBlob.objects.get_or_create(
+                path=file_path,
+                defaults={'digest': digest, 'size': size}
+            )
+            if not created:
+                # Stored concurrently by another request
+                MediaBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+                return file_path
+            # Written inside the transaction so the row never exists without its file
+            write()
+        return file_path
+    
+    @staticmethod
+    def get_rendition_path(file_path: str, rendition: str = 'full', fmt: str = 'jpeg') -> str:
+        """
+        Get storage path (or URL) of an image rendition
+        
+        Args:
+            file_path: Path or URL of the full-size JPEG
+            rendition: Rendition name (thumb, medium, full)
+            fmt: Output format (jpeg, webp)
             
-            # Save image
-            output = BytesIO()
-            img.save(output, format='JPEG', quality=85, optimize=True)
-            output.seek(0)
+        Returns:
+            Rendition path, derived from the full-size path
+        """
+        if rendition == 'full' and fmt == 'jpeg':
+            return file_path
+        base = os.path.splitext(file_path)[0]
+        ext = RENDITION_FORMATS[fmt][1]
+        return f"{base}_{rendition}{ext}"
+    
+    @staticmethod
+    def get_rendition_urls(file_url: str) -> Dict[str, Dict[str, str]]:
+        """
+        Get URLs of every rendition of an image
+        
+        Args:
+            file_url: URL of the full-size JPEG
             
-            # Save to storage
-            saved_path = default_storage.save(file_path, output)
+        Returns:
+            Dictionary like {'thumb': {'jpeg': url, 'webp': url}, ...}
+        """
+        return {
+            rendition: {
+                fmt: FileService.get_rendition_path(file_url, rendition, fmt)
+                for fmt in get_output_formats()
+            }
+            for rendition in RENDITIONS
+        }
+    
+    @staticmethod
+    def _save_renditions(outputs: Dict[Tuple[str, str], bytes], file_path: str) -> None:
+        """Save processed renditions next to the full-size JPEG at file_path"""
+        for (rendition, fmt), content in outputs.items():
+            rendition_path = FileService.get_rendition_path(file_path, rendition, fmt)
+            FileService._write_exact(rendition_path, ContentFile(content))
+    
+    @staticmethod
+    def upload_image(file: UploadedFile, upload_path: str, prefix: str = '') -> Optional[str]:
+        """
+        Upload and process image
+        
+        Args:
+            file: Uploaded file
+            upload_path: Path to upload to (e.g., 'vehicles/')
+            prefix: Optional prefix for filename
+            
+        Returns:
+            File path of the full-size JPEG if successful, None otherwise
+        """
+        saved_path, error = FileService.upload_images([file], upload_path, prefix)[0]
+        if error:
+            raise ValueError(error)
+        return saved_path
+    
+    @staticmethod
+    def upload_images(files: List[UploadedFile], upload_path: str, prefix: str = '') -> List[Tuple[Optional[str], Optional[str]]]:
+        """
+        Upload and process several images in the worker pool
+        
+        Every image is resized into the thumb/medium/full renditions,
+        each encoded as JPEG and WebP. Images are stored under the SHA-256
+        of the uploaded bytes: an image already stored is referenced again
+        without being processed.
+        
+        Args:
+            files: Uploaded files
+            upload_path: Path to upload to (e.g., 'reports/')
+            prefix: Optional prefix for filenames
             
-            logger.info(f"Image uploaded successfully: {saved_path}")
-            return saved_path
+        Returns:
+            List of (file_path, error_message) tuples, one per file
+        """
+        results: List[Tuple[Optional[str], Optional[str]]] = [(None, None)] * len(files)
+        # Content-addressed path -> (digest, indexes of the files with that content, raw bytes)
+        pending: Dict[str, Tuple[str, List[int], bytes]] = {}
+        
+        for index, file in enumerate(files):
+            is_valid, error = FileService.validate_image(file)
+            if not is_valid:
+                logger.error("Image validation failed: %s", error)
+                results[index] = (None, error)
+                continue
+            data = file.read()
+            digest = hashlib.sha256(data).hexdigest()
+            file_path = FileService.generate_content_path(digest, upload_path, '.jpg', prefix)
             
-        except Exception as e:
-            logger.error(f"Failed to upload image: {str(e)}")
-            raise
+            if file_path in pending:
+                pending[file_path][1].append(index)
+            elif FileService.acquire_blob(file_path):
+                # Already stored: no processing needed
+                logger.info("Image deduplicated: %s", file_path)
+                results[index] = (file_path, None)
+            else:
+                pending[file_path] = (digest, [index], data)
+        
+        paths = list(pending)
+        processed = WorkerPool.map(process_image, [pending[path][2] for path in paths])
+        
+        for file_path, (outputs, error) in zip(paths, processed):
+            digest, indexes, _ = pending[file_path]
+            if error:
+                logger.error("Image processing failed: %s", error)
+                for index in indexes:
+                    results[index] = (None, error)
+                continue
+            try:
+                FileService._store_blob(
+                    file_path, digest, len(outputs[('full', 'jpeg')]),
+                    lambda: FileService._save_renditions(outputs, file_path)
+                )
+                # Same content uploaded several times in this batch
+                for _ in indexes[1:]:
+                    FileService.acquire_blob(file_path)
+                logger.info("Image uploaded successfully: %s", file_path)
+                for index in indexes:
+                    results[index] = (file_path, None)
+            except Exception as e:
+                logger.error("Failed to upload image: %s", e)
+                raise
+        
+        return results
     
     @staticmethod
     def upload_document(file: UploadedFile, upload_path: str, prefix: str = '') -> Optional[str]:
@@ -157,28 +371,56 @@ class FileService:
         # Validate document
         is_valid, error = FileService.validate_document(file)
         if not is_valid:
-            logger.error(f"Document validation failed: {error}")
+            logger.error("Document validation failed: %s", error)
             raise ValueError(error)
         
         try:
-            # Generate unique filename
-            filename = FileService.generate_unique_filename(file.name, prefix)
-            file_path = os.path.join(upload_path, filename)
-            
-            # Save file
-            saved_path = default_storage.save(file_path, file)
-            
-            logger.info(f"Document uploaded successfully: {saved_path}")
-            return saved_path
-            
+            return FileService.store_document(file, upload_path, prefix)
         except Exception as e:
-            logger.error(f"Failed to upload document: {str(e)}")
+            logger.error("Failed to upload document: %s", e)
             raise
     
+    @staticmethod
+    def store_document(file, upload_path: str, prefix: str = '', digest: Optional[str] = None) -> str:
+        """
+        Store an already validated document at its content-addressed path
+        
+        The file is read chunk by chunk, never loaded whole in memory.
+        
+        Args:
+            file: Django File / UploadedFile
+            upload_path: Path to upload to
+            prefix: Optional prefix for filename
+            digest: SHA-256 of the file if already known
+            
+        Returns:
+            Stored file path
+        """
+        digest = digest or FileService.hash_file(file)
+        ext = os.path.splitext(file.name)[1]
+        file_path = FileService.generate_content_path(digest, upload_path, ext, prefix)
+        
+        if FileService.acquire_blob(file_path):
+            logger.info("Document deduplicated: %s", file_path)
+            return file_path
+        
+        # Save file (streamed chunk by chunk by the storage backend)
+        saved_path = FileService._store_blob(
+            file_path, digest, file.size,
+            lambda: FileService._write_exact(file_path, file)
+        )
+        
+        logger.info("Document uploaded successfully: %s", saved_path)
+        return saved_path
+    
     @staticmethod
     def delete_file(file_path: str) -> bool:
         """
-        Delete file from storage
+        Release a file, deleting it from storage once nothing references it
+        
+        Content-addressed blobs are only deleted when their last reference
+        is released. Files uploaded before content addressing are deleted
+        immediately.
         
         Args:
             file_path: Path to file
@@ -186,13 +428,51 @@ class FileService:
         Returns:
             True if deleted successfully, False otherwise
         """
+        from .models import MediaBlob
         try:
-            if default_storage.exists(file_path):
-                default_storage.delete(file_path)
-                logger.info(f"File deleted successfully: {file_path}")
-                return True
-            return False
+            with transaction.atomic():
+                blob = MediaBlob.objects.select_for_update().filter(path=file_path).first()
+                if blob is not None:
+                    if blob.ref_count > 1:
+                        MediaBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') - 1)
+                        logger.info("File still referenced, kept: %s", file_path)
+                        return False
+                    blob.delete()
+                    # Deleted while the row is locked so a concurrent upload of
+                    # the same content re-creates both the row and the file
+                    return FileService._delete_from_storage(file_path)
+            
+            return FileService._delete_from_storage(file_path)
         except Exception as e:
-            logger.error(f"Failed to delete file: {str(e)}")
+            logger.error("Failed to delete file: %s", e)
             return False
-
+    
+    @staticmethod
+    def _delete_from_storage(file_path: str) -> bool:
+        """Delete a file and its renditions from storage"""
+        if default_storage.exists(file_path):
+            default_storage.delete(file_path)
+            # Images uploaded before the pipeline kept their format (.png, .webp...)
+            # and may have renditions from the backfill command
+            if os.path.splitext(file_path)[1].lower() in FileService.ALLOWED_IMAGE_EXTENSIONS:
+                FileService.delete_renditions(file_path)
+            logger.info("File deleted successfully: %s", file_path)
+            return True
+        return False
+    
+    @staticmethod
+    def delete_renditions(file_path: str) -> None:
+        """
+        Delete the derived renditions of an image, if any
+        
+        Names are derived with get_rendition_path, as by the upload pipeline
+        and the generate_image_renditions backfill, whatever the source format.
+        
+        Args:
+            file_path: Path of the full-size image
+        """
+        for rendition in RENDITIONS:
+            for fmt in RENDITION_FORMATS:
+                rendition_path = FileService.get_rendition_path(file_path, rendition, fmt)
+                if rendition_path != file_path and default_storage.exists(rendition_path):
+                    default_storage.delete(rendition_path)
@@ -0,0 +1,134 @@
+"""
+Image processing pipeline (runs inside worker processes)
+"""
+from io import BytesIO
+from typing import Dict, Optional, Tuple
+from PIL import Image, ImageOps, features
+
+
+# Rendition name -> bounding box
+RENDITIONS = {
+    'thumb': (320, 320),
+    'medium': (960, 960),
+    'full': (1920, 1920),
+}
+
+# Output format name -> (Pillow format, file extension, save options)
+RENDITION_FORMATS = {
+    'jpeg': ('JPEG', '.jpg', {'quality': 85, 'optimize': True}),
+    'webp': ('WEBP', '.webp', {'quality': 80, 'method': 4}),
+}
+
+WEBP_SUPPORTED = features.check('webp')
+
+# Pillow formats accepted for uploads
+ALLOWED_IMAGE_FORMATS = {'JPEG', 'PNG', 'GIF', 'WEBP', 'MPO'}
+
+# Largest accepted image, checked from the header before any pixel is decoded.
+# 40 MP leaves room for 12-24 MP phone photos.
+MAX_IMAGE_PIXELS = 40_000_000
+
+# Pillow raises DecompressionBombError above twice this value
+Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+
+
+def get_output_formats():
+    """Output formats supported by the installed Pillow build"""
+    return [fmt for fmt in RENDITION_FORMATS if fmt != 'webp' or WEBP_SUPPORTED]
+
+
+def _to_rgb(img: Image.Image) -> Image.Image:
+    """Flatten transparency onto a white background"""
+    if img.mode in ('RGBA', 'LA', 'P'):
+        if img.mode == 'P':
+            img = img.convert('RGBA')
+        rgb_img = Image.new('RGB', img.size, (255, 255, 255))
+        rgb_img.paste(img, mask=img.split()[-1])
+        return rgb_img
+    if img.mode != 'RGB':
+        return img.convert('RGB')
+    return img
+
+
+def check_image_header(img: Image.Image) -> Optional[str]:
+    """
+    Validate an opened (not yet decoded) image from its header
+
+    Args:
+        img: Image returned by Image.open (header parsed, pixels not loaded)
+
+    Returns:
+        Error message, or None if the image is acceptable
+    """
+    if img.format not in ALLOWED_IMAGE_FORMATS:
+        return f"Format d'image non supporté: {img.format}"
+    width, height = img.size
+    if width * height > MAX_IMAGE_PIXELS:
+        return f"Image trop grande: {width}x{height} pixels (maximum {MAX_IMAGE_PIXELS // 1_000_000} MP)"
+    return None
+
+
+def _fit(size: Tuple[int, int], max_size: Tuple[int, int]) -> Tuple[int, int]:
+    """Size of an image of the given size once fitted into max_size"""
+    ratio = min(max_size[0] / size[0], max_size[1] / size[1], 1)
+    return max(1, int(size[0] * ratio)), max(1, int(size[1] * ratio))
+
+
+def decode_image(data: bytes) -> Tuple[Optional[Image.Image], Optional[str]]:
+    """
+    Validate and decode an uploaded image in a single pass
+
+    The header is checked before decoding (format, decompression bombs),
+    JPEGs are downscaled in the DCT domain with draft() so a 12 MP photo
+    is never fully decoded, and the EXIF orientation is applied once.
+    Decoding errors (truncated or corrupt files) are reported as invalid images.
+
+    Args:
+        data: Raw uploaded image bytes
+
+    Returns:
+        Tuple of (RGB image, error_message)
+    """
+    try:
+        img = Image.open(BytesIO(data))
+        error = check_image_header(img)
+        if error:
+            return None, error
+
+        # JPEG only: let libjpeg decode at 1/2, 1/4 or 1/8 scale
+        img.draft('RGB', _fit(img.size, RENDITIONS['full']))
+        ImageOps.exif_transpose(img, in_place=True)
+        return _to_rgb(img), None
+    except Exception as e:
+        return None, f"Fichier image invalide: {str(e)}"
+
+
+def process_image(data: bytes) -> Tuple[Dict[Tuple[str, str], bytes], str]:
+    """
+    Decode an image and encode every rendition
+
+    Module-level so it can be pickled into a ProcessPoolExecutor.
+
+    Args:
+        data: Raw uploaded image bytes
+
+    Returns:
+        Tuple of ({(rendition, format): encoded bytes}, error_message)
+    """
+    img, error = decode_image(data)
+    if error:
+        return {}, error
+
+    outputs = {}
+    # Largest first so each smaller rendition is resized from the previous one
+    for name, max_size in sorted(RENDITIONS.items(), key=lambda r: -r[1][0]):
+        if img.size[0] > max_size[0] or img.size[1] > max_size[1]:
+            img.thumbnail(max_size, Image.Resampling.LANCZOS)
+
+        for fmt in get_output_formats():
+            pil_format, _, options = RENDITION_FORMATS[fmt]
+            output = BytesIO()
+            img.save(output, format=pil_format, **options)
+            outputs[(name, fmt)] = output.getvalue()
+
+    return outputs, None
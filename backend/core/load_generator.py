@@ -0,0 +1,304 @@
+"""
+Synthetic load: scripted renter and staff sessions over plain asyncio HTTP/1.1
+
+The client only needs the standard library, so it runs offline against a
+local runserver or gunicorn (accounts come from seed_benchmark_data).
+"""
+import asyncio
+import json
+import random
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+from core.benchmark import BENCHMARK_DOMAIN, BENCHMARK_PASSWORD
+
+
+class HTTPError(Exception):
+    """Transport failure (connection refused or reset, timeout, malformed response)"""
+
+
+class HTTPConnection:
+    """One keep-alive HTTP/1.1 connection, reopened when the server closes it"""
+
+    def __init__(self, base_url: str, timeout: float):
+        url = urlsplit(base_url)
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.timeout = timeout
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+            self.reader = self.writer = None
+
+    async def _read_body(self, headers: Dict[str, str]) -> bytes:
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    return b''.join(chunks)
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+        if 'content-length' in headers:
+            return await self.reader.readexactly(int(headers['content-length']))
+        # No length: the body ends with the connection
+        body = await self.reader.read()
+        await self.close()
+        return body
+
+    async def _exchange(self, request: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.writer.write(request)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed by the server")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        body = await self._read_body(headers)
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, headers, body
+
+    async def request(self, method: str, path: str, data: Any = None,
+                      token: str = None) -> Tuple[int, Any]:
+        """
+        Send a request, reconnecting once if a kept-alive connection was dropped
+
+        Args:
+            method: HTTP method
+            path: Path with query string
+            data: JSON body
+            token: JWT access token
+
+        Returns:
+            Tuple of (status code, decoded JSON body or None)
+
+        Raises:
+            HTTPError: On transport failure
+        """
+        body = json.dumps(data).encode() if data is not None else b''
+        head = [
+            f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+            "Accept: application/json", f"Content-Length: {len(body)}",
+        ]
+        if data is not None:
+            head.append("Content-Type: application/json")
+        if token:
+            head.append(f"Authorization: Bearer {token}")
+        request = ('\r\n'.join(head) + '\r\n\r\n').encode() + body
+
+        for attempt in (1, 2):
+            reused = self.writer is not None
+            try:
+                status, headers, payload = await asyncio.wait_for(self._exchange(request), self.timeout)
+                break
+            except (OSError, asyncio.IncompleteReadError, ValueError, IndexError, asyncio.TimeoutError) as e:
+                await self.close()
+                if attempt == 2 or not reused or isinstance(e, asyncio.TimeoutError):
+                    raise HTTPError(f"{type(e).__name__}: {e}") from e
+
+        if 'json' in headers.get('content-type', ''):
+            try:
+                return status, json.loads(payload)
+            except ValueError:
+                pass
+        return status, None
+
+
+class LoadStats:
+    """Latency samples and errors per operation"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, Dict[str, int]] = {}
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    def record(self, operation: str, elapsed: float, error: Optional[str] = None):
+        self.latencies.setdefault(operation, []).append(elapsed)
+        if error is not None:
+            errors = self.errors.setdefault(operation, {})
+            errors[error] = errors.get(error, 0) + 1
+
+    @staticmethod
+    def percentile(ordered: List[float], q: float) -> float:
+        position = (len(ordered) - 1) * q
+        lower = int(position)
+        upper = min(lower + 1, len(ordered) - 1)
+        return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+    def report(self) -> Dict[str, Any]:
+        """Throughput, error rate and latency distribution (ms) per operation"""
+        duration = (self.finished or time.perf_counter()) - self.started
+        operations = {}
+        total = errors = 0
+        for operation, samples in sorted(self.latencies.items()):
+            ordered = sorted(samples)
+            failed = sum(self.errors.get(operation, {}).values())
+            total += len(samples)
+            errors += failed
+            operations[operation] = {
+                'requests': len(samples),
+                'per_second': round(len(samples) / duration, 2),
+                'error_rate': round(failed / len(samples), 4),
+                'errors': self.errors.get(operation, {}),
+                **{
+                    f'p{int(q * 100)}_ms': round(self.percentile(ordered, q) * 1000, 1)
+                    for q in (0.5, 0.9, 0.95, 0.99)
+                },
+                'max_ms': round(ordered[-1] * 1000, 1),
+            }
+        bookings = len(self.latencies.get('create_reservation', [])) - sum(
+            self.errors.get('create_reservation', {}).values()
+        )
+        return {
+            'duration_s': round(duration, 1),
+            'requests': total,
+            'requests_per_second': round(total / duration, 2),
+            'error_rate': round(errors / total, 4) if total else 0,
+            'bookings': bookings,
+            'bookings_per_second': round(bookings / duration, 2),
+            'operations': operations,
+        }
+
+
+class LoadGenerator:
+    """Runs renter and staff sessions concurrently until the deadline"""
+
+    CATEGORIES = ['Petites', 'Moyennes', 'Larges', 'Premium', 'Monospaces', 'SUV']
+
+    def __init__(self, base_url: str, renters: int, staff: int, duration: float,
+                 ramp_up: float = 5.0, think_time: float = 0.5, polls: int = 2,
+                 timeout: float = 30.0, agencies: int = 1, seed: int = 42):
+        self.base_url = base_url
+        self.renters = renters
+        self.staff = staff
+        self.duration = duration
+        self.ramp_up = ramp_up
+        self.think_time = think_time
+        self.polls = polls
+        self.timeout = timeout
+        self.agencies = agencies
+        self.rng = random.Random(seed)
+        self.stats = LoadStats()
+        self.deadline = 0.0
+
+    async def call(self, connection: HTTPConnection, operation: str, method: str, path: str,
+                   data: Any = None, token: str = None, expected: Tuple[int, ...] = (200,)) -> Optional[Any]:
+        """Timed request: records the latency and any error, returns the JSON body on success"""
+        start = time.perf_counter()
+        try:
+            status, body = await connection.request(method, path, data, token)
+        except HTTPError as e:
+            self.stats.record(operation, time.perf_counter() - start, str(e).split(':')[0])
+            return None
+        error = None if status in expected else f"HTTP {status}"
+        self.stats.record(operation, time.perf_counter() - start, error)
+        return body if error is None else None
+
+    async def think(self):
+        if self.think_time:
+            await asyncio.sleep(self.rng.expovariate(1 / self.think_time))
+
+    def running(self) -> bool:
+        return time.perf_counter() < self.deadline
+
+    async def login(self, connection: HTTPConnection, email: str) -> Optional[str]:
+        body = await self.call(connection, 'login', 'POST', '/api/accounts/login/',
+                               {'email': email, 'password': BENCHMARK_PASSWORD})
+        return body['data']['tokens']['access'] if body else None
+
+    async def renter_session(self, index: int):
+        """Log in, then search, quote, book and poll notifications until the deadline"""
+        connection = HTTPConnection(self.base_url, self.timeout)
+        try:
+            token = await self.login(connection, f'renter{index}@{BENCHMARK_DOMAIN}')
+            while token and self.running():
+                query = urlencode({'disponibilite': 'true', 'categorie': self.rng.choice(self.CATEGORIES)})
+                body = await self.call(connection, 'search_vehicles', 'GET', f'/api/vehicles/vehicules/?{query}', token=token)
+                vehicles = (body or {}).get('results') or []
+                await self.think()
+                if not vehicles:
+                    continue
+
+                vehicle = self.rng.choice(vehicles)
+                debut = date.today() + timedelta(days=self.rng.randint(1, 120))
+                fin = debut + timedelta(days=self.rng.randint(1, 10))
+                query = urlencode({'date_debut': debut.isoformat(), 'date_fin': fin.isoformat(), 'vehicules': vehicle['id']})
+                body = await self.call(connection, 'quote', 'GET', f'/api/vehicles/vehicules/quote/?{query}', token=token)
+                quotes = (body or {}).get('data', {}).get('quotes') or []
+                await self.think()
+                if not quotes:
+                    continue
+
+                await self.call(connection, 'create_reservation', 'POST', '/api/reservations/reservations/', {
+                    'vehicule': vehicle['id'], 'date_debut': debut.isoformat(), 'date_fin': fin.isoformat(),
+                    'prix': quotes[0]['prix'],
+                }, token=token, expected=(201,))
+
+                for _ in range(self.polls):
+                    await self.think()
+                    await self.call(connection, 'poll_notifications', 'GET',
+                                    '/api/notifications/notifications/?is_read=false', token=token)
+        finally:
+            await connection.close()
+
+    async def staff_session(self, index: int):
+        """Log in as an agency secretary, then confirm or cancel pending reservations"""
+        connection = HTTPConnection(self.base_url, self.timeout)
+        try:
+            token = await self.login(connection, f'secretary{index % self.agencies}@{BENCHMARK_DOMAIN}')
+            while token and self.running():
+                body = await self.call(connection, 'list_reservations', 'GET', '/api/reservations/reservations/', token=token)
+                pending = [r for r in (body or {}).get('results') or [] if r['status'] == 'PENDING']
+                if not pending:
+                    await self.think()
+                    continue
+                reservation = self.rng.choice(pending)
+                if self.rng.random() < 0.8:
+                    operation, action = 'confirm_reservation', 'confirm'
+                else:
+                    operation, action = 'cancel_reservation', 'cancel'
+                # Another staff session may have handled it first
+                await self.call(connection, operation, 'POST',
+                                f"/api/reservations/reservations/{reservation['id']}/{action}/",
+                                token=token, expected=(200, 400))
+                await self.think()
+        finally:
+            await connection.close()
+
+    async def _start(self, session, index: int, delay: float):
+        await asyncio.sleep(delay)
+        await session(index)
+
+    async def run(self) -> Dict[str, Any]:
+        """Run every session until the deadline and return the report"""
+        self.stats = LoadStats()
+        self.deadline = time.perf_counter() + self.duration
+        sessions = [(self.renter_session, i) for i in range(self.renters)]
+        sessions += [(self.staff_session, i) for i in range(self.staff)]
+        # Sessions start evenly over the ramp-up period
+        step = self.ramp_up / max(len(sessions), 1)
+        await asyncio.gather(*(
+            self._start(session, index, n * step) for n, (session, index) in enumerate(sessions)
+        ))
+        self.stats.finished = time.perf_counter()
+        return self.stats.report()
@@ -0,0 +1,184 @@
+"""
+Benchmark the hot API endpoints against the seeded benchmark dataset
+"""
+import json
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.benchmark import BenchmarkDataService
+from reservations.models import Reservation, Facture
+from vehicles.models import Vehicule
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentile with linear interpolation between closest ranks"""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = "Report p50/p95 latency, query counts and peak memory of the main endpoints as JSON"
+
+    # Heavy endpoints (exports, PDFs) run at most this many times
+    HEAVY_RUNS = 5
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--endpoint', action='append', help="Only run this endpoint (repeatable)")
+        parser.add_argument('--output', help="Write the JSON report to this file")
+        parser.add_argument('--compare', help="Previous JSON report to compare p50/p95 against")
+
+    def get_endpoints(self) -> Dict[str, Dict[str, Any]]:
+        """Endpoint name -> role, path and whether it is heavy"""
+        owner = BenchmarkDataService.get_owner()
+        renter = BenchmarkDataService.get_renter()
+        if owner is None or renter is None:
+            raise CommandError("No benchmark data, run seed_benchmark_data first.")
+        agence = owner.proprietaire_agence.agence
+
+        vehicule_id = Vehicule.objects.filter(agence=agence).values_list('id', flat=True).first()
+        reservation_id = Reservation.objects.filter(locataire=renter.locataire).values_list('id', flat=True).first()
+        facture_id = Facture.objects.filter(agence=agence).values_list('id', flat=True).first()
+
+        endpoints = {
+            'vehicules-list': ('renter', '/api/vehicles/vehicules/', False),
+            'vehicules-list-filtered': ('renter', f'/api/vehicles/vehicules/?agence={agence.id}&disponibilite=true&prix_max=800', False),
+            'vehicules-retrieve': ('renter', f'/api/vehicles/vehicules/{vehicule_id}/', False),
+            'reservations-list-renter': ('renter', '/api/reservations/reservations/', False),
+            'reservations-list-agency': ('owner', '/api/reservations/reservations/', False),
+            'reservations-retrieve': ('renter', f'/api/reservations/reservations/{reservation_id}/', False),
+            'notifications-list': ('renter', '/api/notifications/notifications/', False),
+            'statistics-agency': ('owner', '/api/statistics/', False),
+            'fleet-status': ('owner', '/api/statistics/fleet/', False),
+            'factures-list': ('owner', '/api/reservations/factures/', False),
+            'facture-pdf': ('owner', f'/api/reservations/factures/{facture_id}/pdf/', True),
+            'export-reservations-excel': ('owner', '/api/statistics/export/', True),
+            'export-vehicules-csv': ('owner', '/api/vehicles/vehicules/export/?output=csv', True),
+        }
+        if facture_id is None:
+            del endpoints['facture-pdf']
+        tokens = {
+            role: f"Bearer {RefreshToken.for_user(user).access_token}"
+            for role, user in (('owner', owner), ('renter', renter))
+        }
+        return {
+            name: {'authorization': tokens[role], 'path': path, 'heavy': heavy}
+            for name, (role, path, heavy) in endpoints.items()
+        }
+
+    @staticmethod
+    def request(client: Client, endpoint: Dict[str, Any]):
+        """GET an endpoint and read the whole body (streaming included)"""
+        counter = {'queries': 0}
+
+        def count(execute, sql, params, many, context):
+            counter['queries'] += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            start = time.perf_counter()
+            response = client.get(endpoint['path'], HTTP_AUTHORIZATION=endpoint['authorization'])
+            if response.streaming:
+                size = sum(len(chunk) for chunk in response.streaming_content)
+            else:
+                size = len(response.content)
+            elapsed = time.perf_counter() - start
+        return response.status_code, size, elapsed, counter['queries']
+
+    def benchmark(self, client: Client, endpoint: Dict[str, Any], runs: int, warmup: int) -> Dict[str, Any]:
+        runs = min(runs, self.HEAVY_RUNS) if endpoint['heavy'] else runs
+        for _ in range(warmup):
+            self.request(client, endpoint)
+
+        timings, queries = [], []
+        for _ in range(runs):
+            status, size, elapsed, query_count = self.request(client, endpoint)
+            timings.append(elapsed * 1000)
+            queries.append(query_count)
+
+        # Separate traced run: tracemalloc slows allocations down
+        tracemalloc.start()
+        self.request(client, endpoint)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            'path': endpoint['path'],
+            'status': status,
+            'bytes': size,
+            'runs': runs,
+            'p50_ms': round(percentile(timings, 0.5), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'mean_ms': round(sum(timings) / len(timings), 2),
+            'queries': max(queries),
+            'peak_memory_kb': round(peak / 1024, 1),
+        }
+
+    def compare(self, results: Dict[str, Any], path: str):
+        with open(path) as f:
+            previous = json.load(f)['endpoints']
+        for name, result in results.items():
+            before = previous.get(name)
+            if not before:
+                continue
+            changes = ', '.join(
+                f"{key} {before[key]} -> {result[key]} ({(result[key] - before[key]) / before[key] * 100:+.0f}%)"
+                for key in ('p50_ms', 'p95_ms', 'queries', 'peak_memory_kb') if before.get(key)
+            )
+            self.stdout.write(f"{name}: {changes}")
+
+    def handle(self, *args, **options):
+        endpoints = self.get_endpoints()
+        if options['endpoint']:
+            unknown = set(options['endpoint']) - set(endpoints)
+            if unknown:
+                raise CommandError(f"Unknown endpoint(s): {', '.join(sorted(unknown))}. Available: {', '.join(endpoints)}")
+            endpoints = {name: endpoints[name] for name in options['endpoint']}
+
+        # The query inspector would add its own overhead and logs to every request
+        with override_settings(ALLOWED_HOSTS=['testserver'], QUERY_INSPECTOR_ENABLED=False):
+            client = Client()
+            results = {}
+            for name, endpoint in endpoints.items():
+                results[name] = self.benchmark(client, endpoint, options['runs'], options['warmup'])
+                self.stderr.write(f"{name}: p50 {results[name]['p50_ms']} ms, {results[name]['queries']} queries")
+
+        report = {
+            'revision': git_revision(),
+            'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'database': connection.vendor,
+            'dataset': {
+                'vehicules': Vehicule.objects.count(),
+                'reservations': Reservation.objects.count(),
+                'factures': Facture.objects.count(),
+            },
+            'endpoints': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        self.stdout.write(output)
+
+        if options['compare']:
+            self.compare(results, options['compare'])
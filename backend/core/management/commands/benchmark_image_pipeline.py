@@ -0,0 +1,102 @@
+"""
+Benchmark the upload image pipeline against the legacy double-decode path
+"""
+import json
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from django.core.management.base import BaseCommand
+from PIL import Image
+from core.image_service import decode_image, process_image
+
+
+def make_photo(megapixels: float) -> bytes:
+    """Build a synthetic phone-like JPEG (4:3, noisy content, EXIF orientation)"""
+    width = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+    height = int(width * 3 / 4)
+    img = Image.effect_noise((width // 8, height // 8), 64).convert('RGB')
+    img = img.resize((width, height), Image.Resampling.BILINEAR)
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Rotated 90° CW
+    output = BytesIO()
+    img.save(output, format='JPEG', quality=92, exif=exif)
+    return output.getvalue()
+
+
+def legacy_pipeline(data: bytes) -> int:
+    """The pre-pipeline FileService path: verify(), reopen, full decode, one JPEG"""
+    Image.open(BytesIO(data)).verify()
+    img = Image.open(BytesIO(data))
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    img.thumbnail((1920, 1920), Image.Resampling.LANCZOS)
+    output = BytesIO()
+    img.save(output, format='JPEG', quality=85, optimize=True)
+    return len(output.getvalue())
+
+
+def single_pass_full(data: bytes) -> int:
+    """Single-pass decode producing the same single JPEG as the legacy path"""
+    img, error = decode_image(data)
+    if error:
+        raise ValueError(error)
+    img.thumbnail((1920, 1920), Image.Resampling.LANCZOS)
+    output = BytesIO()
+    img.save(output, format='JPEG', quality=85, optimize=True)
+    return len(output.getvalue())
+
+
+def single_pass_renditions(data: bytes) -> int:
+    """Path used by FileService.upload_images (all renditions, JPEG + WebP)"""
+    outputs, error = process_image(data)
+    if error:
+        raise ValueError(error)
+    return sum(len(content) for content in outputs.values())
+
+
+PIPELINES = {
+    'legacy': legacy_pipeline,
+    'single_pass_full': single_pass_full,
+    'single_pass_renditions': single_pass_renditions,
+}
+
+
+def run_pipeline(args) -> dict:
+    """Run one pipeline in a fresh process and measure CPU time and peak RSS growth"""
+    name, data, runs = args
+    func = PIPELINES[name]
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    cpu_times = []
+    for _ in range(runs):
+        start = time.process_time()
+        func(data)
+        cpu_times.append(time.process_time() - start)
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        'cpu_ms_per_upload': round(min(cpu_times) * 1000, 1),
+        'cpu_ms_mean': round(sum(cpu_times) / len(cpu_times) * 1000, 1),
+        # ru_maxrss is in KB on Linux
+        'peak_rss_growth_mb': round((rss_after - rss_before) / 1024, 1),
+    }
+
+
+class Command(BaseCommand):
+    help = "Compare CPU time and peak memory per upload of the legacy and current image pipelines"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--megapixels', type=float, default=12.0)
+        parser.add_argument('--runs', type=int, default=5)
+
+    def handle(self, *args, **options):
+        data = make_photo(options['megapixels'])
+        results = {
+            'megapixels': options['megapixels'],
+            'input_bytes': len(data),
+        }
+        for name in PIPELINES:
+            # A fresh process per pipeline so peak RSS is not shared between them
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                results[name] = pool.submit(run_pipeline, (name, data, options['runs'])).result()
+
+        self.stdout.write(json.dumps(results, indent=2))
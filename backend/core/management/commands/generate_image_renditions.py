@@ -0,0 +1,54 @@
+"""
+Backfill thumb/medium/WebP renditions for images uploaded before the pipeline existed
+"""
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from core.file_service import FileService
+from core.image_service import process_image
+from core.workers import WorkerPool
+
+
+class Command(BaseCommand):
+    help = "Generate missing image renditions for vehicle images and agency logos"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+
+    def handle(self, *args, **options):
+        from vehicles.models import Vehicule
+        from agencies.models import Agence
+
+        paths = list(
+            Vehicule.objects.exclude(img_vhl='').exclude(img_vhl__isnull=True)
+            .values_list('img_vhl', flat=True)
+        ) + list(
+            Agence.objects.exclude(logo_agence='').exclude(logo_agence__isnull=True)
+            .values_list('logo_agence', flat=True)
+        )
+        missing = [
+            path for path in set(paths)
+            if default_storage.exists(path)
+            and not default_storage.exists(FileService.get_rendition_path(path, 'thumb', 'jpeg'))
+        ]
+
+        batch_size = options['batch_size']
+        generated = 0
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            contents = []
+            for path in batch:
+                with default_storage.open(path, 'rb') as f:
+                    contents.append(f.read())
+
+            for path, (outputs, error) in zip(batch, WorkerPool.map(process_image, contents)):
+                if error:
+                    self.stderr.write(f"{path}: {error}")
+                    continue
+                for (rendition, fmt), content in outputs.items():
+                    rendition_path = FileService.get_rendition_path(path, rendition, fmt)
+                    if rendition_path != path:
+                        default_storage.save(rendition_path, ContentFile(content))
+                generated += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Generated renditions for {generated} image(s)."))
@@ -0,0 +1,54 @@
+"""
+Generate booking load against a running server
+"""
+import asyncio
+import json
+from django.core.management.base import BaseCommand, CommandError
+from core.load_generator import LoadGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        "Run scripted renter sessions (login, search, quote, book, poll notifications) and "
+        "staff sessions (confirm/cancel) against a running server; report throughput, "
+        "error rates and latency distributions. Run seed_benchmark_data first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--renters', type=int, default=20, help="Concurrent renter sessions")
+        parser.add_argument('--staff', type=int, default=2, help="Concurrent staff sessions")
+        parser.add_argument('--agencies', type=int, default=1, help="Seeded agencies whose secretaries are used")
+        parser.add_argument('--duration', type=float, default=60, help="Seconds")
+        parser.add_argument('--ramp-up', type=float, default=5, help="Seconds to start every session")
+        parser.add_argument('--think-time', type=float, default=0.5, help="Mean pause between steps, in seconds")
+        parser.add_argument('--polls', type=int, default=2, help="Notification polls after each booking")
+        parser.add_argument('--timeout', type=float, default=30, help="Request timeout, in seconds")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help="Write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        if not options['base_url'].startswith('http://'):
+            raise CommandError("Only plain http:// servers are supported.")
+
+        generator = LoadGenerator(
+            base_url=options['base_url'],
+            renters=options['renters'],
+            staff=options['staff'],
+            duration=options['duration'],
+            ramp_up=options['ramp_up'],
+            think_time=options['think_time'],
+            polls=options['polls'],
+            timeout=options['timeout'],
+            agencies=options['agencies'],
+            seed=options['seed'],
+        )
+        report = asyncio.run(generator.run())
+        if not report['requests']:
+            raise CommandError(f"No request completed, is the server running at {options['base_url']}?")
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        self.stdout.write(output)
@@ -0,0 +1,60 @@
+"""
+Seed the benchmark dataset used by benchmark_api
+"""
+import json
+import time
+from django.core.management.base import BaseCommand, CommandError
+from core.benchmark import BenchmarkDataService, BENCHMARK_DOMAIN, BENCHMARK_PASSWORD
+from reservations.services import InvoiceService
+from vehicles.services import FleetStatusService
+
+
+class Command(BaseCommand):
+    help = "Seed agencies, vehicles, renters, reservations and notifications at scale for benchmarks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--agencies', type=int, default=10)
+        parser.add_argument('--vehicles-per-agency', type=int, default=200)
+        parser.add_argument('--depots-per-agency', type=int, default=3)
+        parser.add_argument('--renters', type=int, default=5000)
+        parser.add_argument('--reservations', type=int, default=200_000)
+        parser.add_argument('--notifications', type=int, default=100_000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--no-invoices', action='store_true', help="Do not issue invoices")
+        parser.add_argument('--flush', action='store_true', help="Delete a previously seeded dataset first")
+
+    def handle(self, *args, **options):
+        if BenchmarkDataService.exists():
+            if not options['flush']:
+                raise CommandError("Benchmark data already present, use --flush to replace it.")
+            self.stdout.write("Deleting the previous benchmark data...")
+            BenchmarkDataService.flush()
+
+        start = time.perf_counter()
+
+        def progress(table, count):
+            self.stdout.write(f"  {table}: {count}", ending='\r')
+
+        created = BenchmarkDataService.seed(
+            agencies=options['agencies'],
+            vehicles_per_agency=options['vehicles_per_agency'],
+            depots_per_agency=options['depots_per_agency'],
+            renters=options['renters'],
+            reservations=options['reservations'],
+            notifications=options['notifications'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+            progress=progress,
+        )
+        if not options['no_invoices']:
+            created['factures'] = InvoiceService.issue_missing(options['batch_size'])
+        FleetStatusService.refresh()
+
+        created['seconds'] = round(time.perf_counter() - start, 1)
+        self.stdout.write('')
+        self.stdout.write(json.dumps(created, indent=2))
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded. Accounts: owner<n>@, secretary<n>@, renter<n>@{BENCHMARK_DOMAIN} "
+            f"(password '{BENCHMARK_PASSWORD}')."
+        ))
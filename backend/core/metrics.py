@@ -0,0 +1,184 @@
+"""
+In-process request metrics, exposed in the Prometheus text format
+
+Each process (e.g. each gunicorn worker) keeps its own counters: scrape
+every worker, or run a single worker per metrics port.
+"""
+import hmac
+import threading
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+from django.conf import settings
+from django.http import HttpResponse
+
+# Bucket upper bounds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot: +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += value
+        self.count += 1
+
+
+class RequestStats:
+    """Counters of one request (DB queries, DB time, cache hits and misses)"""
+
+    __slots__ = ('queries', 'db_time', 'cache_hits', 'cache_misses')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+# Stats of the request being handled, None outside sampled requests
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar('current_request_stats', default=None)
+
+
+def record_cache(hit: bool):
+    """Count a cache lookup against the current request, if it is sampled"""
+    stats = current_request_stats.get()
+    if stats is not None:
+        if hit:
+            stats.cache_hits += 1
+        else:
+            stats.cache_misses += 1
+
+
+class MetricsRegistry:
+    """Per-view histograms and counters, shared by the threads of a process"""
+
+    HISTOGRAMS = {
+        'request_duration_seconds': ('Wall time of the request', DURATION_BUCKETS),
+        'request_db_queries': ('Database queries per request', QUERY_BUCKETS),
+        'request_db_duration_seconds': ('Time spent in database queries per request', DURATION_BUCKETS),
+        'response_size_bytes': ('Size of non-streaming responses', SIZE_BUCKETS),
+    }
+    PREFIX = 'rent4you_'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Dict[Tuple[str, str, str], int] = {}
+        self.cache: Dict[Tuple[str, str], int] = {}
+        self.histograms: Dict[str, Dict[Tuple[str, str], Histogram]] = {name: {} for name in self.HISTOGRAMS}
+
+    def count_request(self, view: str, method: str, status: int):
+        """Count a request (every request, sampled or not)"""
+        key = (view, method, f"{status // 100}xx")
+        with self._lock:
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+    def observe(self, view: str, method: str, duration: float, stats: RequestStats, size: Optional[int]):
+        """Record the measurements of a sampled request"""
+        key = (view, method)
+        values = {
+            'request_duration_seconds': duration,
+            'request_db_queries': stats.queries,
+            'request_db_duration_seconds': stats.db_time,
+            'response_size_bytes': size,
+        }
+        with self._lock:
+            for name, value in values.items():
+                if value is None:
+                    continue
+                histogram = self.histograms[name].get(key)
+                if histogram is None:
+                    histogram = self.histograms[name][key] = Histogram(self.HISTOGRAMS[name][1])
+                histogram.observe(value)
+            for result, count in (('hit', stats.cache_hits), ('miss', stats.cache_misses)):
+                if count:
+                    self.cache[(view, result)] = self.cache.get((view, result), 0) + count
+
+    def reset(self):
+        with self._lock:
+            self.requests.clear()
+            self.cache.clear()
+            for histograms in self.histograms.values():
+                histograms.clear()
+
+    @staticmethod
+    def _labels(**labels) -> str:
+        escaped = (
+            f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+            for name, value in labels.items()
+        )
+        return '{' + ','.join(escaped) + '}'
+
+    def render(self, sample_rate: float) -> str:
+        """
+        Render every metric in the Prometheus text exposition format
+
+        Args:
+            sample_rate: Fraction of requests measured (exported as a gauge)
+
+        Returns:
+            Metrics text
+        """
+        prefix = self.PREFIX
+        lines: List[str] = [
+            f"# HELP {prefix}metrics_sample_rate Fraction of requests measured by the histograms",
+            f"# TYPE {prefix}metrics_sample_rate gauge",
+            f"{prefix}metrics_sample_rate {sample_rate}",
+            f"# HELP {prefix}requests_total Requests handled",
+            f"# TYPE {prefix}requests_total counter",
+        ]
+        with self._lock:
+            for (view, method, status), count in sorted(self.requests.items()):
+                lines.append(f"{prefix}requests_total{self._labels(view=view, method=method, status=status)} {count}")
+
+            lines += [
+                f"# HELP {prefix}cache_requests_total Cache lookups of sampled requests",
+                f"# TYPE {prefix}cache_requests_total counter",
+            ]
+            for (view, result), count in sorted(self.cache.items()):
+                lines.append(f"{prefix}cache_requests_total{self._labels(view=view, result=result)} {count}")
+
+            for name, (help_text, _) in self.HISTOGRAMS.items():
+                lines += [f"# HELP {prefix}{name} {help_text}", f"# TYPE {prefix}{name} histogram"]
+                for (view, method), histogram in sorted(self.histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                        cumulative += count
+                        labels = self._labels(view=view, method=method, le=bound)
+                        lines.append(f"{prefix}{name}_bucket{labels} {cumulative}")
+                    labels = self._labels(view=view, method=method)
+                    lines.append(f"{prefix}{name}_sum{labels} {histogram.total}")
+                    lines.append(f"{prefix}{name}_count{labels} {histogram.count}")
+
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint (Bearer METRICS_TOKEN; open without a token only in DEBUG)"""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        authorization = request.META.get('HTTP_AUTHORIZATION', '')
+        if not hmac.compare_digest(authorization.encode(), f"Bearer {token}".encode()):
+            return HttpResponse(status=401)
+    elif not settings.DEBUG:
+        # Endpoint names and traffic are not public: no token configured, no access
+        return HttpResponse(status=403)
+
+    body = registry.render(getattr(settings, 'METRICS_SAMPLE_RATE', 1.0))
+    return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
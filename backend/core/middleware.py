@@ -1,22 +1,147 @@
 import logging
+import random
+import time
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.utils.functional import SimpleLazyObject, empty
+from core.metrics import RequestStats, current_request_stats, registry
+from core.query_inspector import QueryBudgetExceeded, QueryInspector, get_query_budget
+from core.structured_logging import get_request_id, request_id
 
 logger = logging.getLogger(__name__)
 
 
+def _loaded_user_email(request) -> str:
+    """Email of the request user, without loading it from the session"""
+    user = getattr(request, 'user', None)
+    if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+        return 'Anonymous'
+    return getattr(user, 'email', 'Anonymous')
+
+
+class RequestIdMiddleware:
+    """Tag the request and its log records with an id, echoed in X-Request-ID"""
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        request.request_id = get_request_id(request)
+        token = request_id.set(request.request_id)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_id.reset(token)
+        response['X-Request-ID'] = request.request_id
+        return response
+
+
 class RequestLoggingMiddleware:
-    """Middleware for logging API requests"""
+    """Middleware for logging API requests (one line per request, sampled per logger)"""
     
     def __init__(self, get_response):
         self.get_response = get_response
     
     def __call__(self, request):
-        # Log request
-        logger.info(f"{request.method} {request.path} - User: {getattr(request.user, 'email', 'Anonymous')}")
-        
+        start = time.perf_counter()
         response = self.get_response(request)
         
-        # Log response
-        logger.info(f"Response: {response.status_code}")
+        # Logged after the response: DRF has authenticated the user by now
+        logger.info(
+            "%s %s %s", request.method, request.path, response.status_code,
+            extra={
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'duration_ms': round((time.perf_counter() - start) * 1000, 1),
+                'user': _loaded_user_email(request),
+            }
+        )
         
         return response
 
+
+class InstrumentationMiddleware:
+    """
+    Per-endpoint metrics: wall time, DB queries and DB time, cache hits and
+    misses, response size, labelled by resolved URL name
+
+    Every request is counted; the measurements are taken on a
+    METRICS_SAMPLE_RATE fraction of requests.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'METRICS_SAMPLE_RATE', 1.0)
+
+    @staticmethod
+    def get_view_name(request) -> str:
+        match = getattr(request, 'resolver_match', None)
+        return match.view_name if match is not None else '<unresolved>'
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            response = self.get_response(request)
+            registry.count_request(self.get_view_name(request), request.method, response.status_code)
+            return response
+
+        stats = RequestStats()
+
+        def count_query(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                stats.queries += 1
+                stats.db_time += time.perf_counter() - start
+
+        token = current_request_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(count_query):
+                response = self.get_response(request)
+        finally:
+            current_request_stats.reset(token)
+        duration = time.perf_counter() - start
+
+        # Streaming bodies are produced after the middleware returns
+        size = None if response.streaming else len(response.content)
+        view = self.get_view_name(request)
+        registry.count_request(view, request.method, response.status_code)
+        registry.observe(view, request.method, duration, stats, size)
+        return response
+
+
+class QueryInspectorMiddleware:
+    """
+    Development/staging SQL inspection: logs likely N+1 patterns and slow
+    queries with their origin, and checks per-endpoint query budgets
+
+    Enabled by QUERY_INSPECTOR_ENABLED. With QUERY_INSPECTOR_RAISE, a
+    request over its budget raises QueryBudgetExceeded, so tests using the
+    test client fail.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_INSPECTOR_ENABLED', False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        inspector = QueryInspector()
+        with connection.execute_wrapper(inspector):
+            response = self.get_response(request)
+
+        view = InstrumentationMiddleware.get_view_name(request)
+        label = f"{request.method} {view}"
+        inspector.report(label)
+
+        budget = get_query_budget(view)
+        if budget is not None and inspector.total > budget:
+            if getattr(settings, 'QUERY_INSPECTOR_RAISE', False):
+                raise QueryBudgetExceeded(f"Budget of {budget} queries exceeded\n{inspector.summary(label)}")
+            logger.error("Budget of %d queries exceeded\n%s", budget, inspector.summary(label))
+        return response
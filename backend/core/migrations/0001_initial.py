@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('RESERVATION_CONFIRMED', 'Réservation confirmée'), ('RESERVATION_CANCELLED', 'Réservation annulée'), ('CONTRACT_READY', 'Contrat prêt'), ('COMPLAINT_RECEIVED', 'Réclamation reçue'), ('COMPLAINT_RESOLVED', 'Réclamation résolue'), ('PAYMENT_RECEIVED', 'Paiement reçu'), ('VEHICLE_AVAILABLE', 'Véhicule disponible'), ('SYSTEM', 'Système')], max_length=50)),
+                ('title', models.CharField(max_length=255)),
+                ('message', models.TextField()),
+                ('is_read', models.BooleanField(default=False)),
+                ('related_object_type', models.CharField(blank=True, max_length=50, null=True)),
+                ('related_object_id', models.IntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'notifications',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', 'is_read'], name='notificatio_user_id_a4dd5c_idx'), models.Index(fields=['created_at'], name='notificatio_created_e4c995_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import models
+
+
+class MediaBlob(models.Model):
+    """Content-addressed media file with a reference count"""
+    digest = models.CharField(max_length=64, db_index=True)  # SHA-256 of the uploaded content
+    path = models.CharField(max_length=255, unique=True)  # Storage path, derived from the digest
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'media_blobs'
+        verbose_name = 'Media Blob'
+        verbose_name_plural = 'Media Blobs'
+    
+    def __str__(self):
+        return f"{self.path} ({self.ref_count} ref)"
@@ -0,0 +1,131 @@
+"""
+Rental pricing engine
+"""
+import math
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Tuple, Union
+from django.db.models import BigIntegerField, F
+from django.db.models.functions import Cast, Round
+
+
+def format_cents(cents: int) -> str:
+    """Exact decimal string of an amount in cents, e.g. 12345 -> '123.45'"""
+    sign = '-' if cents < 0 else ''
+    units, cents = divmod(abs(cents), 100)
+    return f"{sign}{units}.{cents:02d}"
+
+
+class PricingService:
+    """
+    Service for pricing rentals
+    
+    All arithmetic is done on integer cents, so results are exact and the
+    per-vehicle loop only does a few integer operations.
+    """
+    
+    @staticmethod
+    def get_duration(debut: Union[date, datetime], fin: Union[date, datetime]) -> Tuple[int, int]:
+        """
+        Billable duration of a rental
+        
+        Dates are whole days, both inclusive (as for reservations).
+        Datetimes are billed per started hour: full days at the daily price,
+        the remaining hours at the hourly price.
+        
+        Args:
+            debut: Start date or datetime
+            fin: End date or datetime
+            
+        Returns:
+            Tuple of (days, hours)
+        """
+        if not isinstance(debut, datetime) or not isinstance(fin, datetime):
+            debut = debut.date() if isinstance(debut, datetime) else debut
+            fin = fin.date() if isinstance(fin, datetime) else fin
+            return max((fin - debut).days + 1, 0), 0
+        
+        total_hours = max(math.ceil((fin - debut).total_seconds() / 3600), 0)
+        return divmod(total_hours, 24)
+    
+    @staticmethod
+    def get_discount_basis_points(code_promo) -> int:
+        """
+        Discount of a promo code in basis points (0 if not valid)
+        
+        Args:
+            code_promo: CodePromo instance or None
+            
+        Returns:
+            Discount in hundredths of a percent
+        """
+        if code_promo is None or not code_promo.is_valid():
+            return 0
+        return int(code_promo.discount_percentage * 100)
+    
+    @staticmethod
+    def quote_cents(rows: Iterable[Tuple[int, int, int, int]], days: int, hours: int,
+                    code_promo=None) -> List[Tuple[int, int, int]]:
+        """
+        Price many vehicles for the same duration
+        
+        The hourly part of a rental never costs more than one more day.
+        The promo code only applies to the vehicles of its agency.
+        
+        Args:
+            rows: (vehicule id, agence id, prix_jour, prix_heure) tuples, prices in cents
+            days: Billable days
+            hours: Billable extra hours
+            code_promo: Optional promo code
+            
+        Returns:
+            List of (vehicule id, prix_original, reduction) in cents, in row order
+        """
+        discount_bp = PricingService.get_discount_basis_points(code_promo)
+        promo_agence_id = code_promo.agence_id if discount_bp else None
+        
+        quotes = []
+        for vehicule_id, agence_id, jour, heure in rows:
+            original = days * jour + min(hours * heure, jour)
+            # Rounded half up to the cent
+            reduction = (original * discount_bp + 5000) // 10000 if agence_id == promo_agence_id else 0
+            quotes.append((vehicule_id, original, reduction))
+        return quotes
+    
+    @staticmethod
+    def quote(vehicules, debut: Union[date, datetime], fin: Union[date, datetime],
+              code_promo=None) -> Dict[str, Any]:
+        """
+        Quote a set of vehicles for a rental period in a single query
+        
+        Prices are converted to cents by the database, so no Decimal is
+        built per vehicle.
+        
+        Args:
+            vehicules: QuerySet of vehicles
+            debut: Start date or datetime
+            fin: End date or datetime
+            code_promo: Optional promo code
+            
+        Returns:
+            Dictionary with the billed duration and one quote per vehicle
+            (amounts as exact decimal strings)
+        """
+        days, hours = PricingService.get_duration(debut, fin)
+        rows = vehicules.order_by().values_list(
+            'id', 'agence_id',
+            Cast(Round(F('prix_jour') * 100), BigIntegerField()),
+            Cast(Round(F('prix_heure') * 100), BigIntegerField()),
+        )
+        return {
+            'jours': days,
+            'heures': hours,
+            'quotes': [
+                {
+                    'vehicule': vehicule_id,
+                    'prix_original': format_cents(original),
+                    'reduction': format_cents(reduction),
+                    'prix': format_cents(original - reduction),
+                }
+                for vehicule_id, original, reduction in PricingService.quote_cents(rows, days, hours, code_promo)
+            ],
+        }
@@ -0,0 +1,188 @@
+"""
+SQL inspection for development and staging: N+1 and slow query detection,
+per-endpoint query budgets
+"""
+import logging
+import os
+import re
+import sys
+import time
+import traceback
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from django.conf import settings
+from django.db import connection
+from rest_framework.fields import Field
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*%s\s*,?)+\)', re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_SPACES = re.compile(r'\s+')
+
+
+def fingerprint(sql: str) -> str:
+    """
+    Normalize a statement so the same query with other values maps to one key
+
+    Args:
+        sql: SQL with placeholders (literals are replaced as well)
+
+    Returns:
+        Normalized SQL
+    """
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a request or block runs more queries than its budget"""
+
+
+class QueryRecord:
+    """Statements sharing one fingerprint"""
+
+    __slots__ = ('sql', 'count', 'duration', 'origin', 'stack')
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.count = 0
+        self.duration = 0.0
+        self.origin: Optional[str] = None
+        self.stack: List[str] = []
+
+
+class QueryInspector:
+    """
+    connection.execute_wrapper callable collecting the statements of a
+    request (or of any block)
+
+    The origin (serializer field or serializer) and the project frames of
+    the stack are captured when a fingerprint reaches the repeat threshold
+    and for slow statements, not for every query.
+    """
+
+    STACK_DEPTH = 6
+
+    def __init__(self, repeat_threshold: int = None, slow_ms: float = None):
+        self.repeat_threshold = repeat_threshold or getattr(settings, 'QUERY_INSPECTOR_REPEAT_THRESHOLD', 5)
+        self.slow_ms = slow_ms if slow_ms is not None else getattr(settings, 'QUERY_INSPECTOR_SLOW_MS', 100)
+        self.records: Dict[str, QueryRecord] = {}
+        self.slow: List[QueryRecord] = []
+        self.total = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.total += 1
+            key = fingerprint(sql)
+            record = self.records.get(key)
+            if record is None:
+                record = self.records[key] = QueryRecord(key)
+            record.count += 1
+            record.duration += duration
+            if record.count == self.repeat_threshold:
+                record.origin, record.stack = self.capture()
+            if duration * 1000 >= self.slow_ms:
+                slow = QueryRecord(key)
+                slow.count, slow.duration = 1, duration
+                slow.origin, slow.stack = self.capture()
+                self.slow.append(slow)
+
+    def capture(self):
+        """
+        Locate the code running the current statement
+
+        Returns:
+            Tuple of (innermost serializer or serializer field, or None;
+            project frames of the stack, innermost last)
+        """
+        origin = None
+        frame = sys._getframe(2)
+        while frame is not None and origin is None:
+            owner = frame.f_locals.get('self')
+            if isinstance(owner, BaseSerializer):
+                origin = type(owner).__name__
+            elif isinstance(owner, Field) and owner.parent is not None:
+                origin = f"{type(owner.parent).__name__}.{owner.field_name}"
+            frame = frame.f_back
+
+        base_dir = str(settings.BASE_DIR)
+        this_file = os.path.abspath(__file__)
+        frames = [
+            frame for frame in traceback.extract_stack()
+            if frame.filename.startswith(base_dir) and os.path.abspath(frame.filename) != this_file
+            and 'site-packages' not in frame.filename
+        ]
+        return origin, [
+            f"{os.path.relpath(frame.filename, base_dir)}:{frame.lineno} in {frame.name}"
+            for frame in frames[-self.STACK_DEPTH:]
+        ]
+
+    def get_repeated(self) -> List[QueryRecord]:
+        """Fingerprints run at least repeat_threshold times, most frequent first"""
+        repeated = [record for record in self.records.values() if record.count >= self.repeat_threshold]
+        return sorted(repeated, key=lambda record: -record.count)
+
+    def summary(self, label: str) -> str:
+        """One line per repeated or slow statement, for error messages"""
+        lines = [f"{label}: {self.total} queries"]
+        for record in self.get_repeated():
+            lines.append(f"  {record.count}x [{record.origin or '?'}] {record.sql[:200]}")
+        for record in self.slow:
+            lines.append(f"  slow {record.duration * 1000:.0f} ms [{record.origin or '?'}] {record.sql[:200]}")
+        return '\n'.join(lines)
+
+    @staticmethod
+    def _details(record: QueryRecord) -> str:
+        return ''.join(f"\n  {line}" for line in [f"SQL: {record.sql[:500]}"] + record.stack)
+
+    def report(self, label: str):
+        """Log repeated statements (likely N+1) and slow statements"""
+        for record in self.get_repeated():
+            logger.warning(
+                "N+1 suspected in %s: %d identical queries (%.1f ms) from %s%s",
+                label, record.count, record.duration * 1000,
+                record.origin or 'unknown origin', self._details(record)
+            )
+        for record in self.slow:
+            logger.warning(
+                "Slow query in %s: %.1f ms from %s%s",
+                label, record.duration * 1000, record.origin or 'unknown origin', self._details(record)
+            )
+
+
+def get_query_budget(view_name: str) -> Optional[int]:
+    """Query budget of an endpoint (QUERY_BUDGETS, then QUERY_BUDGET_DEFAULT)"""
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    return budgets.get(view_name, getattr(settings, 'QUERY_BUDGET_DEFAULT', None))
+
+
+@contextmanager
+def query_budget(max_queries: int, label: str = 'block'):
+    """
+    Fail when the enclosed block runs more than max_queries statements
+
+    Usage:
+        with query_budget(3, 'vehicule-list'):
+            client.get('/api/vehicles/vehicules/')
+
+    Args:
+        max_queries: Maximum number of statements
+        label: Name used in the error message
+
+    Raises:
+        QueryBudgetExceeded: With the repeated and slow statements
+    """
+    inspector = QueryInspector()
+    with connection.execute_wrapper(inspector):
+        yield inspector
+    if inspector.total > max_queries:
+        raise QueryBudgetExceeded(f"Budget of {max_queries} queries exceeded\n{inspector.summary(label)}")
@@ -0,0 +1,67 @@
+"""
+Reference data read on most requests (agencies, depots), from the two-level cache
+"""
+from typing import Any, Dict, Optional
+from core.cache_service import CacheService
+
+
+class ReferenceDataService:
+    """Agencies and depots by id, kept in every process (see CacheService.get_two_level)"""
+
+    NAMESPACE = 'reference'
+    CACHE_TIMEOUT = 3600
+
+    @staticmethod
+    def get_agences() -> Dict[int, Dict[str, Any]]:
+        """
+        Get every agency
+
+        Returns:
+            Dictionary of agency ID -> {'nom_agence', 'is_active'}
+        """
+        from agencies.models import Agence
+
+        return CacheService.get_two_level(
+            ReferenceDataService.NAMESPACE, 'agences',
+            lambda: {
+                agence['id']: agence
+                for agence in Agence.objects.values('id', 'nom_agence', 'is_active')
+            },
+            ReferenceDataService.CACHE_TIMEOUT
+        )
+
+    @staticmethod
+    def get_depots() -> Dict[int, Dict[str, Any]]:
+        """
+        Get every depot
+
+        Returns:
+            Dictionary of depot ID -> {'adress_dpt', 'agence_id', 'is_active'}
+        """
+        from vehicles.models import Depot
+
+        return CacheService.get_two_level(
+            ReferenceDataService.NAMESPACE, 'depots',
+            lambda: {
+                depot['id']: depot
+                for depot in Depot.objects.values('id', 'adress_dpt', 'agence_id', 'is_active')
+            },
+            ReferenceDataService.CACHE_TIMEOUT
+        )
+
+    @staticmethod
+    def get_agence_nom(agence_id: Optional[int]) -> Optional[str]:
+        """Name of an agency, or None if unknown (e.g. created a moment ago in another process)"""
+        agence = ReferenceDataService.get_agences().get(agence_id)
+        return agence['nom_agence'] if agence else None
+
+    @staticmethod
+    def get_depot_adress(depot_id: Optional[int]) -> Optional[str]:
+        """Address of a depot, or None if unknown"""
+        depot = ReferenceDataService.get_depots().get(depot_id)
+        return depot['adress_dpt'] if depot else None
+
+    @staticmethod
+    def invalidate():
+        """Drop the cached agencies and depots (called when one is saved or deleted)"""
+        CacheService.invalidate_local(ReferenceDataService.NAMESPACE)
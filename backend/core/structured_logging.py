@@ -0,0 +1,177 @@
+"""
+Structured, non-blocking logging
+
+Request threads only filter records and put them on a queue; a listener
+thread formats them (JSON, one object per line) and writes them out.
+"""
+import atexit
+import json
+import logging
+import queue
+import random
+import re
+import threading
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+# Id of the request being handled, '-' outside requests
+request_id: ContextVar[str] = ContextVar('request_id', default='-')
+
+REQUEST_ID_HEADER = 'HTTP_X_REQUEST_ID'
+_VALID_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+# LogRecord attributes that are not "extra" fields
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'request_id'}
+
+
+def get_request_id(request) -> str:
+    """Incoming X-Request-ID when well-formed (e.g. from a proxy), else a new id"""
+    incoming = request.META.get(REQUEST_ID_HEADER, '')
+    return incoming if _VALID_REQUEST_ID.match(incoming) else uuid.uuid4().hex
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request id (runs in the calling thread)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep a fraction of the records at or below INFO, per logger
+
+    Args:
+        rates: Logger name -> fraction kept (0 to 1); child loggers inherit
+            the rate of their closest configured parent
+    """
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None):
+        super().__init__()
+        self.rates = rates or {}
+        self._cache: Dict[str, float] = {}
+
+    def get_rate(self, name: str) -> float:
+        rate = self._cache.get(name)
+        if rate is None:
+            rate, prefix = 1.0, name
+            while prefix:
+                if prefix in self.rates:
+                    rate = self.rates[prefix]
+                    break
+                prefix = prefix.rpartition('.')[0]
+            self._cache[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        rate = self.get_rate(record.name)
+        return rate >= 1 or random.random() < rate
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, request id, message, extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'request_id': getattr(record, 'request_id', '-'),
+            # Lazy %-style formatting happens here, in the listener thread
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry['stack_info'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for development, with the request id"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        if not hasattr(record, 'request_id'):
+            record.request_id = '-'
+        return super().format(record)
+
+
+class QueueStreamHandler(QueueHandler):
+    """
+    Handler that enqueues records for a background stream writer
+
+    Never blocks the caller: when the queue is full, records are dropped
+    and the number dropped is reported once the queue drains. Records are
+    enqueued as-is (the queue is in-process), so message formatting and
+    JSON encoding happen in the listener thread.
+
+    The listener thread is started per process: with gunicorn --preload,
+    configure logging in the workers (post_fork), not in the master.
+
+    Args:
+        stream: Output stream (sys.stderr by default)
+        queue_size: Maximum records waiting to be written
+    """
+
+    def __init__(self, stream=None, queue_size: int = 10000):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.target = logging.StreamHandler(stream)
+        self.listener = QueueListener(self.queue, self.target)
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+        self.listener.start()
+        atexit.register(self.close)
+
+    def setFormatter(self, fmt: logging.Formatter):
+        # The formatter applies where records are written
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+            return
+
+        if self.dropped:
+            with self._dropped_lock:
+                dropped, self.dropped = self.dropped, 0
+            if dropped:
+                warning = logging.LogRecord(
+                    __name__, logging.WARNING, __file__, 0,
+                    "%d log records dropped: logging queue full", (dropped,), None
+                )
+                warning.request_id = '-'
+                try:
+                    self.queue.put_nowait(warning)
+                except queue.Full:
+                    with self._dropped_lock:
+                        self.dropped += dropped
+
+    def close(self):
+        """Write out the queued records and stop the listener thread"""
+        with self._dropped_lock:
+            listener, self.listener = self.listener, None
+        if listener is not None:
+            try:
+                listener.stop()
+            except queue.Full:
+                pass
+            self.target.close()
+        super().close()
@@ -94,35 +94,3 @@ def is_agency_staff(user) -> bool:
         hasattr(user, 'admin_agence') or
         hasattr(user, 'garagiste')
     )
-
-
-def calculate_reservation_price(vehicule, date_debut, date_fin, code_promo=None) -> Dict[str, Any]:
-    """
-    Calculate reservation price based on dates and promo code
-    
-    Args:
-        vehicule: Vehicle instance
-        date_debut: Start date
-        date_fin: End date
-        code_promo: Optional promo code
-        
-    Returns:
-        Dictionary with prix, prix_original, and reduction
-    """
-    from datetime import timedelta
-    
-    days = (date_fin - date_debut).days + 1
-    prix_original = float(vehicule.prix_jour) * days
-    
-    reduction = 0
-    if code_promo and code_promo.is_valid():
-        reduction = (prix_original * code_promo.discount_percentage) / 100
-    
-    prix = prix_original - reduction
-    
-    return {
-        'prix': prix,
-        'prix_original': prix_original,
-        'reduction': reduction,
-    }
-
@@ -0,0 +1,166 @@
+"""
+Worker pools for CPU-bound work
+"""
+import logging
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import deque
+from typing import Callable, Iterable, Iterator, List, Any, Optional
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerPool:
+    """Lazily created, per-process pool for CPU-bound tasks"""
+
+    _process_pool: Optional[ProcessPoolExecutor] = None
+    _thread_pool: Optional[ThreadPoolExecutor] = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get_process_pool() -> Optional[ProcessPoolExecutor]:
+        """
+        Get the shared process pool
+
+        Returns:
+            ProcessPoolExecutor, or None when WORKER_PROCESSES is 0
+            (work then runs inline in the calling thread)
+        """
+        workers = getattr(settings, 'WORKER_PROCESSES', 0)
+        if not workers:
+            return None
+
+        if WorkerPool._process_pool is None:
+            with WorkerPool._lock:
+                if WorkerPool._process_pool is None:
+                    WorkerPool._process_pool = ProcessPoolExecutor(max_workers=workers)
+        return WorkerPool._process_pool
+
+    @staticmethod
+    def get_thread_pool() -> ThreadPoolExecutor:
+        """Get the shared pool of background threads (BACKGROUND_THREADS)"""
+        if WorkerPool._thread_pool is None:
+            with WorkerPool._lock:
+                if WorkerPool._thread_pool is None:
+                    WorkerPool._thread_pool = ThreadPoolExecutor(
+                        max_workers=getattr(settings, 'BACKGROUND_THREADS', 2),
+                        thread_name_prefix='background'
+                    )
+        return WorkerPool._thread_pool
+    
+    @staticmethod
+    def reset():
+        """Shut down the process pool (a new one is created on next use)"""
+        with WorkerPool._lock:
+            if WorkerPool._process_pool is not None:
+                WorkerPool._process_pool.shutdown(wait=False, cancel_futures=True)
+                WorkerPool._process_pool = None
+
+    @staticmethod
+    def map(func: Callable, items: Iterable[Any]) -> List[Any]:
+        """
+        Run func over items in the process pool, preserving order
+
+        Args:
+            func: Picklable module-level function
+            items: Picklable arguments, one per call
+
+        Returns:
+            List of results in the same order as items
+        """
+        items = list(items)
+        pool = WorkerPool.get_process_pool()
+        if pool is None or len(items) == 0:
+            return [func(item) for item in items]
+
+        try:
+            return list(pool.map(func, items))
+        except BrokenProcessPool:
+            logger.error("Process pool broken, running tasks inline")
+            WorkerPool.reset()
+            return [func(item) for item in items]
+
+    @staticmethod
+    def imap(func: Callable, items: Iterable[Any], window: Optional[int] = None) -> Iterator[Any]:
+        """
+        Lazily run func over items in the process pool, preserving order
+
+        At most `window` tasks are in flight, so results are produced as
+        they are consumed (e.g. while streaming a response) without piling
+        up in memory.
+
+        Args:
+            func: Picklable module-level function
+            items: Picklable arguments, consumed lazily
+            window: Maximum tasks in flight (default: twice the pool size)
+
+        Yields:
+            Results in the same order as items
+        """
+        pool = WorkerPool.get_process_pool()
+        if pool is None:
+            for item in items:
+                yield func(item)
+            return
+
+        window = window or 2 * getattr(settings, 'WORKER_PROCESSES', 1)
+        pending = deque()
+        try:
+            for item in items:
+                pending.append(pool.submit(func, item))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # Consumer gone (e.g. client disconnected): drop queued work
+            for future in pending:
+                future.cancel()
+
+    @staticmethod
+    def submit_background(func: Callable, *args: Any) -> Future:
+        """
+        Run func(*args) in a background thread, without blocking the caller
+
+        The thread closes its database connections when done. Exceptions
+        are logged.
+
+        Args:
+            func: Function to run
+            *args: Arguments
+
+        Returns:
+            Future of the task
+        """
+        def task():
+            try:
+                return func(*args)
+            except Exception:
+                logger.exception("Background task %s failed", func.__name__)
+            finally:
+                connections.close_all()
+
+        return WorkerPool.get_thread_pool().submit(task)
+
+    @staticmethod
+    def run_in_background(func: Callable, item: Any, callback: Callable[[Any], None]) -> Future:
+        """
+        Run func(item) in the process pool and pass the result to callback,
+        without blocking the caller (callback runs in a background thread)
+
+        Args:
+            func: Picklable module-level function
+            item: Picklable argument
+            callback: Called with func's result
+
+        Returns:
+            Future of the whole task
+        """
+        def task():
+            callback(WorkerPool.map(func, [item])[0])
+        task.__name__ = func.__name__
+
+        return WorkerPool.submit_background(task)
@@ -0,0 +1,33 @@
+"""
+Promo campaign scheduler: expire, archive and refresh the active codes at each boundary
+"""
+import time
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from promotions.services import PromoSchedulerService
+
+
+class Command(BaseCommand):
+    help = "Expire and archive promo codes, and refresh the active set at campaign boundaries"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Run a single pass (e.g. from cron)")
+        parser.add_argument('--max-sleep', type=int, default=300,
+                            help="Longest wait between passes, in seconds")
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        while True:
+            result = PromoSchedulerService.run(options['batch_size'])
+            self.stdout.write(
+                f"{result['expired']} expiré(s), {result['archived']} archivé(s), "
+                f"{result['active']} actif(s), prochaine échéance: {result['next_boundary'] or '-'}"
+            )
+            if options['once']:
+                return
+
+            sleep = options['max_sleep']
+            if result['next_boundary'] is not None:
+                until_boundary = (result['next_boundary'] - timezone.now()).total_seconds() + 1
+                sleep = max(1, min(sleep, until_boundary))
+            time.sleep(sleep)
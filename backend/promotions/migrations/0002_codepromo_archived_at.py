@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('promotions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='codepromo',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='codepromo',
+            index=models.Index(condition=models.Q(('archived_at__isnull', True)), fields=['valid_from', 'valid_until'], name='codes_promo_live_idx'),
+        ),
+    ]
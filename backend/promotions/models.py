@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import F, Q
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 
@@ -16,6 +17,7 @@ class CodePromo(models.Model):
     valid_from = models.DateTimeField()
     valid_until = models.DateTimeField()
     is_active = models.BooleanField(default=True)
+    archived_at = models.DateTimeField(null=True, blank=True)  # Expired codes moved out of the working set
     
     agence = models.ForeignKey('agencies.Agence', on_delete=models.CASCADE, related_name='codes_promo')
     created_by = models.ForeignKey('accounts.AdminAgence', on_delete=models.SET_NULL, null=True, related_name='codes_promo_crees')
@@ -27,6 +29,14 @@ class CodePromo(models.Model):
         db_table = 'codes_promo'
         verbose_name = 'Code Promo'
         verbose_name_plural = 'Codes Promo'
+        indexes = [
+            # Only live codes are scanned by the scheduler and the active set
+            models.Index(
+                fields=['valid_from', 'valid_until'],
+                condition=Q(archived_at__isnull=True),
+                name='codes_promo_live_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.code} ({self.discount_percentage}%)"
@@ -42,11 +52,42 @@ class CodePromo(models.Model):
             return False
         return True
     
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        from .services import PromoCodeService
+        PromoCodeService.invalidate()
+    
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        from .services import PromoCodeService
+        PromoCodeService.invalidate()
+        return result
+    
     def use(self):
-        """Increment usage count"""
-        if self.is_valid():
-            self.current_uses += 1
-            self.save()
-            return True
-        return False
-
+        """
+        Consume one use of the code
+        
+        A single conditional UPDATE increments current_uses only while the
+        code is still valid, so concurrent reservations can never exceed
+        max_uses.
+        
+        Returns:
+            True if the use was recorded, False if the code is no longer valid
+        """
+        now = timezone.now()
+        updated = CodePromo.objects.filter(
+            Q(max_uses__isnull=True) | Q(max_uses=0) | Q(current_uses__lt=F('max_uses')),
+            pk=self.pk,
+            is_active=True,
+            valid_from__lte=now,
+            valid_until__gte=now,
+        ).update(current_uses=F('current_uses') + 1)
+        if not updated:
+            return False
+        
+        self.refresh_from_db(fields=['current_uses'])
+        if self.max_uses and self.current_uses >= self.max_uses:
+            # The cached index may still list the code as usable
+            from .services import PromoCodeService
+            PromoCodeService.invalidate()
+        return True
@@ -11,9 +11,9 @@ class CodePromoSerializer(serializers.ModelSerializer):
     class Meta:
         model = CodePromo
         fields = ['id', 'code', 'discount_percentage', 'max_uses', 'current_uses',
-                'valid_from', 'valid_until', 'is_active', 'is_valid_field', 'agence',
+                'valid_from', 'valid_until', 'is_active', 'archived_at', 'is_valid_field', 'agence',
                 'agence_nom', 'created_by', 'created_by_email', 'created_at', 'updated_at']
-        read_only_fields = ['created_at', 'updated_at', 'current_uses', 'created_by']
+        read_only_fields = ['created_at', 'updated_at', 'current_uses', 'created_by', 'archived_at']
     
     def get_is_valid_field(self, obj):
         return obj.is_valid()
@@ -0,0 +1,225 @@
+"""
+Promo code services
+"""
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from django.conf import settings
+from django.db.models import Min, Q
+from django.utils import timezone
+from core.cache_service import CacheService
+from .models import CodePromo
+
+
+class PromoCodeService:
+    """Precomputed set of the codes usable right now, grouped by agency"""
+
+    CACHE_KEY = 'promotions:active_set'
+    CACHE_TIMEOUT = 300
+    # Per-process copy in front of the shared one (see CacheService.get_local)
+    LOCAL_NAMESPACE = 'promotions'
+
+    @staticmethod
+    def get_live_codes():
+        """Codes that are enabled and not expired yet (running or scheduled)"""
+        return CodePromo.objects.filter(
+            archived_at__isnull=True, is_active=True, valid_until__gte=timezone.now()
+        )
+
+    @staticmethod
+    def get_next_boundary(now: datetime) -> Optional[datetime]:
+        """
+        Next time a campaign starts or ends
+
+        Args:
+            now: Current time
+
+        Returns:
+            Datetime of the next boundary, or None if nothing is scheduled
+        """
+        boundaries = PromoCodeService.get_live_codes().aggregate(
+            next_start=Min('valid_from', filter=Q(valid_from__gt=now)),
+            next_end=Min('valid_until'),
+        )
+        return min((value for value in boundaries.values() if value is not None), default=None)
+
+    @staticmethod
+    def build_active_set() -> Dict[str, Any]:
+        """
+        Load the codes usable right now
+
+        Returns:
+            Dictionary with 'codes' (code -> CodePromo) and
+            'agences' (agence id -> list of codes)
+        """
+        now = timezone.now()
+        codes = PromoCodeService.get_live_codes().filter(valid_from__lte=now).only(
+            'id', 'code', 'discount_percentage', 'max_uses', 'current_uses',
+            'valid_from', 'valid_until', 'is_active', 'agence_id'
+        )
+        active_set = {'codes': {}, 'agences': {}}
+        for code_promo in codes:
+            if code_promo.max_uses and code_promo.current_uses >= code_promo.max_uses:
+                continue
+            active_set['codes'][code_promo.code] = code_promo
+            active_set['agences'].setdefault(code_promo.agence_id, []).append(code_promo.code)
+        return active_set
+
+    @staticmethod
+    def get_active_set() -> Dict[str, Any]:
+        """
+        Get the active set, rebuilding it when missing
+
+        The cached set expires at the next campaign boundary, so codes enter
+        and leave it on time. current_uses in the set may lag behind the
+        database: the limit is enforced by CodePromo.use(), which drops the
+        set when a code runs out. Each process also keeps a copy, dropped
+        within LOCAL_CACHE_VERSION_CHECK seconds of an invalidation.
+
+        Returns:
+            Dictionary with 'codes' and 'agences' (see build_active_set)
+            and 'expires_at' (epoch seconds)
+        """
+        active_set = CacheService.get_local(PromoCodeService.LOCAL_NAMESPACE, 'active_set')
+        if active_set is None:
+            active_set = CacheService.get(PromoCodeService.CACHE_KEY)
+            if active_set is None:
+                active_set = PromoCodeService.refresh()
+            # Kept in the process until the next boundary at most
+            CacheService.set_local(
+                PromoCodeService.LOCAL_NAMESPACE, 'active_set', active_set,
+                min(max(active_set.get('expires_at', 0) - time.time(), 0), settings.LOCAL_CACHE_TIMEOUT)
+            )
+        return active_set
+
+    @staticmethod
+    def refresh() -> Dict[str, Any]:
+        """Rebuild and cache the active set until the next boundary"""
+        now = timezone.now()
+        active_set = PromoCodeService.build_active_set()
+        timeout = PromoCodeService.CACHE_TIMEOUT
+        boundary = PromoCodeService.get_next_boundary(now)
+        if boundary is not None:
+            timeout = max(1, min(timeout, int((boundary - now).total_seconds()) + 1))
+        active_set['expires_at'] = time.time() + timeout
+        CacheService.set(PromoCodeService.CACHE_KEY, active_set, timeout)
+        return active_set
+
+    @staticmethod
+    def invalidate():
+        """Drop the active set (called whenever a code is saved, deleted or runs out)"""
+        CacheService.delete(PromoCodeService.CACHE_KEY)
+        CacheService.invalidate_local(PromoCodeService.LOCAL_NAMESPACE)
+
+    @staticmethod
+    def lookup(code: str) -> Optional[CodePromo]:
+        """
+        Find a code in the active set
+
+        Args:
+            code: Promo code
+
+        Returns:
+            CodePromo, or None if the code is unknown, not started, expired or used up
+        """
+        return PromoCodeService.get_active_set()['codes'].get(code)
+
+    @staticmethod
+    def get_valid(code: str) -> Optional[CodePromo]:
+        """
+        Find a code that can be used right now
+
+        Args:
+            code: Promo code
+
+        Returns:
+            CodePromo, or None if the code cannot be used
+        """
+        code_promo = PromoCodeService.lookup(code)
+        if code_promo is None or not code_promo.is_valid():
+            return None
+        return code_promo
+
+    @staticmethod
+    def get_agency_codes(agence_id: int) -> List[CodePromo]:
+        """
+        Codes of an agency usable right now
+
+        Args:
+            agence_id: Agency ID
+
+        Returns:
+            List of CodePromo
+        """
+        active_set = PromoCodeService.get_active_set()
+        codes = (active_set['codes'][code] for code in active_set['agences'].get(agence_id, []))
+        return [code_promo for code_promo in codes if code_promo.is_valid()]
+
+
+class PromoSchedulerService:
+    """Campaign scheduler: expires and archives codes at their boundaries"""
+
+    # Expired codes stay visible this long before being archived
+    ARCHIVE_AFTER = timedelta(days=30)
+    ARCHIVE_BATCH_SIZE = 500
+
+    @staticmethod
+    def expire(now: datetime) -> int:
+        """
+        Disable the codes whose campaign has ended
+
+        Args:
+            now: Current time
+
+        Returns:
+            Number of codes disabled
+        """
+        return CodePromo.objects.filter(
+            archived_at__isnull=True, is_active=True, valid_until__lt=now
+        ).update(is_active=False, updated_at=now)
+
+    @staticmethod
+    def archive(now: datetime, batch_size: int = None) -> int:
+        """
+        Archive codes that ended more than ARCHIVE_AFTER ago, in batches
+
+        Args:
+            now: Current time
+            batch_size: Codes updated per statement
+
+        Returns:
+            Number of codes archived
+        """
+        batch_size = batch_size or PromoSchedulerService.ARCHIVE_BATCH_SIZE
+        expired = CodePromo.objects.filter(
+            archived_at__isnull=True, valid_until__lt=now - PromoSchedulerService.ARCHIVE_AFTER
+        )
+        archived = 0
+        while True:
+            ids = list(expired.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return archived
+            archived += CodePromo.objects.filter(id__in=ids).update(archived_at=now, is_active=False)
+
+    @staticmethod
+    def run(batch_size: int = None) -> Dict[str, Any]:
+        """
+        Run one scheduler pass and rebuild the active set
+
+        Args:
+            batch_size: Codes archived per statement
+
+        Returns:
+            Dictionary with the number of codes expired, archived and active,
+            and the next boundary
+        """
+        now = timezone.now()
+        expired = PromoSchedulerService.expire(now)
+        archived = PromoSchedulerService.archive(now, batch_size)
+        active_set = PromoCodeService.refresh()
+        return {
+            'expired': expired,
+            'archived': archived,
+            'active': len(active_set['codes']),
+            'next_boundary': PromoCodeService.get_next_boundary(now),
+        }
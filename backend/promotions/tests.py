@@ -0,0 +1,59 @@
+import threading
+from datetime import timedelta
+from django.db import connection
+from django.test import TransactionTestCase
+from django.utils import timezone
+from agencies.models import Agence
+from .models import CodePromo
+
+
+class CodePromoUseConcurrencyTests(TransactionTestCase):
+    """CodePromo.use() under concurrent reservations"""
+
+    THREADS = 8
+    MAX_USES = 3
+
+    def setUp(self):
+        agence = Agence.objects.create(
+            nom_agence='Atlas Cars',
+            siege_agence='12 boulevard Mohammed V, Casablanca',
+            num_contact='0522000000',
+            email_agence='contact@atlascars.ma'
+        )
+        now = timezone.now()
+        self.code_promo = CodePromo.objects.create(
+            code='ETE10',
+            discount_percentage=10,
+            max_uses=self.MAX_USES,
+            valid_from=now - timedelta(days=1),
+            valid_until=now + timedelta(days=1),
+            agence=agence
+        )
+
+    def test_concurrent_uses_never_exceed_max_uses(self):
+        barrier = threading.Barrier(self.THREADS)
+        results = []
+        errors = []
+
+        def use():
+            # Each thread has its own connection, so its own transaction
+            try:
+                code_promo = CodePromo.objects.get(pk=self.code_promo.pk)
+                barrier.wait()
+                results.append(code_promo.use())
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=use) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(results.count(True), self.MAX_USES)
+        self.assertEqual(results.count(False), self.THREADS - self.MAX_USES)
+        self.code_promo.refresh_from_db()
+        self.assertEqual(self.code_promo.current_uses, self.MAX_USES)
@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from .models import CodePromo
 from .serializers import CodePromoSerializer
+from .services import PromoCodeService
 from core.permissions import IsAdminAgence, IsLocataire
 
 
@@ -18,9 +19,36 @@ class CodePromoViewSet(viewsets.ModelViewSet):
             return [IsAdminAgence()]
         return [IsAuthenticated()]
     
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # Archived campaigns are only listed on request
+        if self.request.query_params.get('archived', '').lower() != 'true':
+            queryset = queryset.filter(archived_at__isnull=True)
+        return queryset
+    
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user.admin_agence)
     
+    @action(detail=False, methods=['get'])
+    def active(self, request):
+        """Codes usable right now for an agency (from the precomputed active set)"""
+        try:
+            agence_id = int(request.query_params.get('agence', ''))
+        except ValueError:
+            return Response(
+                {"error": "Agence parameter is required."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response([
+            {
+                'code': code_promo.code,
+                'discount_percentage': code_promo.discount_percentage,
+                'valid_until': code_promo.valid_until,
+            }
+            for code_promo in PromoCodeService.get_agency_codes(agence_id)
+        ])
+    
     @action(detail=False, methods=['get'], permission_classes=[IsLocataire])
     def validate(self, request):
         """Validate a promo code"""
@@ -31,18 +59,18 @@ class CodePromoViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        try:
-            code_promo = CodePromo.objects.get(code=code)
-            is_valid = code_promo.is_valid()
-            return Response({
-                'valid': is_valid,
-                'code': code_promo.code,
-                'discount_percentage': code_promo.discount_percentage,
-                'message': 'Code is valid' if is_valid else 'Code is invalid or expired'
-            })
-        except CodePromo.DoesNotExist:
+        # Served from the cached index: this is called on every keystroke
+        code_promo = PromoCodeService.lookup(code)
+        if code_promo is None:
             return Response(
                 {"error": "Promo code not found."},
                 status=status.HTTP_404_NOT_FOUND
             )
-
+        
+        is_valid = code_promo.is_valid()
+        return Response({
+            'valid': is_valid,
+            'code': code_promo.code,
+            'discount_percentage': code_promo.discount_percentage,
+            'message': 'Code is valid' if is_valid else 'Code is invalid or expired'
+        })
@@ -41,11 +41,15 @@ INSTALLED_APPS = [
     'promotions',
     'notifications',
     'statistics',
+    'uploads',
     'core',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestIdMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.InstrumentationMiddleware',
+    'core.middleware.QueryInspectorMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -125,6 +129,55 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Worker processes for CPU-bound work (image processing). 0 = run inline.
+WORKER_PROCESSES = int(os.environ.get('WORKER_PROCESSES', '2'))
+
+# Threads running background tasks (e.g. contract PDF generation) after the response
+BACKGROUND_THREADS = int(os.environ.get('BACKGROUND_THREADS', '2'))
+
+# Multipart uploads larger than this are spooled to a temporary file instead of memory
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.environ.get('FILE_UPLOAD_MAX_MEMORY_SIZE', str(1024 * 1024)))
+
+# Chunked (resumable) uploads: chunks are appended to a part file on local disk,
+# then streamed into media storage once the upload is complete
+CHUNKED_UPLOAD_DIR = os.environ.get('CHUNKED_UPLOAD_DIR', os.path.join(BASE_DIR, 'uploads_tmp'))
+CHUNKED_UPLOAD_MAX_SIZE = int(os.environ.get('CHUNKED_UPLOAD_MAX_SIZE', str(100 * 1024 * 1024)))
+CHUNKED_UPLOAD_MAX_CHUNK_SIZE = int(os.environ.get('CHUNKED_UPLOAD_MAX_CHUNK_SIZE', str(8 * 1024 * 1024)))
+CHUNKED_UPLOAD_SESSION_TTL = timedelta(hours=24)
+
+# Per-endpoint request metrics, served in the Prometheus text format at /metrics/.
+# Request counts cover every request; timings, query counts, cache lookups and
+# response sizes are measured on a METRICS_SAMPLE_RATE fraction of requests.
+# Scrapers must send "Authorization: Bearer <METRICS_TOKEN>"; METRICS_TOKEN is
+# required in production: without it the endpoint answers 403 (open only with DEBUG).
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True') == 'True'
+METRICS_SAMPLE_RATE = float(os.environ.get('METRICS_SAMPLE_RATE', '1.0'))
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# SQL inspection (development/staging): logs statements repeated at least
+# QUERY_INSPECTOR_REPEAT_THRESHOLD times in a request (likely N+1) and
+# statements slower than QUERY_INSPECTOR_SLOW_MS, with the serializer field
+# or view running them. Requests over their query budget (by URL name) are
+# logged, or fail when QUERY_INSPECTOR_RAISE is set (e.g. in test runs).
+QUERY_INSPECTOR_ENABLED = os.environ.get('QUERY_INSPECTOR_ENABLED', str(DEBUG)) == 'True'
+QUERY_INSPECTOR_RAISE = os.environ.get('QUERY_INSPECTOR_RAISE', 'False') == 'True'
+QUERY_INSPECTOR_REPEAT_THRESHOLD = int(os.environ.get('QUERY_INSPECTOR_REPEAT_THRESHOLD', '5'))
+QUERY_INSPECTOR_SLOW_MS = float(os.environ.get('QUERY_INSPECTOR_SLOW_MS', '100'))
+QUERY_BUDGET_DEFAULT = None
+# Authentication and role lookups take up to ~7 queries per request; the data
+# itself must fit in the rest, whatever the page size (20 rows by default)
+QUERY_BUDGETS = {
+    'vehicule-list': 10,
+    'vehicule-detail': 10,
+    'depot-list': 10,
+    'reservation-list': 10,
+    'reservation-detail': 10,
+    'reclamation-list': 10,
+    'rapport-list': 10,
+    'etat-vehicule-list': 10,
+    'facture-list': 10,
+}
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -190,13 +243,44 @@ CORS_ALLOW_HEADERS = [
     'x-requested-with',
 ]
 
-# Logging
+# Logging: records are queued by the request threads and written by a
+# background thread, as JSON lines (LOG_FORMAT=text for development).
+# REQUEST_LOG_SAMPLE_RATE keeps a fraction of the per-request INFO lines;
+# warnings and errors are always kept.
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', '10000'))
+LOG_SAMPLE_RATES = {
+    'core.middleware': float(os.environ.get('REQUEST_LOG_SAMPLE_RATE', '1.0')),
+    'django.server': float(os.environ.get('REQUEST_LOG_SAMPLE_RATE', '1.0')),
+}
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        'json': {
+            '()': 'core.structured_logging.JSONFormatter',
+        },
+        'text': {
+            '()': 'core.structured_logging.TextFormatter',
+        },
+    },
+    'filters': {
+        'request_id': {
+            '()': 'core.structured_logging.RequestIdFilter',
+        },
+        'sampling': {
+            '()': 'core.structured_logging.SamplingFilter',
+            'rates': LOG_SAMPLE_RATES,
+        },
+    },
     'handlers': {
         'console': {
-            'class': 'logging.StreamHandler',
+            'class': 'core.structured_logging.QueueStreamHandler',
+            'stream': 'ext://sys.stdout',
+            'queue_size': LOG_QUEUE_SIZE,
+            'formatter': LOG_FORMAT,
+            'filters': ['request_id', 'sampling'],
         },
     },
     'root': {
@@ -209,6 +293,12 @@ LOGGING = {
             'level': os.getenv('DJANGO_LOG_LEVEL', 'INFO'),
             'propagate': False,
         },
+        # runserver's request lines: Django's default config gives them their own handler
+        'django.server': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
@@ -234,3 +324,10 @@ CACHES = {
         # }
     }
 }
+
+# Per-process cache in front of CACHES for hot reference data (agencies,
+# depots, active promo codes). Invalidations reach the other processes
+# within LOCAL_CACHE_VERSION_CHECK seconds.
+LOCAL_CACHE_MAX_ENTRIES = int(os.environ.get('LOCAL_CACHE_MAX_ENTRIES', '1000'))
+LOCAL_CACHE_TIMEOUT = int(os.environ.get('LOCAL_CACHE_TIMEOUT', '60'))
+LOCAL_CACHE_VERSION_CHECK = float(os.environ.get('LOCAL_CACHE_VERSION_CHECK', '2'))
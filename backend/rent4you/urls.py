@@ -6,6 +6,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from core.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -25,6 +26,10 @@ urlpatterns = [
     path('api/promotions/', include('promotions.urls')),
     path('api/notifications/', include('notifications.urls')),
     path('api/statistics/', include('statistics.urls')),
+    path('api/uploads/', include('uploads.urls')),
+
+    # Prometheus scrape endpoint
+    path('metrics/', metrics_view, name='metrics'),
 ]
 
 # Serve media files in development
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Reservation
+from .models import Reservation, Facture
 
 
 @admin.register(Reservation)
@@ -9,3 +9,13 @@ class ReservationAdmin(admin.ModelAdmin):
     search_fields = ('locataire__user__email', 'vehicule__matricule')
     date_hierarchy = 'created_at'
 
+
+@admin.register(Facture)
+class FactureAdmin(admin.ModelAdmin):
+    list_display = ('numero', 'agence_nom', 'locataire_email', 'total', 'issued_at')
+    list_filter = ('issued_at', 'agence')
+    search_fields = ('numero', 'locataire_email', 'vehicule_matricule')
+    date_hierarchy = 'issued_at'
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,16 @@
+"""
+Issue the invoices of confirmed/completed reservations that have none
+"""
+from django.core.management.base import BaseCommand
+from reservations.services import InvoiceService
+
+
+class Command(BaseCommand):
+    help = "Backfill invoices for confirmed and completed reservations"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        processed = InvoiceService.issue_missing(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Invoiced {processed} reservation(s)."))
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agencies', '0001_initial'),
+        ('reservations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Facture',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numero', models.CharField(max_length=30, unique=True)),
+                ('agence_nom', models.CharField(max_length=255)),
+                ('agence_email', models.EmailField(max_length=254)),
+                ('locataire_nom', models.CharField(max_length=255)),
+                ('locataire_email', models.EmailField(max_length=254)),
+                ('vehicule_matricule', models.CharField(max_length=50)),
+                ('vehicule_marque', models.CharField(max_length=255)),
+                ('vehicule_model', models.CharField(max_length=255)),
+                ('date_debut', models.DateField()),
+                ('date_fin', models.DateField()),
+                ('code_promo', models.CharField(blank=True, max_length=50, null=True)),
+                ('rental_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('promo_discount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('agency_fee_rate', models.DecimalField(decimal_places=4, max_digits=5)),
+                ('agency_fee', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('subtotal', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('total', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('reservation_created_at', models.DateTimeField()),
+                ('issued_at', models.DateTimeField(auto_now_add=True)),
+                ('agence', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='factures', to='agencies.agence')),
+                ('reservation', models.OneToOneField(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='facture', to='reservations.reservation')),
+            ],
+            options={
+                'verbose_name': 'Facture',
+                'verbose_name_plural': 'Factures',
+                'db_table': 'factures',
+                'ordering': ['-issued_at'],
+                'indexes': [models.Index(fields=['agence', 'issued_at'], name='factures_agence__f3adb1_idx')],
+            },
+        ),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from decimal import Decimal, ROUND_HALF_UP
+from django.db import models, transaction
 from django.core.validators import MinValueValidator
 
 
@@ -39,8 +40,63 @@ class Reservation(models.Model):
     def save(self, *args, **kwargs):
         if not self.prix_original:
             self.prix_original = self.prix
-        if self.code_promo and self.code_promo.is_valid():
-            self.reduction = (self.prix_original * self.code_promo.discount_percentage) / 100
+        # The discount is applied once, at creation: the code is validated and
+        # consumed by the caller (CodePromo.use()), and later saves must not
+        # load the code or reprice the reservation
+        if self._state.adding and self.code_promo_id:
+            # Rounded half up to the cent, as in the quotes (PricingService.quote_cents)
+            self.reduction = (self.prix_original * self.code_promo.discount_percentage / 100).quantize(
+                Decimal('0.01'), rounding=ROUND_HALF_UP
+            )
             self.prix = self.prix_original - self.reduction
         super().save(*args, **kwargs)
+        # Rentals in progress are part of the fleet status snapshot
+        from vehicles.services import FleetStatusService
+        transaction.on_commit(FleetStatusService.schedule_refresh)
 
+
+class Facture(models.Model):
+    """Facture model - Invoice, an immutable snapshot of a reservation's pricing"""
+    numero = models.CharField(max_length=30, unique=True)
+    reservation = models.OneToOneField(Reservation, on_delete=models.SET_NULL, null=True, related_name='facture')
+    agence = models.ForeignKey('agencies.Agence', on_delete=models.SET_NULL, null=True, related_name='factures')
+    
+    # Parties and vehicle, as they were when the invoice was issued
+    agence_nom = models.CharField(max_length=255)
+    agence_email = models.EmailField()
+    locataire_nom = models.CharField(max_length=255)
+    locataire_email = models.EmailField()
+    vehicule_matricule = models.CharField(max_length=50)
+    vehicule_marque = models.CharField(max_length=255)
+    vehicule_model = models.CharField(max_length=255)
+    date_debut = models.DateField()
+    date_fin = models.DateField()
+    code_promo = models.CharField(max_length=50, null=True, blank=True)
+    
+    # Amounts (MAD)
+    rental_price = models.DecimalField(max_digits=10, decimal_places=2)
+    promo_discount = models.DecimalField(max_digits=10, decimal_places=2)
+    agency_fee_rate = models.DecimalField(max_digits=5, decimal_places=4)
+    agency_fee = models.DecimalField(max_digits=10, decimal_places=2)
+    subtotal = models.DecimalField(max_digits=10, decimal_places=2)
+    total = models.DecimalField(max_digits=10, decimal_places=2)
+    
+    reservation_created_at = models.DateTimeField()
+    issued_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'factures'
+        verbose_name = 'Facture'
+        verbose_name_plural = 'Factures'
+        ordering = ['-issued_at']
+        indexes = [
+            models.Index(fields=['agence', 'issued_at']),
+        ]
+    
+    def __str__(self):
+        return f"Facture {self.numero}"
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Une facture émise ne peut pas être modifiée.")
+        super().save(*args, **kwargs)
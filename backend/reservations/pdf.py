@@ -0,0 +1,176 @@
+"""
+Invoice PDF rendering (runs inside worker processes)
+
+Like contract PDFs, the static layer (styles, frames, labels) is computed
+once per worker and each invoice only draws its own values.
+"""
+import io
+import threading
+from typing import Any, Dict, Iterable, List, Tuple
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfgen.canvas import Canvas
+
+
+PAGE_WIDTH, PAGE_HEIGHT = A4
+MARGIN = 50
+CONTENT_WIDTH = PAGE_WIDTH - 2 * MARGIN
+
+BRAND_COLOR = colors.HexColor('#ff7800')
+TITLE_COLOR = colors.HexColor('#130f40')
+
+# (field key, label) of the amount lines
+AMOUNT_LINES = [
+    ('rental_price', 'Prix de location'),
+    ('promo_discount', 'Réduction'),
+    ('subtotal', 'Sous-total'),
+    ('agency_fee', "Frais d'agence"),
+]
+
+PARTY_TOP = PAGE_HEIGHT - 130
+RENTAL_TOP = PAGE_HEIGHT - 250
+AMOUNTS_TOP = PAGE_HEIGHT - 360
+LINE_HEIGHT = 18
+
+
+class InvoiceTemplate:
+    """Static layer of the invoice, computed once per worker"""
+
+    def __init__(self):
+        self.parties = [("Agence", MARGIN), ("Facturé à", MARGIN + CONTENT_WIDTH / 2)]
+        self.rental_labels = [
+            ('vehicule', 'Véhicule', MARGIN),
+            ('vehicule_matricule', 'Matricule', MARGIN + CONTENT_WIDTH / 2),
+            ('periode', 'Période', MARGIN),
+            ('code_promo', 'Code promo', MARGIN + CONTENT_WIDTH / 2),
+        ]
+        self.amount_rows = [
+            (key, label, AMOUNTS_TOP - 25 - index * LINE_HEIGHT)
+            for index, (key, label) in enumerate(AMOUNT_LINES)
+        ]
+        self.total_y = AMOUNTS_TOP - 25 - len(AMOUNT_LINES) * LINE_HEIGHT - 10
+
+    def draw_static(self, canvas: Canvas) -> None:
+        """Draw everything that does not depend on the invoice"""
+        canvas.setFillColor(BRAND_COLOR)
+        canvas.rect(0, PAGE_HEIGHT - 70, PAGE_WIDTH, 70, stroke=0, fill=1)
+        canvas.setFillColor(colors.white)
+        canvas.setFont('Helvetica-Bold', 22)
+        canvas.drawString(MARGIN, PAGE_HEIGHT - 45, "FACTURE")
+
+        canvas.setFillColor(TITLE_COLOR)
+        canvas.setFont('Helvetica-Bold', 11)
+        for title, x in self.parties:
+            canvas.drawString(x, PARTY_TOP, title)
+        canvas.drawString(MARGIN, RENTAL_TOP, "Location")
+        canvas.drawString(MARGIN, AMOUNTS_TOP, "Montants (MAD)")
+
+        canvas.setStrokeColor(colors.lightgrey)
+        for y in (PARTY_TOP, RENTAL_TOP, AMOUNTS_TOP):
+            canvas.line(MARGIN, y - 5, PAGE_WIDTH - MARGIN, y - 5)
+
+        canvas.setFillColor(colors.grey)
+        canvas.setFont('Helvetica', 8)
+        for index, (_, label, x) in enumerate(self.rental_labels):
+            canvas.drawString(x, RENTAL_TOP - 25 - (index // 2) * LINE_HEIGHT, label)
+
+        canvas.setFillColor(colors.black)
+        canvas.setFont('Helvetica', 10)
+        for _, label, y in self.amount_rows:
+            canvas.drawString(MARGIN, y, label)
+        canvas.line(MARGIN, self.total_y + 14, PAGE_WIDTH - MARGIN, self.total_y + 14)
+        canvas.setFont('Helvetica-Bold', 12)
+        canvas.drawString(MARGIN, self.total_y, "Total TTC")
+
+        canvas.setFillColor(colors.grey)
+        canvas.setFont('Helvetica', 7)
+        canvas.drawCentredString(PAGE_WIDTH / 2, 40, "Rent4You - Document généré automatiquement")
+
+    def draw_fields(self, canvas: Canvas, data: Dict[str, Any]) -> None:
+        """Draw the invoice-specific values"""
+        canvas.setFillColor(colors.white)
+        canvas.setFont('Helvetica', 10)
+        canvas.drawRightString(PAGE_WIDTH - MARGIN, PAGE_HEIGHT - 30, f"N° {data['numero']}")
+        canvas.drawRightString(PAGE_WIDTH - MARGIN, PAGE_HEIGHT - 45, f"Émise le {data['issued_at']:%d/%m/%Y}")
+
+        canvas.setFillColor(colors.black)
+        canvas.setFont('Helvetica', 9)
+        parties = [
+            [data['agence_nom'], data['agence_email']],
+            [data['locataire_nom'], data['locataire_email']],
+        ]
+        for (_, x), lines in zip(self.parties, parties):
+            for index, line in enumerate(lines):
+                text = simpleSplit(line or '-', 'Helvetica', 9, CONTENT_WIDTH / 2 - 10)[:1]
+                canvas.drawString(x, PARTY_TOP - 25 - index * 14, text[0] if text else '-')
+
+        values = {
+            'vehicule': f"{data['vehicule_marque']} {data['vehicule_model']}",
+            'vehicule_matricule': data['vehicule_matricule'],
+            'periode': f"{data['date_debut']:%d/%m/%Y} - {data['date_fin']:%d/%m/%Y}",
+            'code_promo': data['code_promo'] or '-',
+        }
+        for index, (key, _, x) in enumerate(self.rental_labels):
+            canvas.drawString(x + 70, RENTAL_TOP - 25 - (index // 2) * LINE_HEIGHT, values[key])
+
+        canvas.setFont('Helvetica', 10)
+        right = PAGE_WIDTH - MARGIN
+        for key, _, y in self.amount_rows:
+            sign = '- ' if key == 'promo_discount' and data[key] else ''
+            canvas.drawRightString(right, y, f"{sign}{data[key]}")
+        canvas.setFont('Helvetica-Bold', 12)
+        canvas.drawRightString(right, self.total_y, f"{data['total']} MAD")
+
+
+_local = threading.local()
+
+
+def get_template() -> InvoiceTemplate:
+    """Template of the current thread"""
+    template = getattr(_local, 'template', None)
+    if template is None:
+        template = _local.template = InvoiceTemplate()
+    return template
+
+
+def _draw_pages(canvas: Canvas, invoices: Iterable[Dict[str, Any]]) -> None:
+    template = get_template()
+    for data in invoices:
+        template.draw_static(canvas)
+        template.draw_fields(canvas, data)
+        canvas.showPage()
+
+
+def render_invoices_pdf(invoices: List[Dict[str, Any]]) -> bytes:
+    """
+    Render invoices into one PDF, one page per invoice
+
+    Args:
+        invoices: Invoice fields (Facture values)
+
+    Returns:
+        PDF bytes
+    """
+    buffer = io.BytesIO()
+    canvas = Canvas(buffer, pagesize=A4, invariant=1, pageCompression=1)
+    canvas.setTitle(f"Facture {invoices[0]['numero']}" if len(invoices) == 1 else "Factures")
+    canvas.setAuthor("Rent4You")
+    _draw_pages(canvas, invoices)
+    canvas.save()
+    return buffer.getvalue()
+
+
+def render_invoice_files(invoices: List[Dict[str, Any]]) -> List[Tuple[str, bytes]]:
+    """
+    Render each invoice into its own PDF
+
+    Module-level so batches can be pickled into a ProcessPoolExecutor.
+
+    Args:
+        invoices: Invoice fields (Facture values)
+
+    Returns:
+        List of (filename, PDF bytes)
+    """
+    return [(f"{data['numero']}.pdf", render_invoices_pdf([data])) for data in invoices]
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Reservation
+from .models import Reservation, Facture
 from accounts.serializers import UserSerializer
 from vehicles.serializers import VehiculeSerializer
 
@@ -18,8 +18,42 @@ class ReservationSerializer(serializers.ModelSerializer):
                 'status', 'status_display', 'locataire', 'locataire_email', 'locataire_name',
                 'vehicule', 'vehicule_details', 'code_promo', 'code_promo_code',
                 'created_at', 'updated_at']
-        read_only_fields = ['created_at', 'updated_at']
+        # The renter is the requesting user, the original price is set from prix
+        read_only_fields = ['locataire', 'prix_original', 'created_at', 'updated_at']
     
     def get_locataire_name(self, obj):
         return f"{obj.locataire.user.first_name} {obj.locataire.user.last_name}"
+    
+    def validate_code_promo(self, value):
+        if value is None:
+            return value
+        if self.instance is not None and self.instance.code_promo_id != value.id:
+            raise serializers.ValidationError("Le code promo ne peut pas être modifié après la réservation.")
+        if self.instance is None and not value.is_valid():
+            raise serializers.ValidationError("Code promo invalide ou expiré.")
+        return value
+    
+    def validate(self, attrs):
+        # Same rule as the quotes (PricingService.quote_cents): a code only
+        # discounts the vehicles of its agency
+        code_promo = attrs.get('code_promo')
+        vehicule = attrs.get('vehicule') or getattr(self.instance, 'vehicule', None)
+        if self.instance is None and code_promo is not None and vehicule is not None:
+            if code_promo.agence_id != vehicule.agence_id:
+                raise serializers.ValidationError(
+                    {'code_promo': ["Ce code promo n'est pas valable pour les véhicules de cette agence."]}
+                )
+        return attrs
+
 
+class FactureSerializer(serializers.ModelSerializer):
+    """Facture serializer (read-only)"""
+    
+    class Meta:
+        model = Facture
+        fields = ['id', 'numero', 'reservation', 'agence', 'agence_nom', 'agence_email',
+                'locataire_nom', 'locataire_email', 'vehicule_matricule', 'vehicule_marque',
+                'vehicule_model', 'date_debut', 'date_fin', 'code_promo', 'rental_price',
+                'promo_discount', 'agency_fee_rate', 'agency_fee', 'subtotal', 'total',
+                'reservation_created_at', 'issued_at']
+        read_only_fields = fields
@@ -0,0 +1,238 @@
+"""
+Business logic services for reservations app
+"""
+import logging
+from decimal import Decimal, ROUND_HALF_UP
+from itertools import islice
+from typing import Any, Dict, Iterator, Optional, Tuple
+from django.db import IntegrityError, transaction
+from core.constants import InvoiceSettings
+from core.workers import WorkerPool
+from .models import Facture, Reservation
+from .pdf import render_invoice_files, render_invoices_pdf
+
+logger = logging.getLogger(__name__)
+
+CENT = Decimal('0.01')
+
+
+class InvoiceService:
+    """Service for reservation invoices"""
+    
+    @staticmethod
+    def compute(reservation: Reservation) -> Dict[str, Decimal]:
+        """
+        Compute invoice amounts with exact decimal arithmetic
+        
+        Args:
+            reservation: Reservation instance
+            
+        Returns:
+            Dictionary of amounts, rounded to the cent
+        """
+        rental_price = reservation.prix_original or reservation.prix
+        promo_discount = reservation.reduction or Decimal('0')
+        rate = InvoiceSettings.AGENCY_FEE_RATE
+        agency_fee = (rental_price * rate).quantize(CENT, rounding=ROUND_HALF_UP)
+        subtotal = (rental_price - promo_discount).quantize(CENT, rounding=ROUND_HALF_UP)
+        
+        return {
+            'rental_price': rental_price.quantize(CENT, rounding=ROUND_HALF_UP),
+            'promo_discount': promo_discount.quantize(CENT, rounding=ROUND_HALF_UP),
+            'agency_fee_rate': rate,
+            'agency_fee': agency_fee,
+            'subtotal': subtotal,
+            'total': subtotal + agency_fee,
+        }
+    
+    @staticmethod
+    def build(reservation: Reservation) -> Facture:
+        """
+        Build (without saving) the invoice of a reservation
+        
+        Args:
+            reservation: Reservation with vehicule__agence, locataire__user
+                and code_promo loaded
+            
+        Returns:
+            Unsaved Facture
+        """
+        vehicule = reservation.vehicule
+        agence = vehicule.agence
+        user = reservation.locataire.user
+        
+        return Facture(
+            numero=f"FAC-{reservation.created_at:%Y}-{reservation.id:06d}",
+            reservation=reservation,
+            agence=agence,
+            agence_nom=agence.nom_agence,
+            agence_email=agence.email_agence,
+            locataire_nom=f"{user.first_name} {user.last_name}",
+            locataire_email=user.email,
+            vehicule_matricule=vehicule.matricule,
+            vehicule_marque=vehicule.marque,
+            vehicule_model=vehicule.model,
+            date_debut=reservation.date_debut,
+            date_fin=reservation.date_fin,
+            code_promo=reservation.code_promo.code if reservation.code_promo else None,
+            reservation_created_at=reservation.created_at,
+            **InvoiceService.compute(reservation)
+        )
+    
+    @staticmethod
+    def get_reservations():
+        """Reservations with everything an invoice needs, in a single query"""
+        return Reservation.objects.select_related('vehicule__agence', 'locataire__user', 'code_promo')
+    
+    @staticmethod
+    def issue(reservation: Reservation) -> Optional[Facture]:
+        """
+        Issue the invoice of a reservation, once
+        
+        Does nothing unless the reservation is confirmed or completed.
+        Issuing again returns the existing invoice unchanged.
+        
+        Args:
+            reservation: Reservation instance
+            
+        Returns:
+            Facture, or None if the reservation is not invoiced yet
+        """
+        if reservation.status not in InvoiceSettings.INVOICED_STATUSES:
+            return None
+        
+        existing = Facture.objects.filter(reservation_id=reservation.pk).first()
+        if existing:
+            return existing
+        
+        facture = InvoiceService.build(InvoiceService.get_reservations().get(pk=reservation.pk))
+        try:
+            with transaction.atomic():
+                facture.save()
+        except IntegrityError:
+            # Issued concurrently
+            return Facture.objects.get(reservation_id=reservation.pk)
+        
+        logger.info("Invoice issued: %s", facture.numero)
+        return facture
+    
+    @staticmethod
+    def issue_missing(batch_size: int = 500) -> int:
+        """
+        Issue the invoices of confirmed/completed reservations that have none
+        
+        Args:
+            batch_size: Reservations per query and per insert
+            
+        Returns:
+            Number of reservations processed
+        """
+        issued = 0
+        last_id = 0
+        while True:
+            batch = list(
+                InvoiceService.get_reservations()
+                .filter(status__in=InvoiceSettings.INVOICED_STATUSES, facture__isnull=True, id__gt=last_id)
+                .order_by('id')[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+            created = Facture.objects.bulk_create(
+                [InvoiceService.build(reservation) for reservation in batch],
+                ignore_conflicts=True
+            )
+            issued += len(created)
+        return issued
+    
+    @staticmethod
+    def to_invoice_data(facture: Facture) -> Dict[str, Any]:
+        """
+        Invoice representation returned by the reservation invoice endpoint
+        
+        Args:
+            facture: Facture instance
+            
+        Returns:
+            Invoice dictionary
+        """
+        return {
+            'numero': facture.numero,
+            'reservation_id': facture.reservation_id,
+            'vehicle': {
+                'matricule': facture.vehicule_matricule,
+                'marque': facture.vehicule_marque,
+                'model': facture.vehicule_model,
+            },
+            'agency': {
+                'nom': facture.agence_nom,
+                'email': facture.agence_email,
+            },
+            'renter': {
+                'name': facture.locataire_nom,
+                'email': facture.locataire_email,
+            },
+            'dates': {
+                'start': facture.date_debut.isoformat(),
+                'end': facture.date_fin.isoformat(),
+            },
+            'pricing': {
+                'rental_price': facture.rental_price,
+                'agency_fee': facture.agency_fee,
+                'promo_discount': facture.promo_discount,
+                'subtotal': facture.subtotal,
+                'total': facture.total,
+            },
+            'promo_code': facture.code_promo,
+            'created_at': facture.reservation_created_at.isoformat(),
+            'issued_at': facture.issued_at.isoformat() if facture.issued_at else None,
+        }
+
+
+class InvoicePDFService:
+    """Service for rendering invoice PDFs"""
+    
+    # Invoices rendered per worker task
+    BATCH_SIZE = 100
+    
+    # Above this, invoices are only available as a ZIP of PDFs
+    MAX_PDF_PAGES = 500
+    
+    FIELDS = [
+        'numero', 'issued_at', 'agence_nom', 'agence_email', 'locataire_nom', 'locataire_email',
+        'vehicule_marque', 'vehicule_model', 'vehicule_matricule', 'date_debut', 'date_fin',
+        'code_promo', 'rental_price', 'promo_discount', 'subtotal', 'agency_fee', 'total',
+    ]
+    
+    @staticmethod
+    def render_pdf(factures) -> bytes:
+        """
+        Render invoices into a single PDF, one page per invoice
+        
+        Args:
+            factures: QuerySet of invoices (at most MAX_PDF_PAGES)
+            
+        Returns:
+            PDF bytes
+        """
+        invoices = list(factures.values(*InvoicePDFService.FIELDS))
+        return WorkerPool.map(render_invoices_pdf, [invoices])[0]
+    
+    @staticmethod
+    def iter_files(factures) -> Iterator[Tuple[str, bytes]]:
+        """
+        Render invoices into one PDF each, in parallel across the worker pool
+        
+        Rows are read with a streaming cursor and rendered in batches;
+        files come out in order, as they are consumed.
+        
+        Args:
+            factures: QuerySet of invoices
+            
+        Yields:
+            (filename, PDF bytes)
+        """
+        rows = factures.values(*InvoicePDFService.FIELDS).iterator(chunk_size=2000)
+        batches = iter(lambda: list(islice(rows, InvoicePDFService.BATCH_SIZE)), [])
+        for files in WorkerPool.imap(render_invoice_files, batches):
+            yield from files
@@ -1,9 +1,10 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ReservationViewSet
+from .views import ReservationViewSet, FactureViewSet
 
 router = DefaultRouter()
 router.register(r'reservations', ReservationViewSet, basename='reservation')
+router.register(r'factures', FactureViewSet, basename='facture')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,19 +1,32 @@
+import logging
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import timezone
-from .models import Reservation
-from .serializers import ReservationSerializer
-from core.permissions import IsLocataire, IsSecretaireAgence, IsAgencyStaff
+from django.utils.dateparse import parse_date
+from .models import Reservation, Facture
+from .serializers import ReservationSerializer, FactureSerializer
+from .services import InvoiceService, InvoicePDFService
+from core.permissions import IsLocataire, IsSecretaireAgence, IsAgencyStaff, IsAdministrateur
+from core.exceptions import BusinessLogicError
+from core.export_service import ExportService
+from core.utils import get_user_agency
 from core.response import APIResponse
 from core.email_service import EmailService
 from core.notifications import NotificationService
 
+logger = logging.getLogger(__name__)
+
 
 class ReservationViewSet(viewsets.ModelViewSet):
     """Reservation ViewSet"""
-    queryset = Reservation.objects.all()
+    queryset = Reservation.objects.select_related(
+        'locataire__user', 'vehicule__agence', 'vehicule__depot', 'code_promo'
+    )
     serializer_class = ReservationSerializer
     permission_classes = [IsAuthenticated]
     
@@ -52,7 +65,12 @@ class ReservationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        reservation = serializer.save(locataire=self.request.user.locataire)
+        with transaction.atomic():
+            # Consume the promo code in the same transaction as the reservation
+            code_promo = serializer.validated_data.get('code_promo')
+            if code_promo is not None and not code_promo.use():
+                raise ValidationError({'code_promo': ["Code promo invalide ou expiré."]})
+            reservation = serializer.save(locataire=self.request.user.locataire)
         
         # Create in-app notification for pending reservation
         try:
@@ -66,9 +84,11 @@ class ReservationViewSet(viewsets.ModelViewSet):
             )
         except Exception as e:
             # Log error but don't fail the request
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Failed to create notification: {str(e)}")
+            logger.error("Failed to create notification: %s", e)
+    
+    def perform_update(self, serializer):
+        reservation = serializer.save()
+        InvoiceService.issue(reservation)
     
     @action(detail=True, methods=['post'], permission_classes=[IsSecretaireAgence])
     def confirm(self, request, pk=None):
@@ -82,6 +102,7 @@ class ReservationViewSet(viewsets.ModelViewSet):
         
         reservation.status = 'CONFIRMED'
         reservation.save()
+        InvoiceService.issue(reservation)
         
         # Send email notification
         try:
@@ -90,17 +111,13 @@ class ReservationViewSet(viewsets.ModelViewSet):
                 reservation.locataire.user.email
             )
         except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Failed to send email: {str(e)}")
+            logger.error("Failed to send email: %s", e)
         
         # Create in-app notification
         try:
             NotificationService.notify_reservation_confirmed(reservation)
         except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Failed to create notification: {str(e)}")
+            logger.error("Failed to create notification: %s", e)
         
         return APIResponse.success(
             data=ReservationSerializer(reservation).data,
@@ -127,17 +144,13 @@ class ReservationViewSet(viewsets.ModelViewSet):
                 reservation.locataire.user.email
             )
         except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Failed to send email: {str(e)}")
+            logger.error("Failed to send email: %s", e)
         
         # Create in-app notification
         try:
             NotificationService.notify_reservation_cancelled(reservation)
         except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Failed to create notification: {str(e)}")
+            logger.error("Failed to create notification: %s", e)
         
         return APIResponse.success(
             data=ReservationSerializer(reservation).data,
@@ -149,49 +162,111 @@ class ReservationViewSet(viewsets.ModelViewSet):
         """Get invoice for a reservation"""
         reservation = self.get_object()
         
-        # Calculate invoice details
-        # The prix field already includes the final price after promo discount
-        rental_price = float(reservation.prix_original) if reservation.prix_original else float(reservation.prix)
-        promo_discount = float(reservation.reduction) if reservation.reduction else 0.0
-        # Agency fee is typically a percentage (e.g., 10%) of rental price
-        # For now, we'll use 0 or calculate based on a standard rate
-        agency_fee_percentage = 0.10  # 10% agency fee
-        agency_fee = rental_price * agency_fee_percentage
-        subtotal = rental_price - promo_discount
-        total = subtotal + agency_fee
-        
-        invoice_data = {
-            'reservation_id': reservation.id,
-            'vehicle': {
-                'matricule': reservation.vehicule.matricule,
-                'marque': reservation.vehicule.marque,
-                'model': reservation.vehicule.model,
-            },
-            'agency': {
-                'nom': reservation.vehicule.agence.nom_agence,
-                'email': reservation.vehicule.agence.email_agence,
-            },
-            'renter': {
-                'name': f"{reservation.locataire.user.first_name} {reservation.locataire.user.last_name}",
-                'email': reservation.locataire.user.email,
-            },
-            'dates': {
-                'start': reservation.date_debut.isoformat(),
-                'end': reservation.date_fin.isoformat(),
-            },
-            'pricing': {
-                'rental_price': rental_price,
-                'agency_fee': round(agency_fee, 2),
-                'promo_discount': promo_discount,
-                'subtotal': round(subtotal, 2),
-                'total': round(total, 2),
-            },
-            'promo_code': reservation.code_promo.code if reservation.code_promo else None,
-            'created_at': reservation.created_at.isoformat(),
-        }
+        # Issued once the reservation is confirmed; before that, a preview
+        facture = Facture.objects.filter(reservation=reservation).first() or InvoiceService.issue(reservation)
+        if facture is None:
+            facture = InvoiceService.build(InvoiceService.get_reservations().get(pk=reservation.pk))
         
         return APIResponse.success(
-            data=invoice_data,
+            data=InvoiceService.to_invoice_data(facture),
             message="Invoice retrieved successfully."
         )
 
+
+class FactureViewSet(viewsets.ReadOnlyModelViewSet):
+    """Facture ViewSet (accounting)"""
+    queryset = Facture.objects.all()
+    serializer_class = FactureSerializer
+    permission_classes = [IsAgencyStaff | IsAdministrateur]
+    search_fields = ['numero', 'locataire_email', 'vehicule_matricule']
+    ordering_fields = ['issued_at', 'total']
+    
+    def handle_exception(self, exc):
+        # Invalid period (see get_period) answers like the other 400s of this API
+        if isinstance(exc, BusinessLogicError):
+            return APIResponse.error(message=str(exc.detail), status_code=exc.status_code)
+        return super().handle_exception(exc)
+    
+    def get_period(self):
+        """
+        The date_from/date_to query params
+        
+        Returns:
+            List of [date_from, date_to], None where not given
+            
+        Raises:
+            BusinessLogicError: If one is not a real date (e.g. 2024-02-30)
+        """
+        period = []
+        for param in ('date_from', 'date_to'):
+            value = self.request.query_params.get(param)
+            try:
+                parsed = parse_date(value or '')
+            except ValueError:
+                # Well formed but not a real day
+                parsed = None
+            if value and parsed is None:
+                raise BusinessLogicError(f"{param} invalide (format attendu: AAAA-MM-JJ).")
+            period.append(parsed)
+        return period
+    
+    def get_queryset(self):
+        # Invoices are snapshots: listing them needs no join
+        queryset = super().get_queryset()
+        
+        if not hasattr(self.request.user, 'administrateur'):
+            queryset = queryset.filter(agence=get_user_agency(self.request.user))
+        
+        date_from, date_to = self.get_period()
+        if date_from:
+            queryset = queryset.filter(issued_at__date__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(issued_at__date__lte=date_to)
+        
+        return queryset
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Export invoices to Excel"""
+        factures = self.filter_queryset(self.get_queryset())
+        return ExportService.export_invoices_to_excel(factures)
+    
+    @action(detail=True, methods=['get'])
+    def pdf(self, request, pk=None):
+        """Download one invoice as PDF"""
+        facture = self.get_object()
+        response = HttpResponse(
+            InvoicePDFService.render_pdf(Facture.objects.filter(pk=facture.pk)),
+            content_type='application/pdf'
+        )
+        response['Content-Disposition'] = f'attachment; filename="{facture.numero}.pdf"'
+        return response
+    
+    @action(detail=False, methods=['get'])
+    def batch_pdf(self, request):
+        """
+        Download the filtered invoices (e.g. a month, with date_from/date_to)
+        
+        output=zip (default): ZIP of one PDF per invoice, streamed as it is rendered
+        output=pdf: a single multi-page PDF, up to MAX_PDF_PAGES invoices
+        """
+        factures = self.filter_queryset(self.get_queryset()).order_by('issued_at', 'id')
+        period = '_'.join(d.isoformat() for d in self.get_period() if d) or timezone.localdate().isoformat()
+        
+        if request.query_params.get('output') == 'pdf':
+            if factures.count() > InvoicePDFService.MAX_PDF_PAGES:
+                return APIResponse.error(
+                    message=f"Trop de factures pour un seul PDF (maximum {InvoicePDFService.MAX_PDF_PAGES}). "
+                            "Utilisez output=zip.",
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+            response = HttpResponse(InvoicePDFService.render_pdf(factures), content_type='application/pdf')
+            response['Content-Disposition'] = f'attachment; filename="factures_{period}.pdf"'
+            return response
+        
+        response = StreamingHttpResponse(
+            ExportService.stream_zip(InvoicePDFService.iter_files(factures)),
+            content_type='application/zip'
+        )
+        response['Content-Disposition'] = f'attachment; filename="factures_{period}.zip"'
+        return response
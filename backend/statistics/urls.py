@@ -2,10 +2,11 @@
 URLs for statistics app
 """
 from django.urls import path
-from .views import StatisticsView, ExportStatisticsView
+from .views import StatisticsView, ExportStatisticsView, FleetStatusView
 
 urlpatterns = [
     path('', StatisticsView.as_view(), name='statistics'),
+    path('fleet/', FleetStatusView.as_view(), name='fleet-status'),
     path('export/', ExportStatisticsView.as_view(), name='export-statistics'),
 ]
 
@@ -44,6 +44,33 @@ class StatisticsView(APIView):
         return APIResponse.success(data=stats)
 
 
+class FleetStatusView(APIView):
+    """View for the fleet status of an agency (state, category, depot, rentals)"""
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        """Get the fleet status of the user's agency (administrators pass ?agence=)"""
+        from core.utils import get_user_agency
+        from vehicles.services import FleetStatusService
+        
+        if IsAdministrateur().has_permission(request, self):
+            agence_id = request.query_params.get('agence')
+            if not agence_id or not agence_id.isdigit():
+                return APIResponse.error(
+                    message="Paramètre agence requis.",
+                    status_code=400
+                )
+            return APIResponse.success(data=FleetStatusService.get_status(int(agence_id)))
+        
+        agency = get_user_agency(request.user) if IsAgencyStaff().has_permission(request, self) else None
+        if not agency:
+            return APIResponse.error(
+                message="Agence non trouvée.",
+                status_code=403
+            )
+        return APIResponse.success(data=FleetStatusService.get_status(agency.id))
+
+
 class ExportStatisticsView(APIView):
     """View for exporting statistics"""
     permission_classes = [IsAuthenticated, IsAgencyStaff]
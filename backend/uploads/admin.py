@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import UploadSession
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ('filename', 'user', 'purpose', 'status', 'received_bytes', 'total_size', 'created_at')
+    list_filter = ('status', 'purpose', 'created_at')
+    search_fields = ('filename', 'user__email')
@@ -0,0 +1,13 @@
+"""
+Expire abandoned chunked uploads
+"""
+from django.core.management.base import BaseCommand
+from uploads.services import ChunkedUploadService
+
+
+class Command(BaseCommand):
+    help = "Expire chunked uploads idle for longer than CHUNKED_UPLOAD_SESSION_TTL"
+
+    def handle(self, *args, **options):
+        expired = ChunkedUploadService.expire_sessions()
+        self.stdout.write(self.style.SUCCESS(f"Expired {expired} upload session(s)."))
@@ -0,0 +1,38 @@
+import uuid
+from django.db import models
+
+
+class UploadSession(models.Model):
+    """Session de téléversement - Resumable chunked upload"""
+    STATUS_CHOICES = [
+        ('PENDING', 'En cours'),
+        ('COMPLETED', 'Terminé'),
+        ('CONSUMED', 'Utilisé'),
+        ('EXPIRED', 'Expiré'),
+    ]
+    
+    PURPOSE_CHOICES = [
+        ('CONTRACT', 'Contrat'),
+        ('DOCUMENT', 'Document'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey('accounts.User', on_delete=models.CASCADE, related_name='upload_sessions')
+    purpose = models.CharField(max_length=20, choices=PURPOSE_CHOICES, default='DOCUMENT')
+    filename = models.CharField(max_length=255)
+    total_size = models.PositiveBigIntegerField()
+    received_bytes = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True)  # Declared digest of the whole file (optional)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    file_path = models.CharField(max_length=255, blank=True)  # Storage path once completed
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'upload_sessions'
+        verbose_name = 'Upload Session'
+        verbose_name_plural = 'Upload Sessions'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.filename} ({self.received_bytes}/{self.total_size})"
@@ -0,0 +1,13 @@
+from rest_framework import serializers
+from .models import UploadSession
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Upload session serializer"""
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'purpose', 'filename', 'total_size', 'received_bytes', 'sha256',
+                'status', 'status_display', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'received_bytes', 'status', 'created_at', 'updated_at']
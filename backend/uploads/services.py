@@ -0,0 +1,287 @@
+"""
+Business logic services for uploads app
+"""
+import fcntl
+import hashlib
+import logging
+import os
+import uuid
+from datetime import datetime
+from typing import BinaryIO, Optional
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from core.exceptions import BusinessLogicError, NotFoundError, UploadConflictError, ValidationError
+from core.file_service import FileService
+from .models import UploadSession
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from the request stream at a time
+READ_SIZE = 64 * 1024
+
+# Purpose -> (storage upload path, allowed extensions)
+UPLOAD_PURPOSES = {
+    'CONTRACT': ('contracts/', {'.pdf'}),
+    'DOCUMENT': ('documents/', {'.pdf', '.jpg', '.jpeg', '.png'}),
+}
+
+
+class ChunkedUploadService:
+    """Service for resumable chunked uploads"""
+    
+    @staticmethod
+    def get_part_path(session: UploadSession) -> str:
+        """Local file the chunks of a session are appended to"""
+        return os.path.join(settings.CHUNKED_UPLOAD_DIR, f"{session.id}.part")
+    
+    @staticmethod
+    def create_session(user, filename: str, total_size: int, purpose: str = 'DOCUMENT',
+                       sha256: str = '') -> UploadSession:
+        """
+        Start a chunked upload
+        
+        Args:
+            user: Uploading user
+            filename: Original filename
+            total_size: Size of the whole file in bytes
+            purpose: What the file will be attached to (see UPLOAD_PURPOSES)
+            sha256: Optional SHA-256 of the whole file, checked on completion
+            
+        Returns:
+            Created upload session
+        """
+        if purpose not in UPLOAD_PURPOSES:
+            raise ValidationError(f"Type de téléversement inconnu: {purpose}")
+        
+        ext = os.path.splitext(filename)[1].lower()
+        allowed_extensions = UPLOAD_PURPOSES[purpose][1]
+        if ext not in allowed_extensions:
+            raise ValidationError(
+                f"Extension non autorisée. Extensions autorisées: {', '.join(sorted(allowed_extensions))}"
+            )
+        
+        if total_size <= 0 or total_size > settings.CHUNKED_UPLOAD_MAX_SIZE:
+            raise ValidationError(
+                f"Taille de fichier invalide. Taille maximale: {settings.CHUNKED_UPLOAD_MAX_SIZE / (1024*1024)}MB"
+            )
+        
+        session = UploadSession.objects.create(
+            user=user,
+            purpose=purpose,
+            filename=filename,
+            total_size=total_size,
+            sha256=sha256.lower(),
+        )
+        os.makedirs(settings.CHUNKED_UPLOAD_DIR, exist_ok=True)
+        open(ChunkedUploadService.get_part_path(session), 'wb').close()
+        return session
+    
+    @staticmethod
+    def write_chunk(session: UploadSession, offset: int, stream: BinaryIO, length: int,
+                    chunk_sha256: Optional[str] = None) -> UploadSession:
+        """
+        Stream a chunk from the request body to the part file
+        
+        The body is read in small pieces and hashed as it is written, so
+        memory use does not depend on the chunk size. A chunk that is
+        truncated or does not match its digest is discarded and must be
+        sent again from the same offset.
+        
+        Args:
+            session: Upload session
+            offset: Position of the chunk in the file
+            stream: Request body stream
+            length: Chunk size in bytes (Content-Length)
+            chunk_sha256: Optional SHA-256 of the chunk
+            
+        Returns:
+            Updated upload session
+            
+        Raises:
+            UploadConflictError: If offset is not the number of bytes received so far,
+                or another chunk of the session is being written
+        """
+        if session.status != 'PENDING':
+            raise BusinessLogicError("La session de téléversement n'est plus active.")
+        
+        if length <= 0 or length > settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE:
+            raise ValidationError(
+                f"Taille de fragment invalide. Taille maximale: {settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE / (1024*1024)}MB"
+            )
+        
+        if offset + length > session.total_size:
+            raise ValidationError("Le fragment dépasse la taille déclarée du fichier.")
+        
+        try:
+            part = open(ChunkedUploadService.get_part_path(session), 'r+b')
+        except FileNotFoundError:
+            raise BusinessLogicError("La session de téléversement a expiré.")
+        
+        with part:
+            # One writer per session; the lock is released when the file is closed
+            try:
+                fcntl.flock(part, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise UploadConflictError("Un autre fragment est en cours d'envoi.")
+            
+            # Re-read under the lock: a concurrent chunk may just have been written
+            session.refresh_from_db(fields=['received_bytes', 'status'])
+            if session.status != 'PENDING':
+                raise BusinessLogicError("La session de téléversement n'est plus active.")
+            if offset != session.received_bytes:
+                raise UploadConflictError(
+                    f"Position de fragment invalide: {session.received_bytes} octets déjà reçus."
+                )
+            
+            part.seek(offset)
+            part.truncate()
+            digest = hashlib.sha256()
+            remaining = length
+            while remaining:
+                data = stream.read(min(READ_SIZE, remaining))
+                if not data:
+                    break
+                digest.update(data)
+                part.write(data)
+                remaining -= len(data)
+            
+            if remaining or (chunk_sha256 and digest.hexdigest() != chunk_sha256.lower()):
+                part.truncate(offset)
+                raise ValidationError("Fragment incomplet ou corrompu, renvoyez-le.")
+            
+            part.flush()
+            UploadSession.objects.filter(pk=session.pk).update(
+                received_bytes=offset + length,
+                updated_at=timezone.now()
+            )
+            session.received_bytes = offset + length
+        
+        return session
+    
+    @staticmethod
+    def complete(session: UploadSession) -> UploadSession:
+        """
+        Finish an upload: verify the file (digest, content) and stream it into media storage
+        
+        The stored file is content-addressed (deduplicated) and the session
+        holds its reference until it is consumed.
+        
+        Args:
+            session: Upload session
+            
+        Returns:
+            Completed upload session
+        """
+        part_path = ChunkedUploadService.get_part_path(session)
+        error = None
+        
+        with transaction.atomic():
+            session = UploadSession.objects.select_for_update().get(pk=session.pk)
+            if session.status == 'COMPLETED':
+                return session
+            if session.status != 'PENDING':
+                raise BusinessLogicError("La session de téléversement n'est plus active.")
+            if session.received_bytes != session.total_size:
+                raise BusinessLogicError(
+                    f"Téléversement incomplet: {session.received_bytes}/{session.total_size} octets reçus."
+                )
+            
+            with open(part_path, 'rb') as part:
+                file = File(part, name=session.filename)
+                digest = FileService.hash_file(file)
+                if session.sha256 and digest != session.sha256:
+                    error = "Empreinte SHA-256 du fichier invalide, recommencez le téléversement."
+                else:
+                    # Same content check as direct uploads (FileService.validate_document)
+                    error = FileService.check_document_content(file)
+                if error:
+                    session.status = 'EXPIRED'
+                else:
+                    upload_path = UPLOAD_PURPOSES[session.purpose][0]
+                    session.file_path = FileService.store_document(file, upload_path, digest=digest)
+                    session.status = 'COMPLETED'
+            session.save(update_fields=['status', 'file_path', 'updated_at'])
+        
+        os.remove(part_path)
+        
+        if error:
+            raise ValidationError(error)
+        
+        logger.info("Chunked upload completed: %s", session.file_path)
+        return session
+    
+    @staticmethod
+    def consume(upload_id, user, purpose: str) -> str:
+        """
+        Attach the file of a completed upload to a record
+        
+        The upload's reference to the stored file is handed over to the
+        record, so releasing the record's file later is enough.
+        
+        Args:
+            upload_id: Upload session id
+            user: User who uploaded the file
+            purpose: Expected upload purpose
+            
+        Returns:
+            Storage path of the uploaded file
+        """
+        try:
+            upload_id = uuid.UUID(str(upload_id))
+        except ValueError:
+            raise NotFoundError("Téléversement introuvable.")
+        
+        with transaction.atomic():
+            session = UploadSession.objects.select_for_update().filter(
+                pk=upload_id, user=user, purpose=purpose
+            ).first()
+            if session is None:
+                raise NotFoundError("Téléversement introuvable.")
+            if session.status != 'COMPLETED':
+                raise BusinessLogicError("Le téléversement n'est pas terminé ou a déjà été utilisé.")
+            session.status = 'CONSUMED'
+            session.save(update_fields=['status', 'updated_at'])
+        
+        return session.file_path
+    
+    @staticmethod
+    def expire_sessions(now: Optional[datetime] = None) -> int:
+        """
+        Expire abandoned uploads, releasing their part files and stored files
+        
+        Args:
+            now: Reference time (defaults to now)
+            
+        Returns:
+            Number of expired sessions
+        """
+        cutoff = (now or timezone.now()) - settings.CHUNKED_UPLOAD_SESSION_TTL
+        expired = 0
+        
+        stale_ids = UploadSession.objects.filter(
+            status__in=['PENDING', 'COMPLETED'],
+            updated_at__lt=cutoff
+        ).values_list('pk', flat=True)
+        
+        for session_id in stale_ids.iterator():
+            with transaction.atomic():
+                session = UploadSession.objects.select_for_update().filter(
+                    pk=session_id,
+                    status__in=['PENDING', 'COMPLETED'],
+                    updated_at__lt=cutoff
+                ).first()
+                if session is None:
+                    continue
+                if session.status == 'COMPLETED' and session.file_path:
+                    FileService.delete_file(session.file_path)
+                session.status = 'EXPIRED'
+                session.save(update_fields=['status', 'updated_at'])
+            
+            part_path = ChunkedUploadService.get_part_path(session)
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            expired += 1
+        
+        return expired
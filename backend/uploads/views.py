@@ -0,0 +1,86 @@
+from rest_framework import viewsets, mixins, status
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from .models import UploadSession
+from .serializers import UploadSessionSerializer
+from .services import ChunkedUploadService
+from core.exceptions import UploadConflictError
+from core.response import APIResponse
+
+
+class UploadSessionViewSet(mixins.CreateModelMixin,
+                           mixins.RetrieveModelMixin,
+                           mixins.ListModelMixin,
+                           viewsets.GenericViewSet):
+    """
+    Resumable chunked uploads
+    
+    1. POST sessions/ with filename, total_size, purpose and optional sha256
+    2. PUT sessions/{id}/chunk/ with the raw bytes as body, the chunk position
+       in the Upload-Offset header and optionally its digest in X-Chunk-SHA256
+    3. POST sessions/{id}/complete/
+    
+    After an interruption, GET sessions/{id}/ gives the offset to resume from.
+    """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        return UploadSession.objects.filter(user=self.request.user)
+    
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        session = ChunkedUploadService.create_session(
+            request.user,
+            filename=serializer.validated_data['filename'],
+            total_size=serializer.validated_data['total_size'],
+            purpose=serializer.validated_data.get('purpose', 'DOCUMENT'),
+            sha256=serializer.validated_data.get('sha256', ''),
+        )
+        return APIResponse.created(
+            data=UploadSessionSerializer(session).data,
+            message="Upload session created successfully."
+        )
+    
+    @action(detail=True, methods=['put'])
+    def chunk(self, request, pk=None):
+        """Append a chunk, streamed from the request body"""
+        session = self.get_object()
+        
+        try:
+            offset = int(request.META.get('HTTP_UPLOAD_OFFSET', ''))
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return APIResponse.error(
+                message="En-têtes Upload-Offset et Content-Length requis.",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            # The body is never parsed: request.data must not be accessed here
+            session = ChunkedUploadService.write_chunk(
+                session,
+                offset=offset,
+                stream=request.stream,
+                length=length,
+                chunk_sha256=request.META.get('HTTP_X_CHUNK_SHA256'),
+            )
+        except UploadConflictError as e:
+            return APIResponse.error(
+                message=str(e.detail),
+                errors={'received_bytes': session.received_bytes},
+                status_code=status.HTTP_409_CONFLICT
+            )
+        
+        return APIResponse.success(data=UploadSessionSerializer(session).data)
+    
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        """Verify the uploaded file and move it to media storage"""
+        session = ChunkedUploadService.complete(self.get_object())
+        return APIResponse.success(
+            data=UploadSessionSerializer(session).data,
+            message="Upload completed successfully."
+        )
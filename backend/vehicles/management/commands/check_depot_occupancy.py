@@ -0,0 +1,22 @@
+"""
+Recompute depot occupancy counters from the vehicles actually in each depot
+"""
+from django.core.management.base import BaseCommand
+from vehicles.services import DepotService
+
+
+class Command(BaseCommand):
+    help = "Check Depot.nb_vehicules against the vehicles in each depot and fix drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help="Report mismatches without fixing them")
+
+    def handle(self, *args, **options):
+        mismatches = DepotService.recompute(options['batch_size'], fix=not options['dry_run'])
+        for mismatch in mismatches:
+            self.stdout.write(
+                f"Dépôt {mismatch['depot']}: {mismatch['stored']} enregistré(s), {mismatch['actual']} réel(s)"
+            )
+        action = "found" if options['dry_run'] else "fixed"
+        self.stdout.write(self.style.SUCCESS(f"{len(mismatches)} depot counter(s) {action}."))
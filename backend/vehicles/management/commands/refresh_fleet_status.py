@@ -0,0 +1,15 @@
+"""
+Refresh the fleet status snapshot (run periodically, e.g. every minute from cron)
+"""
+from django.core.management.base import BaseCommand
+from vehicles.services import FleetStatusService
+
+
+class Command(BaseCommand):
+    help = "Refresh the fleet_status materialized view"
+
+    def handle(self, *args, **options):
+        if FleetStatusService.refresh():
+            self.stdout.write(self.style.SUCCESS("Fleet status refreshed."))
+        else:
+            self.stdout.write("fleet_status is a plain view on this database, nothing to refresh.")
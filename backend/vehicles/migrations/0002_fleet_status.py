@@ -0,0 +1,80 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:17
+
+from django.db import migrations, models
+
+
+# One row per combination of agency, state, category, depot, availability
+# and current rental. The id concatenates those keys so the materialized
+# view has the unique index REFRESH ... CONCURRENTLY requires.
+FLEET_STATUS_QUERY = """
+    SELECT
+        CAST(agence_id AS TEXT) || ':' || etat_vehicule || ':' || categorie_vehicule || ':'
+            || CAST(depot_id AS TEXT) || ':' || CAST(disponibilite AS TEXT) || ':'
+            || CAST(en_location AS TEXT) AS id,
+        agence_id, etat_vehicule, categorie_vehicule, depot_id, disponibilite, en_location,
+        COUNT(*) AS nb_vehicules,
+        CURRENT_TIMESTAMP AS refreshed_at
+    FROM (
+        SELECT
+            v.agence_id, v.etat_vehicule, v.categorie_vehicule,
+            COALESCE(v.depot_id, 0) AS depot_id,
+            v.disponibilite,
+            EXISTS (
+                SELECT 1 FROM reservations r
+                WHERE r.vehicule_id = v.id
+                AND r.status IN ('CONFIRMED', 'ACTIVE')
+                AND r.date_debut <= CURRENT_DATE AND r.date_fin >= CURRENT_DATE
+            ) AS en_location
+        FROM vehicules v
+    ) fleet
+    GROUP BY agence_id, etat_vehicule, categorie_vehicule, depot_id, disponibilite, en_location
+"""
+
+
+def create_fleet_status(apps, schema_editor):
+    """Materialized view on PostgreSQL, plain view elsewhere (always current)"""
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f"CREATE MATERIALIZED VIEW fleet_status AS {FLEET_STATUS_QUERY}")
+        schema_editor.execute("CREATE UNIQUE INDEX fleet_status_id_idx ON fleet_status (id)")
+        schema_editor.execute("CREATE INDEX fleet_status_agence_idx ON fleet_status (agence_id)")
+    else:
+        schema_editor.execute(f"CREATE VIEW fleet_status AS {FLEET_STATUS_QUERY}")
+
+
+def drop_fleet_status(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("DROP MATERIALIZED VIEW IF EXISTS fleet_status")
+    else:
+        schema_editor.execute("DROP VIEW IF EXISTS fleet_status")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0001_initial'),
+        ('reservations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FleetStatus',
+            fields=[
+                ('id', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('agence_id', models.IntegerField()),
+                ('etat_vehicule', models.CharField(choices=[('intrusion', 'Intrusion'), ('enPanne', 'En Panne'), ('prochainementDisponible', 'Prochainement Disponible'), ('enMarche', 'En Marche'), ('enArret', 'En Arrêt')], max_length=50)),
+                ('categorie_vehicule', models.CharField(choices=[('Petites', 'Petites'), ('Moyennes', 'Moyennes'), ('Larges', 'Larges'), ('Premium', 'Premium'), ('Monospaces', 'Monospaces'), ('SUV', 'SUV')], max_length=50)),
+                ('depot_id', models.IntegerField()),
+                ('disponibilite', models.BooleanField()),
+                ('en_location', models.BooleanField()),
+                ('nb_vehicules', models.IntegerField()),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'État de la flotte',
+                'verbose_name_plural': 'États de la flotte',
+                'db_table': 'fleet_status',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_fleet_status, drop_fleet_status),
+    ]
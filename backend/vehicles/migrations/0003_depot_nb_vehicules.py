@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:19
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_vehicles(apps, schema_editor):
+    """Initialize the counters from the vehicles currently in each depot"""
+    Depot = apps.get_model('vehicles', 'Depot')
+    Vehicule = apps.get_model('vehicles', 'Vehicule')
+    counts = Vehicule.objects.filter(depot_id=OuterRef('pk')).order_by().values('depot_id').annotate(
+        count=Count('id')
+    ).values('count')
+    Depot.objects.update(nb_vehicules=Coalesce(Subquery(counts), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0002_fleet_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='depot',
+            name='nb_vehicules',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_vehicles, migrations.RunPython.noop),
+    ]
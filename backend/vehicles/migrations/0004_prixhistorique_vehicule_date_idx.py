@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0003_depot_nb_vehicules'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='prixhistorique',
+            index=models.Index(fields=['vehicule', 'created_at'], name='prix_hist_vehicule_date_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0004_prixhistorique_vehicule_date_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='depot',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator
 
 
@@ -6,9 +6,11 @@ class Depot(models.Model):
     """Dépôt model - Vehicle Depot/Storage"""
     adress_dpt = models.TextField()
     capacite_dpt = models.PositiveIntegerField(validators=[MinValueValidator(1)])
+    nb_vehicules = models.PositiveIntegerField(default=0)  # Maintained by Vehicule.save/delete
     agence = models.ForeignKey('agencies.Agence', on_delete=models.CASCADE, related_name='depots')
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # Also set by the nb_vehicules updates
     
     class Meta:
         db_table = 'depots'
@@ -17,6 +19,47 @@ class Depot(models.Model):
     
     def __str__(self):
         return f"{self.adress_dpt} ({self.agence.nom_agence})"
+    
+    @property
+    def places_libres(self):
+        return max(self.capacite_dpt - self.nb_vehicules, 0)
+    
+    def save(self, *args, **kwargs):
+        from core.exceptions import BusinessLogicError
+        from core.reference_data import ReferenceDataService
+        from .services import VehicleCatalogueCache
+        
+        with transaction.atomic():
+            current = None
+            if not self._state.adding:
+                current = Depot.objects.select_for_update().filter(pk=self.pk).values_list(
+                    'nb_vehicules', flat=True
+                ).first()
+            if current is None:
+                super().save(*args, **kwargs)
+            else:
+                # nb_vehicules is only changed by DepotService.move_vehicle (F() updates):
+                # never write back the value this instance loaded, check the current one
+                self.nb_vehicules = current
+                if self.capacite_dpt < current:
+                    raise BusinessLogicError(
+                        f"La capacité ne peut pas être inférieure au nombre de véhicules présents ({current})."
+                    )
+                update_fields = kwargs.pop('update_fields', None) or [
+                    field.name for field in self._meta.concrete_fields if not field.primary_key
+                ]
+                super().save(*args, update_fields=[name for name in update_fields if name != 'nb_vehicules'], **kwargs)
+        # The depot address is shown in the vehicle list
+        agence_id = self.agence_id
+        transaction.on_commit(lambda: VehicleCatalogueCache.invalidate(agence_id))
+        transaction.on_commit(ReferenceDataService.invalidate)
+    
+    def delete(self, *args, **kwargs):
+        from core.reference_data import ReferenceDataService
+        
+        result = super().delete(*args, **kwargs)
+        transaction.on_commit(ReferenceDataService.invalidate)
+        return result
 
 
 class Vehicule(models.Model):
@@ -62,6 +105,47 @@ class Vehicule(models.Model):
     def __str__(self):
         return f"{self.marque} {self.model} ({self.matricule})"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Depot as loaded, to move the occupancy counters when it changes
+        instance._loaded_depot_id = instance.__dict__.get('depot_id', models.DEFERRED)
+        return instance
+    
+    def _get_stored_depot_id(self):
+        """Depot currently counted for this vehicle in the database"""
+        if self._state.adding:
+            return None
+        depot_id = getattr(self, '_loaded_depot_id', models.DEFERRED)
+        if depot_id is models.DEFERRED:
+            depot_id = Vehicule.objects.filter(pk=self.pk).values_list('depot_id', flat=True).first()
+        return depot_id
+    
+    def save(self, *args, **kwargs):
+        from .services import DepotService, FleetStatusService, VehicleCatalogueCache
+        
+        update_fields = kwargs.get('update_fields')
+        with transaction.atomic():
+            if update_fields is None or 'depot' in update_fields or 'depot_id' in update_fields:
+                DepotService.move_vehicle(self._get_stored_depot_id(), self.depot_id)
+            super().save(*args, **kwargs)
+        self._loaded_depot_id = self.depot_id
+        transaction.on_commit(FleetStatusService.schedule_refresh)
+        agence_id = self.agence_id
+        transaction.on_commit(lambda: VehicleCatalogueCache.invalidate(agence_id))
+    
+    def delete(self, *args, **kwargs):
+        from .services import DepotService, FleetStatusService, VehicleCatalogueCache
+        
+        agence_id = self.agence_id
+        with transaction.atomic():
+            depot_id = self._get_stored_depot_id()
+            result = super().delete(*args, **kwargs)
+            DepotService.move_vehicle(depot_id, None)
+        transaction.on_commit(FleetStatusService.schedule_refresh)
+        transaction.on_commit(lambda: VehicleCatalogueCache.invalidate(agence_id))
+        return result
+    
     @property
     def imageURL(self):
         try:
@@ -86,7 +170,35 @@ class PrixHistorique(models.Model):
         verbose_name = 'Prix Historique'
         verbose_name_plural = 'Prix Historiques'
         ordering = ['-created_at']
+        indexes = [
+            # Price series of a vehicle over time
+            models.Index(fields=['vehicule', 'created_at'], name='prix_hist_vehicule_date_idx'),
+        ]
     
     def __str__(self):
         return f"Price change for {self.vehicule.matricule}"
 
+
+class FleetStatus(models.Model):
+    """
+    Fleet status snapshot - vehicle counts per agency, state, category,
+    depot, availability and current rental
+
+    Read-only: backed by the fleet_status view (materialized on PostgreSQL,
+    see FleetStatusService.refresh).
+    """
+    id = models.CharField(max_length=255, primary_key=True)
+    agence_id = models.IntegerField()
+    etat_vehicule = models.CharField(max_length=50, choices=Vehicule.ETAT_CHOICES)
+    categorie_vehicule = models.CharField(max_length=50, choices=Vehicule.CATEGORIE_CHOICES)
+    depot_id = models.IntegerField()  # 0 = no depot
+    disponibilite = models.BooleanField()
+    en_location = models.BooleanField()
+    nb_vehicules = models.IntegerField()
+    refreshed_at = models.DateTimeField()
+    
+    class Meta:
+        managed = False
+        db_table = 'fleet_status'
+        verbose_name = 'État de la flotte'
+        verbose_name_plural = 'États de la flotte'
@@ -1,41 +1,81 @@
 from rest_framework import serializers
 from .models import Vehicule, Depot, PrixHistorique
 from agencies.serializers import AgenceSerializer
+from core.file_service import FileService
+from core.reference_data import ReferenceDataService
 
 
 class DepotSerializer(serializers.ModelSerializer):
     """Depot serializer"""
-    agence_nom = serializers.CharField(source='agence.nom_agence', read_only=True)
+    agence_nom = serializers.SerializerMethodField()
+    places_libres = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = Depot
-        fields = ['id', 'adress_dpt', 'capacite_dpt', 'agence', 'agence_nom', 
-                'is_active', 'created_at']
-        read_only_fields = ['created_at']
+        fields = ['id', 'adress_dpt', 'capacite_dpt', 'nb_vehicules', 'places_libres',
+                'agence', 'agence_nom', 'is_active', 'created_at', 'updated_at']
+        read_only_fields = ['created_at', 'updated_at', 'nb_vehicules']
+    
+    def get_agence_nom(self, obj):
+        return ReferenceDataService.get_agence_nom(obj.agence_id) or obj.agence.nom_agence
+    
+    def validate_capacite_dpt(self, value):
+        if self.instance is not None:
+            # Current count, not the one loaded with the instance (checked again under lock on save)
+            nb_vehicules = Depot.objects.filter(pk=self.instance.pk).values_list('nb_vehicules', flat=True).first() or 0
+            if value < nb_vehicules:
+                raise serializers.ValidationError(
+                    f"La capacité ne peut pas être inférieure au nombre de véhicules présents ({nb_vehicules})."
+                )
+        return value
 
 
 class VehiculeSerializer(serializers.ModelSerializer):
     """Vehicule serializer"""
     image_url = serializers.SerializerMethodField()
+    image_renditions = serializers.SerializerMethodField()
     etat_display = serializers.CharField(source='get_etat_vehicule_display', read_only=True)
     categorie_display = serializers.CharField(source='get_categorie_vehicule_display', read_only=True)
-    depot_adress = serializers.CharField(source='depot.adress_dpt', read_only=True)
-    agence_nom = serializers.CharField(source='agence.nom_agence', read_only=True)
+    # Read from the reference data cache: no join or query per vehicle
+    depot_adress = serializers.SerializerMethodField()
+    agence_nom = serializers.SerializerMethodField()
     
     class Meta:
         model = Vehicule
         fields = ['id', 'matricule', 'marque', 'model', 'prix_heure', 'prix_jour',
                 'description', 'etat_vehicule', 'etat_display', 'disponibilite',
                 'categorie_vehicule', 'categorie_display', 'depot', 'depot_adress',
-                'agence', 'agence_nom', 'img_vhl', 'image_url', 'created_at', 'updated_at']
+                'agence', 'agence_nom', 'img_vhl', 'image_url', 'image_renditions',
+                'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
     
+    def validate_depot(self, value):
+        # Early, friendly check; the slot itself is taken atomically on save
+        if value is not None and (self.instance is None or self.instance.depot_id != value.id):
+            if value.nb_vehicules >= value.capacite_dpt:
+                raise serializers.ValidationError("Le dépôt a atteint sa capacité maximale.")
+        return value
+    
+    def get_depot_adress(self, obj):
+        if obj.depot_id is None:
+            return None
+        return ReferenceDataService.get_depot_adress(obj.depot_id) or obj.depot.adress_dpt
+    
+    def get_agence_nom(self, obj):
+        return ReferenceDataService.get_agence_nom(obj.agence_id) or obj.agence.nom_agence
+    
     def get_image_url(self, obj):
         if obj.img_vhl:
             request = self.context.get('request')
             if request:
                 return request.build_absolute_uri(obj.img_vhl.url)
         return None
+    
+    def get_image_renditions(self, obj):
+        image_url = self.get_image_url(obj)
+        if image_url:
+            return FileService.get_rendition_urls(image_url)
+        return None
 
 
 class PrixHistoriqueSerializer(serializers.ModelSerializer):
@@ -1,16 +1,40 @@
 """
 Business logic services for vehicles app
 """
-from typing import Dict, Any, Optional
-from django.db.models import Q
-from core.exceptions import BusinessLogicError, VehicleHasActiveReservationsError
-from core.constants import ErrorMessages, ReservationStatus
+import codecs
+import csv
+import hashlib
+import io
+import itertools
+import json
+import os
+import time
+import zipfile
+from collections import Counter
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Avg, Count, F, Max, Min, Q, Window
+from django.db.models.functions import RowNumber, TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+from core.exceptions import BusinessLogicError, DepotFullError, VehicleHasActiveReservationsError
+from core.cache_service import CacheService
+from core.constants import ErrorMessages, ReservationStatus, UserRoles
 from core.utils import get_user_agency
+from core.file_service import FileService
+from core.validators import AdvancedValidators
+from core.workers import WorkerPool
 
 
 class VehicleService:
     """Service for vehicle operations"""
     
+    BULK_BATCH_SIZE = 500
+    
     @staticmethod
     def can_modify_price(vehicule, user) -> bool:
         """
@@ -82,6 +106,105 @@ class VehicleService:
         from vehicles.serializers import VehiculeSerializer
         return VehiculeSerializer(vehicule).data
     
+    @staticmethod
+    def bulk_update_prices(vehicules, percentage: Optional[Decimal] = None,
+                           prix_jour: Optional[Decimal] = None, prix_heure: Optional[Decimal] = None,
+                           user=None) -> Dict[str, Any]:
+        """
+        Reprice many vehicles at once, in one transaction
+        
+        Either scales both prices by a percentage (e.g. 10 or -15) or sets
+        absolute prices. Vehicles with active reservations are skipped,
+        found with a single query. History rows are inserted with
+        bulk_create and prices written with bulk_update.
+        
+        Args:
+            vehicules: Queryset of the vehicles to reprice
+            percentage: Percentage change applied to prix_jour and prix_heure
+            prix_jour: New daily price (absolute mode)
+            prix_heure: New hourly price (absolute mode)
+            user: User making the change
+            
+        Returns:
+            Dictionary with 'updated' (count) and 'skipped'
+            ([{'id', 'matricule'}] of vehicles with active reservations)
+            
+        Raises:
+            BusinessLogicError: If no change is given or a resulting price is invalid
+        """
+        from reservations.models import Reservation
+        from vehicles.models import PrixHistorique, Vehicule
+        
+        if percentage is None and not prix_jour and not prix_heure:
+            raise BusinessLogicError(ErrorMessages.PRICE_REQUIRED)
+        if percentage is not None and percentage <= -100:
+            raise BusinessLogicError("Le pourcentage doit être supérieur à -100.")
+        
+        cent = Decimal('0.01')
+        factor = 1 + percentage / 100 if percentage is not None else None
+        now = timezone.now()
+        
+        with transaction.atomic():
+            rows = list(vehicules.select_for_update().order_by('id').values_list(
+                'id', 'matricule', 'prix_jour', 'prix_heure', 'agence_id'
+            ))
+            reserved = set(Reservation.objects.filter(
+                vehicule__in=vehicules.values('id'),
+                status__in=ReservationStatus.ACTIVE_STATUSES
+            ).values_list('vehicule_id', flat=True).distinct())
+            
+            history, updated = [], []
+            for vehicule_id, matricule, ancien_jour, ancien_heure, _ in rows:
+                if vehicule_id in reserved:
+                    continue
+                if factor is not None:
+                    nouveau_jour = (ancien_jour * factor).quantize(cent, rounding=ROUND_HALF_UP)
+                    nouveau_heure = (ancien_heure * factor).quantize(cent, rounding=ROUND_HALF_UP)
+                else:
+                    nouveau_jour = prix_jour or ancien_jour
+                    nouveau_heure = prix_heure or ancien_heure
+                for price in (nouveau_jour, nouveau_heure):
+                    is_valid, error = AdvancedValidators.validate_price(price)
+                    if not is_valid:
+                        raise BusinessLogicError(f"{matricule}: {error}")
+                
+                history.append(PrixHistorique(
+                    vehicule_id=vehicule_id,
+                    ancien_prix_jour=ancien_jour,
+                    nouveau_prix_jour=nouveau_jour,
+                    ancien_prix_heure=ancien_heure,
+                    nouveau_prix_heure=nouveau_heure,
+                    modifie_par=user
+                ))
+                updated.append(Vehicule(
+                    id=vehicule_id, prix_jour=nouveau_jour, prix_heure=nouveau_heure, updated_at=now
+                ))
+            
+            PrixHistorique.objects.bulk_create(history, batch_size=VehicleService.BULK_BATCH_SIZE)
+            if factor is not None:
+                Vehicule.objects.bulk_update(
+                    updated, ['prix_jour', 'prix_heure', 'updated_at'], batch_size=VehicleService.BULK_BATCH_SIZE
+                )
+            elif updated:
+                # Same prices for every vehicle: a single UPDATE
+                changes = {'updated_at': now}
+                if prix_jour:
+                    changes['prix_jour'] = prix_jour
+                if prix_heure:
+                    changes['prix_heure'] = prix_heure
+                Vehicule.objects.filter(id__in=[vehicule.id for vehicule in updated]).update(**changes)
+            
+            agences = {agence_id for vehicule_id, _, _, _, agence_id in rows if vehicule_id not in reserved}
+            transaction.on_commit(lambda: VehicleCatalogueCache.invalidate(*agences))
+        
+        return {
+            'updated': len(updated),
+            'skipped': [
+                {'id': vehicule_id, 'matricule': matricule}
+                for vehicule_id, matricule, _, _, _ in rows if vehicule_id in reserved
+            ],
+        }
+    
     @staticmethod
     def filter_vehicles(queryset, filters: Dict[str, Any]):
         """
@@ -118,3 +241,706 @@ class VehicleService:
         
         return queryset
 
+
+
+class VehicleCatalogueCache:
+    """
+    Shared cache of the serialized vehicle list pages
+    
+    The page for a given set of filters is the same for every renter, so
+    it is cached under the normalized query string, the host (image URLs
+    are absolute) and a role scope. Keys embed tag versions: lists
+    filtered on an agency depend on that agency's tag, the others on the
+    global tag, and any vehicle change moves both (see invalidate).
+    """
+    CACHE_TIMEOUT = 60
+    STALE_TTL = 60
+    # Query parameters the list understands; any other one bypasses the cache
+    PARAMS = ('agence', 'categorie', 'depot', 'disponibilite', 'ordering', 'page',
+              'page_size', 'prix_max', 'prix_min', 'search')
+    
+    @staticmethod
+    def get_scope(user) -> str:
+        """Renters and visitors share one scope, staff roles get their own"""
+        role = getattr(user, 'role', None)
+        return 'public' if role in (None, UserRoles.RENTER, UserRoles.VISITOR) else role
+    
+    @staticmethod
+    def get_key(request, validator: Optional[str] = None) -> Optional[str]:
+        """
+        Cache key of a list request
+        
+        Args:
+            request: DRF request
+            validator: ETag sent with the page (see ConditionalGetMixin): the
+                page is then rebuilt as soon as the rows change, even when
+                the invalidation did not reach this process's cache
+            
+        Returns:
+            Cache key, or None if the request cannot be cached
+        """
+        params = {}
+        for name, values in request.query_params.lists():
+            if name not in VehicleCatalogueCache.PARAMS or len(values) > 1:
+                return None
+            value = values[0].strip()
+            if value:
+                params[name] = value.lower() if name == 'disponibilite' else value
+        if 'agence' in params:
+            # One tag per agency: '03' must not get a tag of its own
+            if not params['agence'].isdigit():
+                return None
+            params['agence'] = str(int(params['agence']))
+        
+        tag = f"vehicules:agence:{params['agence']}" if 'agence' in params else 'vehicules'
+        version = CacheService.get_tag_versions(tag)[tag]
+        key_data = json.dumps([
+            request.get_host(), VehicleCatalogueCache.get_scope(request.user), sorted(params.items()), validator
+        ])
+        return f"vehicules:list:{version}:{hashlib.md5(key_data.encode()).hexdigest()}"
+    
+    @staticmethod
+    def get_page(key: str, compute) -> Any:
+        """
+        Cached page, recomputed by a single request on a miss
+        
+        Keys carry the ETag and the tag versions, so an expired page is still
+        right: it is served while being refreshed in the background.
+        """
+        return CacheService.fetch(
+            key, compute, VehicleCatalogueCache.CACHE_TIMEOUT, stale_ttl=VehicleCatalogueCache.STALE_TTL
+        )
+    
+    @staticmethod
+    def invalidate(*agence_ids: int):
+        """
+        Drop the cached pages showing vehicles of these agencies
+        
+        Args:
+            *agence_ids: Agencies whose vehicles (or name, depots) changed
+        """
+        CacheService.invalidate_tags('vehicules', *(f"vehicules:agence:{agence_id}" for agence_id in agence_ids))
+
+
+class PriceHistoryService:
+    """Downsampled price series, computed in the database"""
+    
+    BUCKETS = {
+        'day': TruncDay,
+        'week': TruncWeek,
+        'month': TruncMonth,
+    }
+    
+    @staticmethod
+    def get_series(history, bucket: str = 'day', per_vehicle: bool = True) -> List[Dict[str, Any]]:
+        """
+        Downsample price changes into one point per bucket
+        
+        For one vehicle, each point has the last, min and max prices set in
+        the bucket, read with a single windowed query. Across several
+        vehicles (a category, an agency), each point has the average, min
+        and max of the new prices.
+        
+        Args:
+            history: Queryset of PrixHistorique (already filtered)
+            bucket: 'day', 'week' or 'month'
+            per_vehicle: True when history covers a single vehicle
+            
+        Returns:
+            List of points ordered by date:
+            {'date', 'changes', 'prix_jour': {...}, 'prix_heure': {...}}
+        """
+        trunc = PriceHistoryService.BUCKETS[bucket]('created_at')
+        history = history.order_by()
+        
+        if per_vehicle:
+            window = {'partition_by': [trunc]}
+            points = history.annotate(
+                date=trunc,
+                rank=Window(RowNumber(), order_by=[F('created_at').desc(), F('id').desc()], **window),
+                changes=Window(Count('id'), **window),
+                jour_min=Window(Min('nouveau_prix_jour'), **window),
+                jour_max=Window(Max('nouveau_prix_jour'), **window),
+                heure_min=Window(Min('nouveau_prix_heure'), **window),
+                heure_max=Window(Max('nouveau_prix_heure'), **window),
+            ).filter(rank=1).values_list(
+                'date', 'changes', 'nouveau_prix_jour', 'jour_min', 'jour_max',
+                'nouveau_prix_heure', 'heure_min', 'heure_max'
+            )
+            return sorted(
+                (
+                    {
+                        'date': date,
+                        'changes': changes,
+                        'prix_jour': {'last': jour, 'min': jour_min, 'max': jour_max},
+                        'prix_heure': {'last': heure, 'min': heure_min, 'max': heure_max},
+                    }
+                    for date, changes, jour, jour_min, jour_max, heure, heure_min, heure_max in points
+                ),
+                key=lambda point: point['date']
+            )
+        
+        points = history.annotate(date=trunc).values('date').annotate(
+            changes=Count('id'),
+            jour_avg=Avg('nouveau_prix_jour'),
+            jour_min=Min('nouveau_prix_jour'),
+            jour_max=Max('nouveau_prix_jour'),
+            heure_avg=Avg('nouveau_prix_heure'),
+            heure_min=Min('nouveau_prix_heure'),
+            heure_max=Max('nouveau_prix_heure'),
+        ).order_by('date')
+        cent = Decimal('0.01')
+        return [
+            {
+                'date': point['date'],
+                'changes': point['changes'],
+                'prix_jour': {
+                    'avg': Decimal(point['jour_avg']).quantize(cent),
+                    'min': point['jour_min'],
+                    'max': point['jour_max'],
+                },
+                'prix_heure': {
+                    'avg': Decimal(point['heure_avg']).quantize(cent),
+                    'min': point['heure_min'],
+                    'max': point['heure_max'],
+                },
+            }
+            for point in points
+        ]
+
+
+class FleetStatusService:
+    """Per-agency fleet status, read from the fleet_status view"""
+    
+    REFRESH_LOCK_KEY = 'vehicles:fleet_status_refresh'
+    # Writes within this delay are folded into one refresh
+    REFRESH_DELAY = 5
+    
+    @staticmethod
+    def is_materialized() -> bool:
+        """fleet_status is a materialized view on PostgreSQL only (a plain view elsewhere)"""
+        return connection.vendor == 'postgresql'
+    
+    @staticmethod
+    def refresh() -> bool:
+        """
+        Recompute the snapshot without blocking readers
+        
+        Returns:
+            True if the view was refreshed, False if it is a plain view
+        """
+        if not FleetStatusService.is_materialized():
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY fleet_status")
+        return True
+    
+    @staticmethod
+    def schedule_refresh():
+        """
+        Refresh the snapshot in the background shortly after a vehicle or
+        reservation change, at most one pending refresh at a time
+        """
+        if not FleetStatusService.is_materialized():
+            return
+        if not cache.add(FleetStatusService.REFRESH_LOCK_KEY, True, FleetStatusService.REFRESH_DELAY * 10):
+            return
+        
+        def delayed_refresh():
+            time.sleep(FleetStatusService.REFRESH_DELAY)
+            # Changes made from now on schedule their own refresh
+            cache.delete(FleetStatusService.REFRESH_LOCK_KEY)
+            FleetStatusService.refresh()
+        
+        WorkerPool.submit_background(delayed_refresh)
+    
+    @staticmethod
+    def get_status(agence_id: int) -> Dict[str, Any]:
+        """
+        Get the fleet status of an agency in one indexed read
+        
+        Args:
+            agence_id: Agency ID
+            
+        Returns:
+            Dictionary with vehicle counts: total, available, unavailable,
+            rented, by_state, by_category and by_depot
+        """
+        from vehicles.models import FleetStatus, Vehicule
+        
+        rows = FleetStatus.objects.filter(agence_id=agence_id).values_list(
+            'etat_vehicule', 'categorie_vehicule', 'depot_id', 'disponibilite',
+            'en_location', 'nb_vehicules', 'refreshed_at'
+        )
+        status = {
+            'total': 0,
+            'available': 0,
+            'unavailable': 0,
+            'rented': 0,
+            'by_state': {etat: 0 for etat, _ in Vehicule.ETAT_CHOICES},
+            'by_category': {categorie: 0 for categorie, _ in Vehicule.CATEGORIE_CHOICES},
+            'by_depot': {},
+            'refreshed_at': None,
+        }
+        for etat, categorie, depot_id, disponibilite, en_location, count, refreshed_at in rows:
+            status['total'] += count
+            status['available' if disponibilite else 'unavailable'] += count
+            if en_location:
+                status['rented'] += count
+            status['by_state'][etat] = status['by_state'].get(etat, 0) + count
+            status['by_category'][categorie] = status['by_category'].get(categorie, 0) + count
+            status['by_depot'][depot_id or None] = status['by_depot'].get(depot_id or None, 0) + count
+            status['refreshed_at'] = refreshed_at
+        
+        status['by_depot'] = [
+            {'depot': depot_id, 'count': count} for depot_id, count in status['by_depot'].items()
+        ]
+        return status
+
+
+class DepotService:
+    """Depot occupancy counters (Depot.nb_vehicules)"""
+    
+    @staticmethod
+    def move_vehicle(from_depot_id: Optional[int], to_depot_id: Optional[int]):
+        """
+        Update the counters when a vehicle enters, leaves or changes depot
+        
+        Must run in the transaction that saves the vehicle. The slot is
+        taken with a conditional UPDATE, so concurrent assignments cannot
+        exceed the capacity.
+        
+        Args:
+            from_depot_id: Previous depot, or None
+            to_depot_id: New depot, or None
+            
+        Raises:
+            DepotFullError: If the new depot has no free space
+        """
+        from vehicles.models import Depot
+        
+        if from_depot_id == to_depot_id:
+            return
+        if to_depot_id is not None:
+            taken = Depot.objects.filter(
+                pk=to_depot_id, nb_vehicules__lt=F('capacite_dpt')
+            ).update(nb_vehicules=F('nb_vehicules') + 1, updated_at=timezone.now())
+            if not taken:
+                raise DepotFullError()
+        if from_depot_id is not None:
+            Depot.objects.filter(pk=from_depot_id, nb_vehicules__gt=0).update(
+                nb_vehicules=F('nb_vehicules') - 1, updated_at=timezone.now()
+            )
+    
+    @staticmethod
+    def get_available(agence_id: int, min_places: int = 1):
+        """
+        Active depots of an agency with free space, most free space first
+        
+        Args:
+            agence_id: Agency ID
+            min_places: Minimum free places
+            
+        Returns:
+            Queryset of dictionaries (id, adress_dpt, capacite_dpt, nb_vehicules, places_libres)
+        """
+        from vehicles.models import Depot
+        
+        return Depot.objects.filter(agence_id=agence_id, is_active=True).annotate(
+            places_libres=F('capacite_dpt') - F('nb_vehicules')
+        ).filter(places_libres__gte=min_places).order_by('-places_libres').values(
+            'id', 'adress_dpt', 'capacite_dpt', 'nb_vehicules', 'places_libres'
+        )
+    
+    @staticmethod
+    def recompute(batch_size: int = 500, fix: bool = True) -> List[Dict[str, int]]:
+        """
+        Compare the counters with the vehicles actually in each depot
+        
+        Args:
+            batch_size: Depots checked per query
+            fix: Write the recomputed counts
+            
+        Returns:
+            List of mismatches: {'depot', 'stored', 'actual'}
+        """
+        from vehicles.models import Depot, Vehicule
+        
+        mismatches = []
+        last_id = 0
+        while True:
+            batch = list(
+                Depot.objects.filter(id__gt=last_id).order_by('id')
+                .values_list('id', 'nb_vehicules')[:batch_size]
+            )
+            if not batch:
+                return mismatches
+            last_id = batch[-1][0]
+            
+            counts = dict(
+                Vehicule.objects.filter(depot_id__in=[depot_id for depot_id, _ in batch])
+                .values('depot_id').annotate(count=Count('id')).values_list('depot_id', 'count')
+            )
+            for depot_id, stored in batch:
+                actual = counts.get(depot_id, 0)
+                if actual != stored:
+                    mismatches.append({'depot': depot_id, 'stored': stored, 'actual': actual})
+                    if fix:
+                        Depot.objects.filter(pk=depot_id).update(nb_vehicules=actual, updated_at=timezone.now())
+
+
+class VehicleImportService:
+    """Bulk vehicle import from CSV/XLSX, with an optional ZIP of images"""
+    
+    # Columns of import files (and of exports, so they can be re-imported)
+    COLUMNS = [
+        'matricule', 'marque', 'model', 'prix_jour', 'prix_heure', 'description',
+        'categorie_vehicule', 'etat_vehicule', 'disponibilite', 'depot', 'image',
+    ]
+    REQUIRED_COLUMNS = ['matricule', 'marque', 'model', 'prix_jour', 'prix_heure', 'categorie_vehicule']
+    
+    MAX_ROWS = 5000
+    # Rows validated, processed and inserted together
+    CHUNK_SIZE = 200
+    IMAGE_BATCH_SIZE = 20
+    
+    TRUE_VALUES = {'1', 'true', 'oui', 'yes', 'o', 'y'}
+    FALSE_VALUES = {'0', 'false', 'non', 'no', 'n'}
+    
+    @staticmethod
+    def read_rows(file) -> Iterator[Tuple[int, Dict[str, str]]]:
+        """
+        Read the rows of a CSV or XLSX file
+        
+        Args:
+            file: Uploaded file (.csv or .xlsx)
+            
+        Yields:
+            (line number, {column: value}) for each non-empty row
+            
+        Raises:
+            BusinessLogicError: If the file type or header is not supported
+        """
+        ext = os.path.splitext(file.name)[1].lower()
+        text = None
+        if ext == '.csv':
+            encoding = VehicleImportService._detect_encoding(file)
+            text = io.TextIOWrapper(file, encoding=encoding, newline='')
+            try:
+                dialect = csv.Sniffer().sniff(text.read(4096), delimiters=',;\t')
+            except csv.Error:
+                dialect = csv.excel
+            except UnicodeDecodeError:
+                text.detach()
+                raise BusinessLogicError("Encodage du fichier CSV non reconnu (UTF-8 attendu).")
+            text.seek(0)
+            rows = csv.reader(text, dialect)
+        elif ext == '.xlsx':
+            try:
+                # Read-only mode streams the sheet instead of loading it whole
+                rows = load_workbook(file, read_only=True, data_only=True).active.iter_rows(values_only=True)
+            except (zipfile.BadZipFile, InvalidFileException, KeyError, ValueError):
+                raise BusinessLogicError("Fichier XLSX invalide ou corrompu.")
+        else:
+            raise BusinessLogicError("Format de fichier non supporté (CSV ou XLSX attendu).")
+        
+        try:
+            header = [str(value or '').strip().lower() for value in next(rows, [])]
+            missing = [column for column in VehicleImportService.REQUIRED_COLUMNS if column not in header]
+            if missing:
+                raise BusinessLogicError(f"Colonnes manquantes: {', '.join(missing)}")
+            
+            for line, values in enumerate(rows, start=2):
+                values = ['' if value is None else str(value).strip() for value in values]
+                if any(values):
+                    yield line, dict(zip(header, values))
+        except UnicodeDecodeError:
+            raise BusinessLogicError("Encodage du fichier CSV non reconnu (UTF-8 attendu).")
+        finally:
+            if text is not None:
+                # Closing the wrapper would close the uploaded file, which is read twice
+                text.detach()
+    
+    @staticmethod
+    def _detect_encoding(file) -> str:
+        """
+        Encoding of a CSV file: UTF-8, else Windows-1252 (Excel's "CSV" export)
+        
+        The file is decoded in chunks, without being loaded whole.
+        """
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        file.seek(0)
+        try:
+            for chunk in iter(lambda: file.read(64 * 1024), b''):
+                decoder.decode(chunk)
+            decoder.decode(b'', final=True)
+            return 'utf-8-sig'
+        except UnicodeDecodeError:
+            return 'cp1252'
+        finally:
+            file.seek(0)
+    
+    @staticmethod
+    def _parse_price(value: str) -> Decimal:
+        """Price from a cell, accepting a decimal comma"""
+        price = Decimal(value.replace(',', '.').replace(' ', '')).quantize(Decimal('0.01'))
+        if not price.is_finite():
+            raise InvalidOperation
+        return price
+    
+    @staticmethod
+    def validate_row(values: Dict[str, str], depots: Dict[int, Any],
+                     images: Optional[Dict[str, zipfile.ZipInfo]]) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        Validate and convert one row
+        
+        Args:
+            values: Raw values by column
+            depots: The agency's depots by ID
+            images: ZIP members by file name, or None without ZIP
+            
+        Returns:
+            Tuple of (vehicle fields, error messages)
+        """
+        from vehicles.models import Vehicule
+        
+        errors = []
+        data = {
+            'matricule': values.get('matricule', '').upper(),
+            'marque': values.get('marque', ''),
+            'model': values.get('model', ''),
+            'description': values.get('description', ''),
+        }
+        for field in ('matricule', 'marque', 'model'):
+            if not data[field]:
+                errors.append(f"{field}: champ requis")
+        if data['matricule']:
+            is_valid, error = AdvancedValidators.validate_matricule(data['matricule'])
+            if not is_valid:
+                errors.append(f"matricule: {error}")
+        
+        for field in ('prix_jour', 'prix_heure'):
+            try:
+                data[field] = VehicleImportService._parse_price(values.get(field, ''))
+            except (InvalidOperation, ValueError):
+                errors.append(f"{field}: nombre invalide")
+                continue
+            is_valid, error = AdvancedValidators.validate_price(data[field])
+            if not is_valid:
+                errors.append(f"{field}: {error}")
+        
+        categories = {key.lower(): key for key, _ in Vehicule.CATEGORIE_CHOICES}
+        data['categorie_vehicule'] = categories.get(values.get('categorie_vehicule', '').lower())
+        if data['categorie_vehicule'] is None:
+            errors.append(f"categorie_vehicule: valeur invalide (valeurs: {', '.join(categories.values())})")
+        
+        etats = {key.lower(): key for key, _ in Vehicule.ETAT_CHOICES}
+        etats.update({label.lower(): key for key, label in Vehicule.ETAT_CHOICES})
+        etat = values.get('etat_vehicule', '')
+        data['etat_vehicule'] = etats.get(etat.lower()) if etat else 'enMarche'
+        if data['etat_vehicule'] is None:
+            errors.append("etat_vehicule: valeur invalide")
+        
+        disponibilite = values.get('disponibilite', '').lower()
+        data['disponibilite'] = disponibilite not in VehicleImportService.FALSE_VALUES
+        if disponibilite and disponibilite not in VehicleImportService.TRUE_VALUES | VehicleImportService.FALSE_VALUES:
+            errors.append("disponibilite: valeur invalide (oui/non)")
+        
+        data['depot_id'] = None
+        if values.get('depot'):
+            # An integer, possibly written as a number by a spreadsheet ("3.0")
+            try:
+                depot = Decimal(values['depot'])
+                if depot.is_finite() and depot == depot.to_integral_value():
+                    data['depot_id'] = int(depot)
+            except InvalidOperation:
+                pass
+            if data['depot_id'] not in depots:
+                errors.append("depot: dépôt introuvable pour cette agence")
+        
+        data['image'] = values.get('image') or None
+        if data['image']:
+            if images is None:
+                errors.append("image: aucune archive d'images fournie")
+            elif os.path.basename(data['image']) not in images:
+                errors.append("image: fichier absent de l'archive")
+            elif images[os.path.basename(data['image'])].file_size > FileService.MAX_IMAGE_SIZE:
+                errors.append(f"image: fichier trop volumineux (maximum {FileService.MAX_IMAGE_SIZE // (1024 * 1024)}MB)")
+        
+        return data, errors
+    
+    @staticmethod
+    def import_file(file, agence, images_zip=None) -> Dict[str, Any]:
+        """
+        Import the vehicles of a file into an agency
+        
+        The rows are counted first, so a file over MAX_ROWS is refused before
+        anything is inserted. They are then handled in chunks of CHUNK_SIZE:
+        validated, their images processed in the worker pool, then inserted
+        with bulk_create. An invalid row is reported and skipped; it never
+        aborts the import.
+        
+        Args:
+            file: CSV or XLSX file
+            agence: Agency receiving the vehicles
+            images_zip: Optional ZIP of the images named in the 'image' column
+            
+        Returns:
+            Dictionary with 'total', 'created' and 'errors'
+            ([{'ligne', 'matricule', 'errors'}])
+        """
+        from vehicles.models import Depot
+        
+        archive = None
+        images = None
+        if images_zip is not None:
+            try:
+                archive = zipfile.ZipFile(images_zip)
+            except zipfile.BadZipFile:
+                raise BusinessLogicError("Archive d'images invalide.")
+            images = {
+                os.path.basename(info.filename): info for info in archive.infolist()
+                if not info.is_dir() and os.path.basename(info.filename)
+            }
+        
+        depots = {depot.id: depot for depot in Depot.objects.filter(agence=agence)}
+        result = {'total': 0, 'created': 0, 'errors': []}
+        seen = set()
+        chunk = []
+        
+        try:
+            # Counted before anything is inserted: a file over the limit imports nothing
+            rows = VehicleImportService.read_rows(file)
+            try:
+                count = sum(1 for _ in itertools.islice(rows, VehicleImportService.MAX_ROWS + 1))
+            finally:
+                rows.close()
+            if count > VehicleImportService.MAX_ROWS:
+                raise BusinessLogicError(f"Trop de lignes (maximum {VehicleImportService.MAX_ROWS}).")
+            file.seek(0)
+            
+            for line, values in VehicleImportService.read_rows(file):
+                result['total'] += 1
+                data, errors = VehicleImportService.validate_row(values, depots, images)
+                if data['matricule'] in seen:
+                    errors.append("matricule: doublon dans le fichier")
+                seen.add(data['matricule'])
+                if errors:
+                    result['errors'].append({'ligne': line, 'matricule': data['matricule'], 'errors': errors})
+                    continue
+                
+                chunk.append((line, data))
+                if len(chunk) >= VehicleImportService.CHUNK_SIZE:
+                    VehicleImportService._import_chunk(chunk, agence, archive, images, result)
+                    chunk = []
+            if chunk:
+                VehicleImportService._import_chunk(chunk, agence, archive, images, result)
+        finally:
+            if archive is not None:
+                archive.close()
+        
+        result['errors'].sort(key=lambda error: error['ligne'])
+        return result
+    
+    @staticmethod
+    def _import_chunk(chunk: List[Tuple[int, Dict[str, Any]]], agence, archive: Optional[zipfile.ZipFile],
+                      images: Optional[Dict[str, zipfile.ZipInfo]], result: Dict[str, Any]):
+        """Insert one chunk of validated rows (see import_file)"""
+        from vehicles.models import Depot, Vehicule
+        
+        def fail(line, data, error):
+            result['errors'].append({'ligne': line, 'matricule': data['matricule'], 'errors': [error]})
+        
+        existing = set(Vehicule.objects.filter(
+            matricule__in=[data['matricule'] for _, data in chunk]
+        ).values_list('matricule', flat=True))
+        rows = []
+        for line, data in chunk:
+            if data['matricule'] in existing:
+                fail(line, data, "matricule: existe déjà")
+            else:
+                rows.append((line, data))
+        
+        # Images processed in the worker pool, a few at a time to bound memory
+        with_image = [(line, data) for line, data in rows if data['image']]
+        failed_lines = set()
+        for start in range(0, len(with_image), VehicleImportService.IMAGE_BATCH_SIZE):
+            batch = with_image[start:start + VehicleImportService.IMAGE_BATCH_SIZE]
+            files = [
+                SimpleUploadedFile(os.path.basename(data['image']), archive.read(images[os.path.basename(data['image'])]))
+                for _, data in batch
+            ]
+            uploaded = FileService.upload_images(files, upload_path='vehicles/', prefix='vehicle')
+            for (line, data), (file_path, error) in zip(batch, uploaded):
+                if error:
+                    fail(line, data, f"image: {error}")
+                    failed_lines.add(line)
+                else:
+                    data['img_vhl'] = file_path
+        rows = [(line, data) for line, data in rows if line not in failed_lines]
+        
+        def release_images(failed):
+            for _, data in failed:
+                if data.get('img_vhl'):
+                    FileService.delete_file(data['img_vhl'])
+        
+        try:
+            with transaction.atomic():
+                # Depot capacity: lock the depots of the chunk and fill the free places in row order
+                wanted = {data['depot_id'] for _, data in rows if data['depot_id']}
+                free = {
+                    depot.id: depot.capacite_dpt - depot.nb_vehicules
+                    for depot in Depot.objects.select_for_update().filter(id__in=wanted)
+                }
+                accepted, full = [], []
+                for line, data in rows:
+                    if data['depot_id']:
+                        if free[data['depot_id']] <= 0:
+                            full.append((line, data))
+                            continue
+                        free[data['depot_id']] -= 1
+                    accepted.append((line, data))
+                
+                Vehicule.objects.bulk_create([
+                    VehicleImportService._build(data, agence) for _, data in accepted
+                ])
+                placed = Counter(data['depot_id'] for _, data in accepted if data['depot_id'])
+                for depot_id, count in placed.items():
+                    Depot.objects.filter(pk=depot_id).update(
+                        nb_vehicules=F('nb_vehicules') + count, updated_at=timezone.now()
+                    )
+        except IntegrityError:
+            # A matricule was created concurrently: insert row by row to find it
+            accepted, full = [], []
+            for line, data in rows:
+                try:
+                    with transaction.atomic():
+                        VehicleImportService._build(data, agence).save()
+                    accepted.append((line, data))
+                except IntegrityError:
+                    fail(line, data, "matricule: existe déjà")
+                    release_images([(line, data)])
+                except DepotFullError:
+                    full.append((line, data))
+        
+        for line, data in full:
+            fail(line, data, f"depot: {DepotFullError.default_detail}")
+        release_images(full)
+        result['created'] += len(accepted)
+        transaction.on_commit(FleetStatusService.schedule_refresh)
+        if accepted:
+            transaction.on_commit(lambda: VehicleCatalogueCache.invalidate(agence.id))
+    
+    @staticmethod
+    def _build(data: Dict[str, Any], agence):
+        """Unsaved vehicle from validated row data"""
+        from vehicles.models import Vehicule
+        
+        return Vehicule(
+            agence=agence,
+            img_vhl=data.get('img_vhl'),
+            **{field: data[field] for field in (
+                'matricule', 'marque', 'model', 'prix_jour', 'prix_heure', 'description',
+                'categorie_vehicule', 'etat_vehicule', 'disponibilite', 'depot_id',
+            )}
+        )
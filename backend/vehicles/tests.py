@@ -0,0 +1,74 @@
+from decimal import Decimal
+from django.test import TestCase
+from rest_framework.test import APIClient
+from accounts.models import User, ProprietaireAgence, SecretaireAgence, Garagiste
+from agencies.models import Agence
+from .models import Vehicule
+
+
+class VehiclePriceUpdateTests(TestCase):
+    """update_price / bulk_update_price: owner only, ids read from JSON or form data"""
+
+    def setUp(self):
+        self.agence = Agence.objects.create(
+            nom_agence='Atlas Cars',
+            siege_agence='12 boulevard Mohammed V, Casablanca',
+            num_contact='0522000000',
+            email_agence='contact@atlascars.ma'
+        )
+        self.vehicules = [
+            Vehicule.objects.create(
+                matricule=f'{10000 + i}-A-1', marque='Dacia', model='Logan', prix_jour=300, prix_heure=30,
+                description='', categorie_vehicule='Petites', agence=self.agence
+            )
+            for i in range(14)
+        ]
+        self.staff = {}
+        for role, model in (('owner', ProprietaireAgence), ('secretary', SecretaireAgence), ('mechanic', Garagiste)):
+            user = User.objects.create(email=f'{role}@atlascars.ma', username=role)
+            model.objects.create(user=user, agence=self.agence)
+            self.staff[role] = user
+
+    def client_for(self, role):
+        client = APIClient()
+        client.force_authenticate(self.staff[role])
+        return client
+
+    def prices(self):
+        return {vehicule.id: vehicule.prix_jour for vehicule in Vehicule.objects.all()}
+
+    def test_only_the_owner_can_reprice(self):
+        for role in ('secretary', 'mechanic'):
+            client = self.client_for(role)
+            response = client.post('/api/vehicles/vehicules/bulk_update_price/', {'percentage': 50}, format='json')
+            self.assertEqual(response.status_code, 403)
+            response = client.post(
+                f'/api/vehicles/vehicules/{self.vehicules[0].id}/update_price/', {'prix_jour': 1}, format='json'
+            )
+            self.assertEqual(response.status_code, 403)
+        self.assertEqual(set(self.prices().values()), {Decimal('300.00')})
+
+        response = self.client_for('owner').post(
+            '/api/vehicles/vehicules/bulk_update_price/', {'percentage': 10}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['updated'], 14)
+
+    def test_form_data_ids_are_not_split_into_digits(self):
+        target = self.vehicules[11]
+        response = self.client_for('owner').post(
+            '/api/vehicles/vehicules/bulk_update_price/', {'percentage': 10, 'vehicules': str(target.id)}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['updated'], 1)
+        changed = [vehicule_id for vehicule_id, prix in self.prices().items() if prix != Decimal('300.00')]
+        self.assertEqual(changed, [target.id])
+
+    def test_invalid_ids_answer_400(self):
+        client = self.client_for('owner')
+        for vehicules in (str(self.vehicules[0].id), [self.vehicules[0].id, 'abc'], [1.5]):
+            response = client.post(
+                '/api/vehicles/vehicules/bulk_update_price/', {'percentage': 10, 'vehicules': vehicules}, format='json'
+            )
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(self.prices().values()), {Decimal('300.00')})
@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import VehiculeViewSet, DepotViewSet
+from .views import VehiculeViewSet, DepotViewSet, PrixHistoriqueViewSet
 
 router = DefaultRouter()
 router.register(r'vehicules', VehiculeViewSet, basename='vehicule')
 router.register(r'depots', DepotViewSet, basename='depot')
+router.register(r'prix-historique', PrixHistoriqueViewSet, basename='prix-historique')
 
 urlpatterns = [
     path('', include(router.urls)),
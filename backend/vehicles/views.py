@@ -4,25 +4,43 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from .models import Vehicule, Depot, PrixHistorique
 from .serializers import VehiculeSerializer, DepotSerializer, PrixHistoriqueSerializer
-from core.permissions import IsAgencyStaff, IsProprietaireAgence, IsAdminAgence
+from core.permissions import IsAgencyStaff, IsProprietaireAgence, IsAdminAgence, IsAdministrateur
+from core.exceptions import BusinessLogicError, DepotFullError, ValidationError
 from core.response import APIResponse
-from .services import VehicleService
+from .services import VehicleService, DepotService, VehicleImportService, PriceHistoryService, VehicleCatalogueCache
 from core.file_service import FileService
+from core.export_service import ExportService
+from core.utils import get_user_agency
+from core.pricing_service import PricingService
+from core.conditional import ConditionalGetMixin
+from core.reference_data import ReferenceDataService
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 
 
-class VehiculeViewSet(viewsets.ModelViewSet):
+class VehiculeViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Vehicule ViewSet"""
+    # Agency names and depot addresses come from the reference data cache
     queryset = Vehicule.objects.all()
     serializer_class = VehiculeSerializer
     permission_classes = [IsAuthenticated]
+    # Agency name and depot address are part of the payload
+    conditional_fields = ['updated_at', 'agence__updated_at', 'depot__updated_at']
+    conditional_namespaces = [ReferenceDataService.NAMESPACE]
+    # Availability changes with every booking: always revalidate
+    cache_control = {'private': True, 'no_cache': True}
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['matricule', 'marque', 'model', 'description']
     ordering_fields = ['prix_jour', 'prix_heure', 'created_at']
     ordering = ['-created_at']
     
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'bulk_import', 'export']:
             return [IsAgencyStaff()]
+        if self.action in ['update_price', 'bulk_update_price']:
+            return [IsProprietaireAgence()]
         return [IsAuthenticated()]
     
     def create(self, request, *args, **kwargs):
@@ -46,7 +64,13 @@ class VehiculeViewSet(viewsets.ModelViewSet):
                     status_code=status.HTTP_400_BAD_REQUEST
                 )
         
-        self.perform_create(serializer)
+        try:
+            self.perform_create(serializer)
+        except DepotFullError:
+            # Depot filled up concurrently: drop the image uploaded above
+            if 'img_vhl' in request.FILES:
+                FileService.delete_file(serializer.validated_data['img_vhl'])
+            raise
         headers = self.get_success_headers(serializer.data)
         return APIResponse.created(
             data=serializer.data,
@@ -64,10 +88,6 @@ class VehiculeViewSet(viewsets.ModelViewSet):
         if 'img_vhl' in request.FILES:
             try:
                 uploaded_file = request.FILES['img_vhl']
-                # Delete old image if exists
-                if instance.img_vhl:
-                    FileService.delete_file(instance.img_vhl.name)
-                
                 file_path = FileService.upload_image(
                     uploaded_file,
                     upload_path='vehicles/',
@@ -80,12 +100,36 @@ class VehiculeViewSet(viewsets.ModelViewSet):
                     status_code=status.HTTP_400_BAD_REQUEST
                 )
         
-        self.perform_update(serializer)
+        old_image = instance.img_vhl.name if instance.img_vhl else None
+        try:
+            self.perform_update(serializer)
+        except DepotFullError:
+            if 'img_vhl' in request.FILES:
+                FileService.delete_file(serializer.validated_data['img_vhl'])
+            raise
+        # Release old image once replaced (kept while other records reference it)
+        if old_image and 'img_vhl' in request.FILES:
+            FileService.delete_file(old_image)
         return APIResponse.success(
             data=serializer.data,
             message="Vehicle updated successfully."
         )
     
+    def render_list(self, request, *args, **kwargs):
+        # Keyed on the ETag just computed: the body is never older than its validator
+        key = VehicleCatalogueCache.get_key(request, self.etag)
+        if key is None:
+            return super().render_list(request, *args, **kwargs)
+        return Response(VehicleCatalogueCache.get_page(
+            key, lambda: super(VehiculeViewSet, self).render_list(request, *args, **kwargs).data
+        ))
+    
+    def perform_destroy(self, instance):
+        image_path = instance.img_vhl.name if instance.img_vhl else None
+        instance.delete()
+        if image_path:
+            FileService.delete_file(image_path)
+    
     def get_queryset(self):
         queryset = super().get_queryset()
         
@@ -105,6 +149,171 @@ class VehiculeViewSet(viewsets.ModelViewSet):
         
         return VehicleService.filter_vehicles(queryset, filters)
     
+    @action(detail=False, methods=['post'], url_path='import')
+    def bulk_import(self, request):
+        """
+        Import vehicles into the user's agency from a CSV/XLSX 'file', with an
+        optional 'images' ZIP holding the files named in the 'image' column
+        
+        Invalid rows are skipped and reported; the other rows are imported.
+        """
+        agency = get_user_agency(request.user)
+        if not agency:
+            return APIResponse.error(
+                message="Agence non trouvée.",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        if 'file' not in request.FILES:
+            return APIResponse.error(
+                message="Fichier d'import requis (CSV ou XLSX).",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
+        result = VehicleImportService.import_file(request.FILES['file'], agency, request.FILES.get('images'))
+        return APIResponse.success(
+            data=result,
+            message=f"{result['created']} vehicle(s) imported, {len(result['errors'])} row(s) rejected."
+        )
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Export the agency's vehicles (list filters apply) in the import format: output=csv (default) or xlsx"""
+        agency = get_user_agency(request.user)
+        if not agency:
+            return APIResponse.error(
+                message="Agence non trouvée.",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
+        vehicules = self.filter_queryset(self.get_queryset()).filter(agence=agency)
+        if request.query_params.get('output') == 'xlsx':
+            return ExportService.export_vehicles_to_excel(vehicules, filename=f'vehicules_agence_{agency.id}.xlsx')
+        return ExportService.export_vehicles_to_csv(vehicules, filename=f'vehicules_agence_{agency.id}.csv')
+    
+    @action(detail=False, methods=['get', 'post'])
+    def quote(self, request):
+        """
+        Quote every vehicle matching the list filters (or the given 'vehicules' ids)
+        for a period, in one call: date_debut, date_fin (dates, or datetimes to
+        bill extra hours) and an optional code_promo
+        """
+        params = request.data if request.method == 'POST' else request.query_params
+        
+        periode = []
+        for param in ('date_debut', 'date_fin'):
+            value = str(params.get(param) or '')
+            try:
+                # Date first: parse_datetime also reads a bare date, as midnight
+                parsed = parse_date(value) or parse_datetime(value)
+            except ValueError:
+                # Well formed but not a real date or time (e.g. 2024-02-30, T25:00)
+                parsed = None
+            if parsed is None:
+                return APIResponse.error(
+                    message=f"{param} invalide (format attendu: AAAA-MM-JJ ou AAAA-MM-JJTHH:MM).",
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+            if isinstance(parsed, datetime) and timezone.is_naive(parsed):
+                parsed = timezone.make_aware(parsed)
+            periode.append(parsed)
+        if not all(isinstance(value, datetime) for value in periode):
+            periode = [value.date() if isinstance(value, datetime) else value for value in periode]
+        if periode[1] < periode[0]:
+            return APIResponse.error(
+                message="La date de fin doit être postérieure à la date de début.",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
+        code_promo = None
+        if params.get('code_promo'):
+            from promotions.services import PromoCodeService
+            code_promo = PromoCodeService.get_valid(params['code_promo'])
+            if code_promo is None:
+                return APIResponse.error(
+                    message="Code promo invalide ou expiré.",
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+        
+        vehicules = self.filter_queryset(self.get_queryset())
+        ids = params.getlist('vehicules') if hasattr(params, 'getlist') else params.get('vehicules')
+        if ids:
+            try:
+                ids = [int(vehicule_id) for vehicule_id in (ids if isinstance(ids, list) else [ids])]
+            except (TypeError, ValueError):
+                return APIResponse.error(
+                    message="Identifiants de véhicules invalides.",
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+            vehicules = vehicules.filter(id__in=ids)
+        
+        return APIResponse.success(data=PricingService.quote(vehicules, periode[0], periode[1], code_promo))
+    
+    @action(detail=False, methods=['post'], permission_classes=[IsProprietaireAgence])
+    def bulk_update_price(self, request):
+        """
+        Reprice the agency's vehicles matching 'categorie', 'depot' and/or
+        'vehicules' (ids): either by 'percentage' or to absolute 'prix_jour'/'prix_heure'
+        
+        Vehicles with active reservations are left unchanged and reported.
+        """
+        agency = get_user_agency(request.user)
+        if not agency:
+            return APIResponse.error(
+                message="Agence non trouvée.",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
+        values = {}
+        for param in ('percentage', 'prix_jour', 'prix_heure'):
+            value = request.data.get(param)
+            if value in (None, ''):
+                continue
+            try:
+                values[param] = Decimal(str(value))
+            except InvalidOperation:
+                return APIResponse.error(
+                    message=f"{param} invalide.",
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+        if 'percentage' in values and ('prix_jour' in values or 'prix_heure' in values):
+            return APIResponse.error(
+                message="Indiquez un pourcentage ou des prix, pas les deux.",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # A JSON list, or the repeated 'vehicules' field of form data
+        ids = request.data.getlist('vehicules') if hasattr(request.data, 'getlist') else request.data.get('vehicules')
+        depot = str(request.data.get('depot') or '')
+        if (
+            ids is not None and not isinstance(ids, list)
+            or not all(str(vehicule_id).isdigit() for vehicule_id in ids or [])
+            or depot and not depot.isdigit()
+        ):
+            return APIResponse.error(
+                message="Identifiants de dépôt ou de véhicules invalides.",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
+        vehicules = Vehicule.objects.filter(agence=agency)
+        if request.data.get('categorie'):
+            vehicules = vehicules.filter(categorie_vehicule=request.data['categorie'])
+        if depot:
+            vehicules = vehicules.filter(depot_id=int(depot))
+        if ids:
+            vehicules = vehicules.filter(id__in=[int(vehicule_id) for vehicule_id in ids])
+        
+        try:
+            result = VehicleService.bulk_update_prices(vehicules, user=request.user, **values)
+        except BusinessLogicError as e:
+            return APIResponse.error(
+                message=str(e.detail),
+                status_code=e.status_code
+            )
+        return APIResponse.success(
+            data=result,
+            message="Prices updated successfully."
+        )
+    
     @action(detail=True, methods=['post'], permission_classes=[IsProprietaireAgence])
     def update_price(self, request, pk=None):
         """Update vehicle price and create history"""
@@ -132,11 +341,14 @@ class VehiculeViewSet(viewsets.ModelViewSet):
             )
 
 
-class DepotViewSet(viewsets.ModelViewSet):
+class DepotViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Depot ViewSet"""
     queryset = Depot.objects.all()
     serializer_class = DepotSerializer
     permission_classes = [IsAgencyStaff]
+    conditional_fields = ['updated_at', 'agence__updated_at']
+    conditional_namespaces = [ReferenceDataService.NAMESPACE]
+    cache_control = {'private': True, 'no_cache': True}
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -146,4 +358,89 @@ class DepotViewSet(viewsets.ModelViewSet):
         if agency:
             queryset = queryset.filter(agence=agency)
         return queryset
+    
+    @action(detail=False, methods=['get'])
+    def availability(self, request):
+        """Active depots of the agency with free space (read from the occupancy counters)"""
+        agency = get_user_agency(request.user)
+        if not agency:
+            return APIResponse.error(
+                message="Agence non trouvée.",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            min_places = max(int(request.query_params.get('min_places', 1)), 0)
+        except ValueError:
+            return APIResponse.error(
+                message="min_places invalide.",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        return APIResponse.success(data=list(DepotService.get_available(agency.id, min_places)))
+
+
 
+class PrixHistoriqueViewSet(viewsets.ReadOnlyModelViewSet):
+    """Prix historique ViewSet (price changes of the agency's vehicles)"""
+    queryset = PrixHistorique.objects.select_related('vehicule', 'modifie_par')
+    serializer_class = PrixHistoriqueSerializer
+    permission_classes = [IsAgencyStaff | IsAdministrateur]
+    
+    def handle_exception(self, exc):
+        # Invalid filters (see get_queryset) answer like the other 400s of these routes
+        if isinstance(exc, ValidationError):
+            return APIResponse.error(message=str(exc.detail), status_code=exc.status_code)
+        return super().handle_exception(exc)
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not hasattr(self.request.user, 'administrateur'):
+            queryset = queryset.filter(vehicule__agence=get_user_agency(self.request.user))
+        
+        params = self.request.query_params
+        # Malformed filters answer 400 (ValidationError) rather than failing in the query
+        for param in ('vehicule', 'agence'):
+            if params.get(param) and not params[param].isdigit():
+                raise ValidationError(f"{param} invalide.")
+        dates = {}
+        for param in ('date_from', 'date_to'):
+            try:
+                dates[param] = parse_date(params.get(param) or '')
+            except ValueError:
+                # Well formed but not a real day (e.g. 2024-02-30)
+                dates[param] = None
+            if params.get(param) and dates[param] is None:
+                raise ValidationError(f"{param} invalide (format attendu: AAAA-MM-JJ).")
+        
+        if params.get('vehicule'):
+            queryset = queryset.filter(vehicule_id=params['vehicule'])
+        if params.get('categorie'):
+            queryset = queryset.filter(vehicule__categorie_vehicule=params['categorie'])
+        if params.get('agence'):
+            queryset = queryset.filter(vehicule__agence_id=params['agence'])
+        if dates['date_from']:
+            queryset = queryset.filter(created_at__date__gte=dates['date_from'])
+        if dates['date_to']:
+            queryset = queryset.filter(created_at__date__lte=dates['date_to'])
+        return queryset
+    
+    @action(detail=False, methods=['get'])
+    def series(self, request):
+        """
+        Price series for charts, one point per bucket (day, week or month),
+        for a 'vehicule', a 'categorie' or an 'agence' (and date_from/date_to)
+        """
+        bucket = request.query_params.get('bucket', 'day')
+        if bucket not in PriceHistoryService.BUCKETS:
+            return APIResponse.error(
+                message=f"bucket invalide (valeurs: {', '.join(PriceHistoryService.BUCKETS)}).",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        # Validates vehicule/agence/dates; the series needs no join for a single vehicle
+        history = self.get_queryset().select_related(None)
+        return APIResponse.success(data={
+            'bucket': bucket,
+            'series': PriceHistoryService.get_series(
+                history, bucket, per_vehicle=bool(request.query_params.get('vehicule'))
+            ),
+        })
@@ -1,4 +1,5 @@
 import apiClient from './client';
+import type { ImageRenditions } from './vehicles';
 
 export interface Agency {
   id: number;
@@ -10,6 +11,7 @@ export interface Agency {
   nmbr_flotte: number;
   logo_agence?: string;
   logo_url?: string;
+  logo_renditions?: ImageRenditions;
   is_active: boolean;
 }
 
@@ -7,7 +7,7 @@ export interface Contract {
   pdf_url?: string;
   status: string;
   signed_at?: string;
-  signature_locataire?: string;
+  signature_url?: string;
 }
 
 export const contractsAPI = {
@@ -21,7 +21,8 @@ export const contractsAPI = {
     return response.data;
   },
 
-  create: async (data: { reservation: number }) => {
+  // pdf_upload: id of a completed CONTRACT chunked upload (see uploadsAPI.uploadFile)
+  create: async (data: { reservation: number; pdf_upload?: string }) => {
     const response = await apiClient.post<Contract>('/contracts/contrats/', data);
     return response.data;
   },
@@ -32,5 +33,18 @@ export const contractsAPI = {
     });
     return response.data;
   },
-};
 
+  generatePdf: async (id: number) => {
+    const response = await apiClient.post<Contract>(`/contracts/contrats/${id}/generate_pdf/`);
+    return response.data;
+  },
+
+  // Generates the contracts of a day's pickups in the background (date: YYYY-MM-DD, default today)
+  generateBatch: async (data: { date?: string; replace?: boolean } = {}) => {
+    const response = await apiClient.post<{ date: string; scheduled: number }>(
+      '/contracts/contrats/generate_batch/',
+      data
+    );
+    return response.data;
+  },
+};
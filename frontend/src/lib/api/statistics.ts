@@ -35,6 +35,17 @@ export interface Statistics {
   }>;
 }
 
+export interface FleetStatus {
+  total: number;
+  available: number;
+  unavailable: number;
+  rented: number;
+  by_state: Record<string, number>;
+  by_category: Record<string, number>;
+  by_depot: Array<{ depot: number | null; count: number }>;
+  refreshed_at: string | null;
+}
+
 export const statisticsAPI = {
   getStatistics: async (startDate?: string, endDate?: string): Promise<Statistics> => {
     const params: any = {};
@@ -45,6 +56,14 @@ export const statisticsAPI = {
     return response.data.data || response.data;
   },
 
+  getFleetStatus: async (agenceId?: number): Promise<FleetStatus> => {
+    const params: any = {};
+    if (agenceId) params.agence = agenceId;
+    
+    const response = await apiClient.get<APIResponse<FleetStatus>>('/statistics/fleet/', { params });
+    return response.data.data || response.data;
+  },
+
   exportStatistics: async (format: 'excel' | 'pdf' = 'excel'): Promise<Blob> => {
     const response = await apiClient.get(`/statistics/export/?format=${format}`, {
       responseType: 'blob',
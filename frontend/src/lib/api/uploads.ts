@@ -0,0 +1,84 @@
+import apiClient from './client';
+
+export type UploadPurpose = 'CONTRACT' | 'DOCUMENT';
+
+export interface UploadSession {
+  id: string;
+  purpose: UploadPurpose;
+  filename: string;
+  total_size: number;
+  received_bytes: number;
+  sha256?: string;
+  status: string;
+  status_display?: string;
+}
+
+const CHUNK_SIZE = 4 * 1024 * 1024;
+
+const sha256Hex = async (data: ArrayBuffer) => {
+  const digest = await crypto.subtle.digest('SHA-256', data);
+  return Array.from(new Uint8Array(digest))
+    .map((byte) => byte.toString(16).padStart(2, '0'))
+    .join('');
+};
+
+export const uploadsAPI = {
+  createSession: async (data: {
+    filename: string;
+    total_size: number;
+    purpose: UploadPurpose;
+    sha256?: string;
+  }) => {
+    const response = await apiClient.post<{ data: UploadSession }>('/uploads/sessions/', data);
+    return response.data.data;
+  },
+
+  getSession: async (id: string) => {
+    const response = await apiClient.get<UploadSession>(`/uploads/sessions/${id}/`);
+    return response.data;
+  },
+
+  sendChunk: async (id: string, offset: number, chunk: ArrayBuffer) => {
+    const response = await apiClient.put<{ data: UploadSession }>(
+      `/uploads/sessions/${id}/chunk/`,
+      chunk,
+      {
+        headers: {
+          'Content-Type': 'application/octet-stream',
+          'Upload-Offset': String(offset),
+          'X-Chunk-SHA256': await sha256Hex(chunk),
+        },
+      }
+    );
+    return response.data.data;
+  },
+
+  complete: async (id: string) => {
+    const response = await apiClient.post<{ data: UploadSession }>(`/uploads/sessions/${id}/complete/`);
+    return response.data.data;
+  },
+
+  /**
+   * Upload a file in chunks. Pass the session of an interrupted upload
+   * to resume it from the last chunk received by the server.
+   */
+  uploadFile: async (
+    file: File,
+    purpose: UploadPurpose,
+    onProgress?: (received: number, total: number) => void,
+    resumeFrom?: UploadSession
+  ) => {
+    let session = resumeFrom
+      ? await uploadsAPI.getSession(resumeFrom.id)
+      : await uploadsAPI.createSession({ filename: file.name, total_size: file.size, purpose });
+
+    while (session.received_bytes < file.size) {
+      const offset = session.received_bytes;
+      const chunk = await file.slice(offset, offset + CHUNK_SIZE).arrayBuffer();
+      session = await uploadsAPI.sendChunk(session.id, offset, chunk);
+      onProgress?.(session.received_bytes, file.size);
+    }
+
+    return uploadsAPI.complete(session.id);
+  },
+};
@@ -15,6 +15,13 @@ export interface Vehicle {
   agence: number;
   img_vhl?: string;
   image_url?: string;
+  image_renditions?: ImageRenditions;
+}
+
+export interface ImageRenditions {
+  thumb: { jpeg: string; webp?: string };
+  medium: { jpeg: string; webp?: string };
+  full: { jpeg: string; webp?: string };
 }
 
 export interface VehicleFilters {
@@ -27,6 +34,25 @@ export interface VehicleFilters {
   search?: string;
 }
 
+export interface VehicleQuote {
+  vehicule: number;
+  prix_original: string;
+  reduction: string;
+  prix: string;
+}
+
+export interface QuoteResult {
+  jours: number;
+  heures: number;
+  quotes: VehicleQuote[];
+}
+
+export interface VehicleImportResult {
+  total: number;
+  created: number;
+  errors: Array<{ ligne: number; matricule: string; errors: string[] }>;
+}
+
 export const vehiclesAPI = {
   getAll: async (filters?: VehicleFilters) => {
     const params = new URLSearchParams();
@@ -67,5 +93,65 @@ export const vehiclesAPI = {
   delete: async (id: number) => {
     await apiClient.delete(`/vehicles/vehicules/${id}/`);
   },
+
+  // Reprice a category, a depot or a list of vehicles: by percentage, or to absolute prices
+  bulkUpdatePrice: async (data: {
+    categorie?: string;
+    depot?: number;
+    vehicules?: number[];
+    percentage?: number;
+    prix_jour?: number;
+    prix_heure?: number;
+  }) => {
+    const response = await apiClient.post<{ data: { updated: number; skipped: Array<{ id: number; matricule: string }> } }>(
+      '/vehicles/vehicules/bulk_update_price/',
+      data
+    );
+    return response.data.data;
+  },
+
+  // Downsampled price history for charts: one point per day, week or month
+  getPriceSeries: async (params: {
+    vehicule?: number;
+    categorie?: string;
+    agence?: number;
+    bucket?: 'day' | 'week' | 'month';
+    date_from?: string;
+    date_to?: string;
+  }) => {
+    const response = await apiClient.get('/vehicles/prix-historique/series/', { params });
+    return response.data.data;
+  },
+
+  // Bulk import from a CSV/XLSX file, with an optional ZIP of the images named in its 'image' column
+  importFile: async (file: File, images?: File) => {
+    const formData = new FormData();
+    formData.append('file', file);
+    if (images) formData.append('images', images);
+    const response = await apiClient.post<{ data: VehicleImportResult }>('/vehicles/vehicules/import/', formData, {
+      headers: { 'Content-Type': 'multipart/form-data' },
+    });
+    return response.data.data;
+  },
+
+  exportFile: async (output: 'csv' | 'xlsx' = 'csv'): Promise<Blob> => {
+    const response = await apiClient.get(`/vehicles/vehicules/export/?output=${output}`, {
+      responseType: 'blob',
+    });
+    return response.data;
+  },
+
+  // Prices every vehicle matching the filters (or the given ids) in one call
+  quote: async (data: {
+    date_debut: string;
+    date_fin: string;
+    code_promo?: string;
+    vehicules?: number[];
+    categorie?: string;
+    agence?: number;
+  }) => {
+    const response = await apiClient.post<{ data: QuoteResult }>('/vehicles/vehicules/quote/', data);
+    return response.data.data;
+  },
 };
 
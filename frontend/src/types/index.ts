@@ -98,7 +98,7 @@ export interface Contract {
   pdf_file?: string;
   status: ContractStatus;
   signed_at?: string;
-  signature_locataire?: string;
+  signature_url?: string;
   created_at: string;
   updated_at: string;
 }